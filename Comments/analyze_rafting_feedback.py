@@ -13,8 +13,14 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import pathlib
+import sys
 from datetime import datetime
 
+# Make the project's `utils` package importable when run as a script from any folder
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from utils.utils_feedback_frame import load_feedback_json
+
 # Set up paths
 DATA_FOLDER = pathlib.Path("data")
 PLOTS_FOLDER = pathlib.Path("plots")
@@ -27,11 +33,9 @@ FEEDBACK_FILE = DATA_FOLDER / "all_rafting_remarks.json"  # Now includes both po
 #####################################
 
 def load_feedback_data():
-    """Load rafting feedback JSON into a Pandas DataFrame."""
+    """Load rafting feedback JSON into a typed Pandas DataFrame (dates parsed, is_negative as 0/1)."""
     try:
-        with open(FEEDBACK_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return pd.DataFrame(data)
+        return load_feedback_json(FEEDBACK_FILE)
     except FileNotFoundError:
         print(f"Error: {FEEDBACK_FILE} not found.")
         return pd.DataFrame()
@@ -46,8 +50,7 @@ if df.empty:
     print("No data available for analysis.")
     exit()
 
-# Convert date columns
-df["date"] = pd.to_datetime(df["date"])
+# Year-Week labels (dates are already parsed by the loader)
 df["year_week"] = df["date"].dt.strftime("%Y-W%W")  # Convert to Year-Week format
 
 #####################################
@@ -62,7 +65,7 @@ def save_plot(fig, filename):
 ### 📊 1. Guide Performance - Positive vs. Negative Feedback
 def plot_guide_performance():
     """Generate bar chart for guide feedback (positive & negative)."""
-    guide_counts = df.groupby(["guide", "is_negative"]).size().reset_index(name="count")
+    guide_counts = df.groupby(["guide", "is_negative"], observed=True).size().reset_index(name="count")
 
     fig, ax = plt.subplots(figsize=(12, 6))
     sns.barplot(x="count", y="guide", hue="is_negative", data=guide_counts, palette=["green", "red"], ax=ax)
@@ -99,8 +102,7 @@ def plot_weather_impact():
 def plot_river_flow_impact():
     """Generate a scatter plot showing river flow vs. feedback (positive & negative)."""
     if "river_summary" in df.columns:
-        df["river_flow"] = df["river_summary"].apply(lambda x: float(x.split(" ")[1]) if isinstance(x, str) else None)
-        
+        # river_flow is parsed from river_summary by the loader
         fig, ax = plt.subplots(figsize=(10, 6))
         sns.scatterplot(data=df, x="river_flow", y="guide", hue="is_negative", palette=["green", "red"], ax=ax)
         ax.set_title("🌊 River Flow vs. Guide Feedback")
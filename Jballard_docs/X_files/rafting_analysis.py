@@ -1,8 +1,13 @@
-import pandas as pd
+import sys
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 
+# Make the project's `utils` package importable when run as a script from any folder
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from utils.utils_feedback_frame import load_feedback_csv
+
 # Define file paths
 DATA_FILE = "data/rafting_feedback.csv"
 IMAGES_FOLDER = Path("images")  # Updated to save in 'images/'
@@ -10,23 +15,9 @@ IMAGES_FOLDER = Path("images")  # Updated to save in 'images/'
 # Ensure the images folder exists
 IMAGES_FOLDER.mkdir(parents=True, exist_ok=True)
 
-# Load Data
-df = pd.read_csv(DATA_FILE)
-
-# Convert date to datetime format
-df["date"] = pd.to_datetime(df["date"], errors="coerce")
-
-# Handle missing values
-df.fillna("Unknown", inplace=True)
-
-# Convert 'is_negative' to binary (0 = positive, 1 = negative)
-df["is_negative"] = df["is_negative"].apply(lambda x: 1 if x.lower() == "yes" else 0)
-
-# Extract week number for trend analysis
-df["week"] = df["date"].dt.isocalendar().week
-
-# Convert river flow to numeric (handle missing values)
-df["river_flow"] = pd.to_numeric(df["river_flow"], errors="coerce")
+# Load Data: typed columns, categorical guide/weather/trip_type, 'Unknown' for
+# missing categories, numeric river flow, is_negative as 0/1, and ISO week
+df = load_feedback_csv(DATA_FILE)
 
 ############################################
 # 🔹 1️⃣ Positive vs Negative Feedback Count
@@ -59,7 +50,7 @@ plt.close()
 ############################################
 # 🔹 3️⃣ Weather vs Negative Feedback
 ############################################
-weather_impact = df.groupby("weather")["is_negative"].mean()
+weather_impact = df.groupby("weather", observed=True)["is_negative"].mean()
 
 plt.figure(figsize=(12, 5))
 sns.barplot(x=weather_impact.index, y=weather_impact.values, palette="coolwarm")
@@ -6,6 +6,19 @@ Consume json messages from a Kafka topic and process them.
 Example Kafka message format:
 {"timestamp": "2025-01-11T18:15:00Z", "temperature": 225.0}
 
+Messages may carry a probe id (SMOKER_PROBE_ID_FIELD, default "probe_id");
+each probe gets its own windows, so one consumer can watch many smokers on
+one topic. Messages without a probe id are tracked as probe "default".
+
+Stalls are checked over one or more sliding windows at once: count-based
+(SMOKER_ROLLING_WINDOW_SIZE, e.g. "10" or "10,60") and/or time-based
+(SMOKER_ROLLING_WINDOW_SECONDS, e.g. "300"). Each window tracks its min and
+max with monotonic queues, so every reading costs amortized O(1). Probe state
+lives in fixed-size arrays (SMOKER_MAX_PROBES), and probes that go quiet for
+SMOKER_PROBE_IDLE_SECONDS are evicted.
+
+A stall is logged when a probe's window enters it and again when it ends.
+
 """
 
 #####################################
@@ -15,11 +28,7 @@ Example Kafka message format:
 # Import packages from Python Standard Library
 import os
 import json
-
-# Use a deque ("deck") - a double-ended queue data structure
-# A deque is a good way to monitor a certain number of "most recent" messages
-# A deque is a great data structure for time windows (e.g. the last 5 messages)
-from collections import deque
+from datetime import datetime
 
 # Import external packages
 from dotenv import load_dotenv
@@ -27,6 +36,7 @@ from dotenv import load_dotenv
 # Import functions from local modules
 from utils.utils_consumer import create_kafka_consumer
 from utils.utils_logger import logger
+from utils.utils_window import KeyedWindowStore
 
 #####################################
 # Load Environment Variables
@@ -61,44 +71,93 @@ def get_stall_threshold() -> float:
     return temp_variation
 
 
-def get_rolling_window_size() -> int:
-    """Fetch rolling window size from environment or use default."""
-    window_size = int(os.getenv("SMOKER_ROLLING_WINDOW_SIZE", 5))
-    logger.info(f"Rolling window size: {window_size}")
-    return window_size
+def get_rolling_window_sizes() -> list:
+    """Fetch count-based rolling window sizes (comma-separated) from environment or use default."""
+    raw = os.getenv("SMOKER_ROLLING_WINDOW_SIZE", "5")
+    window_sizes = [int(size) for size in raw.split(",") if size.strip()]
+    logger.info(f"Rolling window sizes: {window_sizes}")
+    return window_sizes
+
+
+def get_rolling_window_seconds() -> list:
+    """Fetch time-based rolling window lengths in seconds (comma-separated) from environment, if any."""
+    raw = os.getenv("SMOKER_ROLLING_WINDOW_SECONDS", "")
+    window_seconds = [float(seconds) for seconds in raw.split(",") if seconds.strip()]
+    logger.info(f"Rolling window seconds: {window_seconds or 'none'}")
+    return window_seconds
+
+
+def get_probe_id_field() -> str:
+    """Fetch the message field that identifies the probe from environment or use default."""
+    probe_field = os.getenv("SMOKER_PROBE_ID_FIELD", "probe_id")
+    logger.info(f"Probe id field: {probe_field}")
+    return probe_field
+
+
+def get_max_probes() -> int:
+    """Fetch the maximum number of probes tracked at once from environment or use default."""
+    max_probes = int(os.getenv("SMOKER_MAX_PROBES", 1024))
+    logger.info(f"Max probes tracked: {max_probes}")
+    return max_probes
+
+
+def get_probe_idle_seconds() -> float:
+    """Fetch how long (seconds) a probe may go quiet before its state is evicted."""
+    idle_seconds = float(os.getenv("SMOKER_PROBE_IDLE_SECONDS", 600))
+    logger.info(f"Probe idle eviction: {idle_seconds} seconds")
+    return idle_seconds
 
 
 #####################################
-# Define a function to detect a stall
+# Define functions to build windows and detect a stall
 #####################################
 
 
-def detect_stall(rolling_window_deque: deque) -> bool:
+def create_window_store(window_sizes: list, window_seconds: list, max_probes: int, idle_seconds: float) -> KeyedWindowStore:
     """
-    Detect a temperature stall based on the rolling window.
+    Build the per-probe sliding min/max windows.
 
     Args:
-        rolling_window_deque (deque): Rolling window of temperature readings.
+        window_sizes (list): Count-based window sizes (readings).
+        window_seconds (list): Time-based window lengths (seconds).
+        max_probes (int): Maximum number of probes tracked at once.
+        idle_seconds (float): Evict probes not heard from for this long (0 = never).
+
+    Returns:
+        KeyedWindowStore: Window state for every probe.
+    """
+    return KeyedWindowStore(window_sizes, window_seconds, max_keys=max_probes, idle_seconds=idle_seconds)
+
+
+def parse_timestamp(timestamp) -> float:
+    """Return the reading time in epoch seconds for an ISO-8601 timestamp."""
+    return datetime.fromisoformat(str(timestamp)).timestamp()
+
+
+def detect_stall(store: KeyedWindowStore, slot: int, window: int, stall_threshold: float) -> bool:
+    """
+    Detect a temperature stall based on one rolling window of one probe.
+
+    Args:
+        store (KeyedWindowStore): Per-probe rolling windows of temperature readings.
+        slot (int): The probe's slot in the store.
+        window (int): Index of the window to check.
+        stall_threshold (float): Max temperature range (°F) that counts as a stall.
 
     Returns:
         bool: True if a stall is detected, False otherwise.
     """
-    WINDOW_SIZE: int = get_rolling_window_size()
-    if len(rolling_window_deque) < WINDOW_SIZE:
-        # We don't have a full deque yet
-        # Keep reading until the deque is full
-        logger.debug(
-            f"Rolling window size: {len(rolling_window_deque)}. Waiting for {WINDOW_SIZE}."
-        )
+    window_range = store.window_range(slot, window)
+    if window_range is None:
+        # Keep reading until the window covers its whole span
         return False
 
-    # Once the deque is full we can calculate the temperature range
-    # Use Python's built-in min() and max() functions
+    # The window keeps its min and max current, so the range is O(1)
     # If the range is less than or equal to the threshold, we have a stall
     # And our food is ready :)
-    temp_range = max(rolling_window_deque) - min(rolling_window_deque)
-    is_stalled: bool = temp_range <= get_stall_threshold()
-    logger.debug(f"Temperature range: {temp_range}°F. Stalled: {is_stalled}")
+    temp_range = window_range[1] - window_range[0]
+    is_stalled: bool = temp_range <= stall_threshold
+    logger.debug("Temperature range over {}: {}°F. Stalled: {}", store.labels[window], temp_range, is_stalled)
     return is_stalled
 
 
@@ -107,38 +166,47 @@ def detect_stall(rolling_window_deque: deque) -> bool:
 # #####################################
 
 
-def process_message(message: str, rolling_window: deque, window_size: int) -> None:
+def process_message(message: str, store: KeyedWindowStore, stall_threshold: float, probe_field: str = "probe_id") -> None:
     """
-    Process a JSON-transferred CSV message and check for stalls.
+    Process a JSON-transferred CSV message and check its probe for stalls.
 
     Args:
         message (str): JSON message received from Kafka.
-        rolling_window (deque): Rolling window of temperature readings.
-        window_size (int): Size of the rolling window.
+        store (KeyedWindowStore): Per-probe rolling windows of temperature readings.
+        stall_threshold (float): Max temperature range (°F) that counts as a stall.
+        probe_field (str): Message field holding the probe id.
     """
     try:
         # Log the raw message for debugging
-        logger.debug(f"Raw message: {message}")
+        logger.debug("Raw message: {}", message)
 
         # Parse the JSON string into a Python dictionary
         data: dict = json.loads(message)
         temperature = data.get("temperature")
         timestamp = data.get("timestamp")
-        logger.info(f"Processed JSON message: {data}")
+        probe_id = data.get(probe_field, "default")
+        logger.debug("Processed JSON message: {}", data)
 
         # Ensure the required fields are present
         if temperature is None or timestamp is None:
             logger.error(f"Invalid message format: {message}")
             return
 
-        # Append the temperature reading to the rolling window
-        rolling_window.append(temperature)
-
-        # Check for a stall
-        if detect_stall(rolling_window):
-            logger.info(
-                f"STALL DETECTED at {timestamp}: Temp stable at {temperature}°F over last {window_size} readings."
-            )
+        # Time-based windows are keyed by the reading's own timestamp
+        reading_time = parse_timestamp(timestamp) if store.timed else None
+
+        # Append the reading to this probe's windows and report stalls as they start and end
+        slot = store.update(probe_id, float(temperature), reading_time)
+        for window, label in enumerate(store.labels):
+            is_stalled = detect_stall(store, slot, window, stall_threshold)
+            if not store.set_flag(slot, window, is_stalled):
+                continue
+            if is_stalled:
+                logger.info(
+                    f"STALL DETECTED at {timestamp}: Probe {probe_id} temp stable at {temperature}°F over last {label}."
+                )
+            else:
+                logger.info(f"Stall ended at {timestamp}: Probe {probe_id} temp now {temperature}°F ({label} window).")
 
     except json.JSONDecodeError as e:
         logger.error(f"JSON decoding error for message '{message}': {e}")
@@ -164,11 +232,16 @@ def main() -> None:
     # fetch .env content
     topic = get_kafka_topic()
     group_id = get_kafka_consumer_group_id()
-    window_size = get_rolling_window_size()
+    stall_threshold = get_stall_threshold()
+    probe_field = get_probe_id_field()
+    store = create_window_store(
+        get_rolling_window_sizes(),
+        get_rolling_window_seconds(),
+        get_max_probes(),
+        get_probe_idle_seconds(),
+    )
     logger.info(f"Consumer: Topic '{topic}' and group '{group_id}'...")
-    logger.info(f"Rolling window size: {window_size}")
-
-    rolling_window = deque(maxlen=window_size)
+    logger.info(f"Rolling windows per probe: {store.labels}")
 
     # Create the Kafka consumer using the helpful utility function.
     consumer = create_kafka_consumer(topic, group_id)
@@ -178,15 +251,15 @@ def main() -> None:
     try:
         for message in consumer:
             message_str = message.value
-            logger.debug(f"Received message at offset {message.offset}: {message_str}")
-            process_message(message_str, rolling_window, window_size)
+            logger.debug("Received message at offset {}: {}", message.offset, message_str)
+            process_message(message_str, store, stall_threshold, probe_field)
     except KeyboardInterrupt:
         logger.warning("Consumer interrupted by user.")
     except Exception as e:
         logger.error(f"Error while consuming messages: {e}")
     finally:
         consumer.close()
-        logger.info(f"Kafka consumer for topic '{topic}' closed.")
+        logger.info(f"Kafka consumer for topic '{topic}' closed ({len(store)} probes tracked, {store.evicted} evicted).")
 
 
 #####################################
@@ -1,8 +1,8 @@
 import os
-import json
-import csv
-from kafka import KafkaConsumer
 from dotenv import load_dotenv
+from utils.utils_codec import get_json_codec
+from utils.utils_consumer import create_kafka_consumer
+from utils.utils_csv_writer import DEFAULT_FLUSH_ROWS, DEFAULT_FLUSH_SECONDS, RollingCsvWriter
 from utils.utils_logger import logger
 
 #####################################
@@ -11,61 +11,112 @@ from utils.utils_logger import logger
 
 load_dotenv()
 
-KAFKA_BROKER = os.getenv("KAFKA_BROKER", "localhost:9092")
 KAFKA_TOPIC = "rafting_csv_feedback"
+KAFKA_GROUP_ID = "rafting_csv_analysis_group"
 CSV_FILE = "data/rafting_feedback.csv"
 
+CSV_COLUMNS = [
+    "timestamp", "date", "guide", "comment", "trip_type", "is_negative",
+    "weather", "temperature", "wind_speed", "rainfall",
+    "river_flow", "water_level", "water_temperature"
+]
+
+
+def get_flush_rows() -> int:
+    """Fetch how many rows to buffer before flushing the CSV file."""
+    flush_rows = int(os.getenv("RAFTING_CSV_FLUSH_ROWS", DEFAULT_FLUSH_ROWS))
+    logger.info(f"CSV flush rows: {flush_rows}")
+    return flush_rows
+
+
+def get_flush_seconds() -> float:
+    """Fetch the longest time (seconds) rows may stay buffered before a flush."""
+    flush_seconds = float(os.getenv("RAFTING_CSV_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS))
+    logger.info(f"CSV flush interval: {flush_seconds} seconds")
+    return flush_seconds
+
+
+def get_rotate_bytes() -> int:
+    """Fetch the CSV file size (bytes) that triggers rotation (0 = never)."""
+    rotate_bytes = int(os.getenv("RAFTING_CSV_ROTATE_BYTES", 0))
+    logger.info(f"CSV rotation size: {rotate_bytes or 'disabled'}")
+    return rotate_bytes
+
+
+def get_rotate_daily() -> bool:
+    """Fetch whether to start a new CSV file each day."""
+    rotate_daily = os.getenv("RAFTING_CSV_ROTATE_DAILY", "false").strip().lower() in ("1", "true", "yes")
+    logger.info(f"CSV daily rotation: {rotate_daily}")
+    return rotate_daily
+
 #####################################
 # Create Kafka Consumer
 #####################################
 
-consumer = KafkaConsumer(
-    KAFKA_TOPIC,
-    bootstrap_servers=KAFKA_BROKER,
-    auto_offset_reset="earliest",
-    group_id="rafting_csv_analysis_group",
-    value_deserializer=lambda x: json.loads(x.decode("utf-8"))
-)
+def create_consumer():
+    """
+    Create the Kafka consumer for processed feedback.
+
+    Auto-commit is disabled: offsets are committed only after the rows
+    they cover have been flushed to disk.
+    """
+    return create_kafka_consumer(
+        KAFKA_TOPIC,
+        KAFKA_GROUP_ID,
+        codec=get_json_codec(),
+        enable_auto_commit=False,
+    )
 
 #####################################
 # Function to Save Messages to CSV
 #####################################
 
-def save_to_csv(message):
+def save_to_csv(message, writer: RollingCsvWriter) -> bool:
     """
-    Append processed feedback messages to a CSV file.
+    Buffer one processed feedback message as a CSV row.
+
+    Returns:
+        bool: True if the writer is due for a flush.
     """
-    file_exists = os.path.isfile(CSV_FILE)
-    
-    with open(CSV_FILE, mode="a", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-
-        # Write header if file does not exist
-        if not file_exists:
-            writer.writerow([
-                "timestamp", "date", "guide", "comment", "trip_type", "is_negative",
-                "weather", "temperature", "wind_speed", "rainfall",
-                "river_flow", "water_level", "water_temperature"
-            ])
-
-        # Write the new row
-        writer.writerow([
-            message["timestamp"],
-            message["date"],
-            message["guide"],
-            message["comment"],
-            message["trip_type"],
-            message["is_negative"],
-            message["weather"],
-            message["temperature"],
-            message["wind_speed"],
-            message["rainfall"],
-            message["river_flow"],
-            message["water_level"],
-            message["water_temperature"]
-        ])
-    
-    logger.info(f"✅ Saved message to CSV: {message}")
+    logger.debug(f"Buffered message for CSV: {message}")
+    return writer.write([message.get(column, "") for column in CSV_COLUMNS])
+
+
+def flush_and_commit(writer: RollingCsvWriter, consumer) -> None:
+    """Flush buffered rows durably, then commit the offsets they cover."""
+    flushed = writer.flush()
+    if flushed:
+        consumer.commit()
+        logger.info(f"✅ Saved {flushed} messages to CSV (total {writer.rows_flushed}).")
+
+#####################################
+# Consume Loop
+#####################################
+
+def consume_to_csv(consumer, writer: RollingCsvWriter, poll_timeout_ms: int, max_records: int = None,
+                   should_stop=None) -> None:
+    """
+    Buffer polled messages as CSV rows, flushing and committing when due.
+
+    Args:
+        consumer: Kafka consumer for processed feedback.
+        writer (RollingCsvWriter): Rolling CSV writer.
+        poll_timeout_ms (int): How long a poll waits for records.
+        max_records (int, optional): Records per poll (default: the consumer's setting).
+        should_stop (callable, optional): Called after each poll with the number
+            of records it returned (0 when idle); return True to stop.
+    """
+    while True:
+        records = consumer.poll(timeout_ms=poll_timeout_ms, max_records=max_records)
+        received = 0
+        for batch in records.values():
+            for message in batch:
+                save_to_csv(message.value, writer)
+            received += len(batch)
+        if writer.flush_due():
+            flush_and_commit(writer, consumer)
+        if should_stop is not None and should_stop(received):
+            return
 
 #####################################
 # Main Function
@@ -73,15 +124,33 @@ def save_to_csv(message):
 
 def main():
     logger.info("🚀 START CSV consumer and writer.")
-    
+
+    flush_seconds = get_flush_seconds()
+    writer = RollingCsvWriter(
+        CSV_FILE,
+        CSV_COLUMNS,
+        flush_rows=get_flush_rows(),
+        flush_seconds=flush_seconds,
+        max_bytes=get_rotate_bytes(),
+        rotate_daily=get_rotate_daily(),
+    )
+    consumer = create_consumer()
+
+    # Poll no longer than the flush interval so idle periods still flush
+    poll_timeout_ms = max(1, int(flush_seconds * 1000))
+
     try:
-        for message in consumer:
-            save_to_csv(message.value)
+        consume_to_csv(consumer, writer, poll_timeout_ms)
     except KeyboardInterrupt:
         logger.warning("⚠️ Consumer interrupted by user.")
     except Exception as e:
         logger.error(f"❌ Error while consuming messages: {e}")
     finally:
+        try:
+            flush_and_commit(writer, consumer)
+            writer.close()
+        except Exception as e:
+            logger.error(f"❌ Error flushing CSV on shutdown: {e}")
         consumer.close()
         logger.info("✅ Kafka consumer closed.")
 
@@ -10,6 +10,13 @@ This script:
 - Logs environmental data (weather & river conditions).
 - Tracks weekly guide performance trends.
 - Publishes structured feedback messages to a CSV-friendly Kafka topic.
+
+Set RAFTING_CSV_BATCH_MODE=true to poll micro-batches instead: each batch is
+enriched in one pass, sent, flushed, and its offsets committed once.
+
+Guide counts are kept per partition and checkpointed with their offsets
+(CHECKPOINT_FILE) after the producer has flushed, so a restart resumes from
+the last checkpoint instead of replaying the topic.
 """
 
 #####################################
@@ -17,12 +24,26 @@ This script:
 #####################################
 
 import os
-import json
-from collections import defaultdict
 from datetime import datetime
+from functools import lru_cache
 from dotenv import load_dotenv
-from kafka import KafkaConsumer, KafkaProducer
+from utils.utils_checkpoint import (
+    CheckpointStore,
+    FeedbackCheckpointer,
+    get_checkpoint_file,
+    get_checkpoint_seconds,
+)
+from utils.utils_environment import (
+    EnvironmentContext,
+    get_environment_refresh_seconds,
+    get_environment_store_file,
+)
+from utils.utils_codec import get_json_codec
+from utils.utils_consumer import create_kafka_consumer
+from utils.utils_feedback_state import FeedbackState
 from utils.utils_logger import logger
+from utils.utils_producer import create_kafka_producer
+from utils.utils_wire import get_wire_format
 
 #####################################
 # Load Environment Variables
@@ -36,67 +57,113 @@ load_dotenv()
 
 KAFKA_SOURCE_TOPIC = "rafting_feedback"
 KAFKA_TARGET_TOPIC = "rafting_csv_feedback"
-KAFKA_BROKER = os.getenv("KAFKA_BROKER", "localhost:9092")
-
-# Create Kafka Consumer (Reads JSON feedback)
-consumer = KafkaConsumer(
-    KAFKA_SOURCE_TOPIC,
-    bootstrap_servers=KAFKA_BROKER,
-    auto_offset_reset="earliest",
-    group_id="rafting_csv_transform_group",
-    value_deserializer=lambda x: json.loads(x.decode("utf-8"))
-)
+KAFKA_GROUP_ID = "rafting_csv_transform_group"
 
-# Create Kafka Producer (Publishes processed CSV-style messages)
-producer = KafkaProducer(
-    bootstrap_servers=KAFKA_BROKER,
-    value_serializer=lambda v: json.dumps(v).encode("utf-8")
-)
+
+def get_batch_mode() -> bool:
+    """Fetch whether to process micro-batches instead of one message at a time."""
+    batch_mode = os.getenv("RAFTING_CSV_BATCH_MODE", "false").strip().lower() in ("1", "true", "yes")
+    logger.info(f"Micro-batch mode: {batch_mode}")
+    return batch_mode
+
+
+def get_batch_size() -> int:
+    """Fetch the maximum number of records per micro-batch poll."""
+    batch_size = int(os.getenv("RAFTING_CSV_BATCH_SIZE", 500))
+    logger.info(f"Micro-batch size: {batch_size}")
+    return batch_size
+
+
+def get_poll_timeout_ms() -> int:
+    """Fetch how long (ms) a micro-batch poll waits for records."""
+    timeout_ms = int(os.getenv("RAFTING_CSV_POLL_TIMEOUT_MS", 1000))
+    logger.info(f"Micro-batch poll timeout: {timeout_ms} ms")
+    return timeout_ms
+
+
+def create_consumer(enable_auto_commit: bool = True, subscribe: bool = True):
+    """
+    Create the Kafka consumer that reads JSON feedback.
+
+    Args:
+        enable_auto_commit (bool): Commit offsets automatically in the background.
+        subscribe (bool): Subscribe to the source topic now (False when a
+                          checkpointer subscribes with its rebalance listener).
+    """
+    return create_kafka_consumer(
+        KAFKA_SOURCE_TOPIC if subscribe else None,
+        KAFKA_GROUP_ID,
+        codec=get_json_codec(),
+        enable_auto_commit=enable_auto_commit,
+        skip_invalid=True,
+    )
+
+
+def create_producer():
+    """Create the Kafka producer that publishes processed CSV-style messages."""
+    return create_kafka_producer(codec=get_json_codec(), wire_format=get_wire_format())
 
 #####################################
 # Load Weather & River Data
 #####################################
 
-def load_json_data(file_path: str) -> dict:
-    """Load JSON data from a given file path."""
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return {entry["date"]: entry for entry in json.load(f)}
-    except FileNotFoundError:
-        logger.error(f"File not found: {file_path}")
-        return {}
-    except json.JSONDecodeError:
-        logger.error(f"Invalid JSON format in file: {file_path}")
-        return {}
-
-# Load environmental data
+# Uses the shared memory-mapped store when it exists, otherwise the JSON files.
 WEATHER_DATA_FILE = "data/weather_conditions.json"
 RIVER_FLOW_DATA_FILE = "data/river_flow.json"
 
-weather_lookup = load_json_data(WEATHER_DATA_FILE)
-river_lookup = load_json_data(RIVER_FLOW_DATA_FILE)
+environment = EnvironmentContext(
+    WEATHER_DATA_FILE,
+    RIVER_FLOW_DATA_FILE,
+    get_environment_refresh_seconds(),
+    store_file=get_environment_store_file(),
+)
 
 #####################################
 # Tracking Data
 #####################################
 
-# Track feedback per guide
-guide_feedback = defaultdict(lambda: {"positive": 0, "negative": 0})
+# Track feedback per guide and weekly guide performance, per partition
+feedback_states = {}
+
+
+def get_feedback_state(partition: int) -> FeedbackState:
+    """Return the feedback counts for a partition, creating them on first use."""
+    state = feedback_states.get(partition)
+    if state is None:
+        state = feedback_states[partition] = FeedbackState()
+    return state
+
 
-# Track weekly guide performance
-weekly_feedback = defaultdict(lambda: {"positive": 0, "negative": 0})
+def merged_feedback() -> FeedbackState:
+    """Return the feedback counts merged across all partitions."""
+    return FeedbackState.merged(feedback_states.values())
 
 #####################################
-# Function to Process a Message and Publish
+# Function to Enrich a Message
 #####################################
 
-def process_message(message: dict) -> None:
+@lru_cache(maxsize=4096)
+def get_week_number(trip_date: str) -> int:
+    """Return the ISO week number for a YYYY-MM-DD date (cached per date)."""
+    return datetime.strptime(trip_date, "%Y-%m-%d").isocalendar()[1]
+
+
+def enrich_message(message: dict, log_details: bool = True, partition: int = 0):
     """
-    Process a JSON message from Kafka and republish it in CSV format.
+    Enrich a JSON message with weather & river data and update the aggregates.
 
     Args:
         message (dict): The JSON message.
+        log_details (bool): Log the per-message feedback lines at INFO
+                            (micro-batches log a single summary instead).
+        partition (int): Partition the message was read from.
+
+    Returns:
+        dict: The CSV-formatted record, or None if the message was rejected.
     """
+    if message is None:
+        # Malformed on the wire; the deserializer already logged it
+        return None
     try:
         guide = message.get("guide", "unknown")
         comment = message.get("comment", "No comment provided")
@@ -105,55 +172,53 @@ def process_message(message: dict) -> None:
 
         # Get week number for trend analysis
         try:
-            week_number = datetime.strptime(trip_date, "%Y-%m-%d").isocalendar()[1]
-        except ValueError:
+            week_number = get_week_number(trip_date)
+        except (TypeError, ValueError):
             logger.error(f"Invalid date format in message: {trip_date}")
-            return
+            return None
 
         # Get environmental conditions for this date
-        weather = weather_lookup.get(trip_date, {
+        environment.maybe_refresh()
+        weather = environment.find_weather(trip_date) or {
             "weather_condition": "Data Not Available",
             "temperature": "N/A",
             "wind_speed": "N/A",
             "precipitation": "N/A"
-        })
+        }
 
-        river = river_lookup.get(trip_date, {
+        river = environment.find_river(trip_date) or {
             "river_flow": "N/A",
             "water_level": "N/A",
             "water_temperature": "N/A"
-        })
-
-        weather_summary = (
-            f"🌤 {weather.get('weather_condition')} | "
-            f"🌡 {weather.get('temperature')}°F | "
-            f"💨 Wind {weather.get('wind_speed')} mph | "
-            f"🌧 {weather.get('precipitation')} inches rain"
-        )
+        }
 
-        river_summary = (
-            f"🌊 Flow {river.get('river_flow')} cfs | "
-            f"📏 Water Level {river.get('water_level')} ft | "
-            f"🌡 Water Temp {river.get('water_temperature')}°F"
-        )
+        get_feedback_state(partition).record(guide, week_number, is_negative)
 
         # Flag negative comments with a red 🛑
         if is_negative:
             comment = f"🛑 {comment}"
-            guide_feedback[guide]["negative"] += 1
-            weekly_feedback[(guide, week_number)]["negative"] += 1
-
-        else:
-            guide_feedback[guide]["positive"] += 1
-            weekly_feedback[(guide, week_number)]["positive"] += 1
 
         # Log processed feedback
-        logger.info(f"📝 Feedback ({trip_date}) | Guide: {guide} | Comment: {comment}")
-        logger.info(f"⛅ {weather_summary}")
-        logger.info(f"🌊 {river_summary}")
-
-        # Publish structured message to `rafting_csv_feedback`
-        csv_data = {
+        if log_details:
+            weather_summary = (
+                f"🌤 {weather.get('weather_condition')} | "
+                f"🌡 {weather.get('temperature')}°F | "
+                f"💨 Wind {weather.get('wind_speed')} mph | "
+                f"🌧 {weather.get('precipitation')} inches rain"
+            )
+
+            river_summary = (
+                f"🌊 Flow {river.get('river_flow')} cfs | "
+                f"📏 Water Level {river.get('water_level')} ft | "
+                f"🌡 Water Temp {river.get('water_temperature')}°F"
+            )
+
+            logger.info(f"📝 Feedback ({trip_date}) | Guide: {guide} | Comment: {comment}")
+            logger.info(f"⛅ {weather_summary}")
+            logger.info(f"🌊 {river_summary}")
+
+        # Structured message for `rafting_csv_feedback`
+        return {
             "timestamp": message.get("timestamp"),
             "date": trip_date,
             "guide": guide,
@@ -169,15 +234,113 @@ def process_message(message: dict) -> None:
             "water_temperature": river.get("water_temperature", "N/A")
         }
 
+    except Exception as e:
+        logger.error(f"Error processing message: {e}")
+        return None
+
+#####################################
+# Functions to Process and Publish
+#####################################
+
+def process_message(message: dict, producer, partition: int = 0) -> None:
+    """
+    Process a JSON message from Kafka and republish it in CSV format.
+
+    Args:
+        message (dict): The JSON message.
+        producer: Kafka producer for `rafting_csv_feedback`.
+        partition (int): Partition the message was read from.
+    """
+    csv_data = enrich_message(message, partition=partition)
+    if csv_data is None:
+        return
+
+    try:
         producer.send(KAFKA_TARGET_TOPIC, value=csv_data)
         logger.info(f"✅ Published CSV-formatted data to Kafka: {csv_data}")
-
-    except json.JSONDecodeError:
-        logger.error(f"Invalid JSON message: {message}")
     except Exception as e:
-        logger.error(f"Error processing message: {e}")
+        logger.error(f"Error publishing message: {e}")
+
+
+def process_batch(messages: list, producer, partition: int = 0) -> int:
+    """
+    Enrich and publish a micro-batch of JSON messages.
+
+    Args:
+        messages (list): JSON messages (dicts) in partition order.
+        producer: Kafka producer for `rafting_csv_feedback`.
+        partition (int): Partition the messages were read from.
+
+    Returns:
+        int: Number of records published.
+    """
+    published = 0
+    for message in messages:
+        csv_data = enrich_message(message, log_details=False, partition=partition)
+        if csv_data is None:
+            continue
+        try:
+            producer.send(KAFKA_TARGET_TOPIC, value=csv_data)
+            published += 1
+        except Exception as e:
+            logger.error(f"Error publishing message: {e}")
+    return published
+
+
+def consume_batches(consumer, producer, batch_size: int, timeout_ms: int, checkpointer=None,
+                    should_stop=None) -> int:
+    """
+    Poll, enrich, publish, and commit micro-batches until interrupted.
+
+    Offsets are committed (or checkpointed with the counts) only after the
+    batch's sends have been flushed, so a crash replays at most the batches
+    since the last commit.
+
+    Args:
+        should_stop (callable, optional): Called after each poll with the number
+            of records it returned (0 when idle); return True to stop.
+
+    Returns:
+        int: Number of records published.
+    """
+    total = 0
+    while True:
+        records = consumer.poll(timeout_ms=timeout_ms, max_records=batch_size)
+        if not records:
+            if should_stop is not None and should_stop(0):
+                return total
+            continue
+
+        published = received = 0
+        for tp, batch in records.items():
+            published += process_batch([record.value for record in batch], producer, tp.partition)
+            received += len(batch)
+            if checkpointer is not None:
+                checkpointer.advance(tp.partition, batch[-1].offset)
+        producer.flush()
+        if checkpointer is None:
+            consumer.commit()
+        elif checkpointer.due():
+            checkpointer.save()
+
+        total += published
+        logger.info(
+            f"✅ Published batch of {published}/{received} CSV-formatted records "
+            f"to {KAFKA_TARGET_TOPIC} (total {total})."
+        )
+        if should_stop is not None and should_stop(received):
+            return total
 
 
+def consume_messages(consumer, producer, checkpointer=None) -> None:
+    """Enrich and publish messages one at a time until interrupted, checkpointing periodically."""
+    for message in consumer:
+        process_message(message.value, producer, message.partition)
+        if checkpointer is not None:
+            checkpointer.advance(message.partition, message.offset)
+            if checkpointer.due():
+                checkpointer.save()
+
 #####################################
 # Define Main Function for Kafka Processing
 #####################################
@@ -188,21 +351,52 @@ def main() -> None:
 
     - Reads JSON messages from `rafting_feedback`.
     - Converts them into a CSV-friendly format.
-    - Publishes them to `rafting_csv_feedback`.
+    - Publishes them to `rafting_csv_feedback`, one at a time or in micro-batches.
     """
     logger.info("🚀 START rafting JSON-to-CSV consumer.")
 
+    batch_mode = get_batch_mode()
+    checkpoint_file = get_checkpoint_file()
+    producer = create_producer()
+
+    # With checkpoints, offsets are committed with each checkpoint
+    checkpointer = None
+    if checkpoint_file:
+        checkpointer = FeedbackCheckpointer(
+            CheckpointStore(checkpoint_file), KAFKA_GROUP_ID, KAFKA_SOURCE_TOPIC,
+            feedback_states, get_checkpoint_seconds(),
+            # Publish everything derived from a checkpoint's messages before saving it,
+            # including the save for partitions revoked on a rebalance
+            before_save=producer.flush,
+        )
+        consumer = create_consumer(enable_auto_commit=False, subscribe=False)
+        checkpointer.attach(consumer)
+    else:
+        consumer = create_consumer(enable_auto_commit=not batch_mode)
+
     # Process messages
     try:
-        for message in consumer:
-            process_message(message.value)
+        if batch_mode:
+            consume_batches(consumer, producer, get_batch_size(), get_poll_timeout_ms(), checkpointer)
+        else:
+            consume_messages(consumer, producer, checkpointer)
     except KeyboardInterrupt:
         logger.warning("⚠️ Consumer interrupted by user.")
     except Exception as e:
         logger.error(f"❌ Error while consuming messages: {e}")
     finally:
+        if checkpointer is not None:
+            try:
+                checkpointer.save()
+                logger.info("💾 Checkpoint saved.")
+            except Exception as e:
+                logger.error(f"❌ Error saving checkpoint: {e}")
         consumer.close()
         logger.info("✅ Kafka consumer closed.")
+        if checkpointer is not None:
+            checkpointer.store.close()
+        producer.close()
+        logger.info("✅ Kafka producer closed.")
 
 
 #####################################
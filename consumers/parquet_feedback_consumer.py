@@ -0,0 +1,143 @@
+"""
+parquet_feedback_consumer.py
+
+Consumes processed feedback (`processed_csv_feedback`) and writes it to a
+date-partitioned Parquet dataset (data/rafting_feedback_parquet) with
+typed columns, so analysis can load just the columns and days it needs
+instead of re-parsing the whole CSV.
+
+Offsets are committed only after the rows they cover have been written.
+
+Usage:
+    python -m consumers.parquet_feedback_consumer
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import os
+
+from dotenv import load_dotenv
+
+from utils.utils_codec import get_json_codec
+from utils.utils_consumer import create_kafka_consumer
+from utils.utils_logger import logger
+from utils.utils_parquet_writer import (
+    DEFAULT_COMPRESSION,
+    DEFAULT_FLUSH_ROWS,
+    DEFAULT_FLUSH_SECONDS,
+    DEFAULT_ROW_GROUP_ROWS,
+    PartitionedParquetWriter,
+)
+
+#####################################
+# Load Environment Variables
+#####################################
+
+load_dotenv()
+
+KAFKA_TOPIC = "processed_csv_feedback"
+KAFKA_GROUP_ID = "rafting_parquet_sink_group"
+
+#####################################
+# Getter Functions for .env Variables
+#####################################
+
+def get_parquet_dir() -> str:
+    """Fetch the Parquet dataset folder."""
+    parquet_dir = os.getenv("PARQUET_OUTPUT_DIR", "data/rafting_feedback_parquet")
+    logger.info(f"Parquet dataset folder: {parquet_dir}")
+    return parquet_dir
+
+
+def get_flush_rows() -> int:
+    """Fetch how many rows to buffer before writing Parquet files."""
+    flush_rows = int(os.getenv("PARQUET_FLUSH_ROWS", DEFAULT_FLUSH_ROWS))
+    logger.info(f"Parquet flush rows: {flush_rows}")
+    return flush_rows
+
+
+def get_flush_seconds() -> float:
+    """Fetch the longest time (seconds) rows may stay buffered before a flush."""
+    flush_seconds = float(os.getenv("PARQUET_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS))
+    logger.info(f"Parquet flush interval: {flush_seconds} seconds")
+    return flush_seconds
+
+
+def get_row_group_rows() -> int:
+    """Fetch the maximum rows per Parquet row group."""
+    row_group_rows = int(os.getenv("PARQUET_ROW_GROUP_ROWS", DEFAULT_ROW_GROUP_ROWS))
+    logger.info(f"Parquet row group rows: {row_group_rows}")
+    return row_group_rows
+
+
+def get_compression() -> str:
+    """Fetch the Parquet compression codec."""
+    compression = os.getenv("PARQUET_COMPRESSION", DEFAULT_COMPRESSION).strip().lower()
+    logger.info(f"Parquet compression: {compression}")
+    return compression
+
+#####################################
+# Flush and Commit
+#####################################
+
+def flush_and_commit(writer: PartitionedParquetWriter, consumer) -> None:
+    """Write buffered rows durably, then commit the offsets they cover."""
+    flushed = writer.flush()
+    if flushed:
+        consumer.commit()
+        logger.info(f"✅ Saved {flushed} messages to Parquet (total {writer.rows_flushed}).")
+
+#####################################
+# Main Function
+#####################################
+
+def main() -> None:
+    logger.info("🚀 START Parquet feedback consumer.")
+
+    flush_seconds = get_flush_seconds()
+    writer = PartitionedParquetWriter(
+        get_parquet_dir(),
+        flush_rows=get_flush_rows(),
+        flush_seconds=flush_seconds,
+        row_group_rows=get_row_group_rows(),
+        compression=get_compression(),
+    )
+    consumer = create_kafka_consumer(
+        KAFKA_TOPIC,
+        KAFKA_GROUP_ID,
+        codec=get_json_codec(),
+        enable_auto_commit=False,
+    )
+
+    # Poll no longer than the flush interval so idle periods still flush
+    poll_timeout_ms = max(1, int(flush_seconds * 1000))
+
+    try:
+        while True:
+            records = consumer.poll(timeout_ms=poll_timeout_ms)
+            for batch in records.values():
+                for message in batch:
+                    writer.write(message.value)
+            if writer.flush_due():
+                flush_and_commit(writer, consumer)
+    except KeyboardInterrupt:
+        logger.warning("⚠️ Consumer interrupted by user.")
+    except Exception as e:
+        logger.error(f"❌ Error while consuming messages: {e}")
+    finally:
+        try:
+            flush_and_commit(writer, consumer)
+            writer.close()
+        except Exception as e:
+            logger.error(f"❌ Error flushing Parquet files on shutdown: {e}")
+        consumer.close()
+        logger.info("✅ Kafka consumer closed.")
+
+#####################################
+# Conditional Execution
+#####################################
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,13 @@ This script:
 - Flags negative comments with a red 🛑
 - Logs environmental data (weather & river conditions)
 - Tracks weekly guide performance trends
+
+Feedback counts are kept per Kafka partition and merged on demand, so
+several copies of this consumer can share the topic's partitions (see
+rafting_consumer_pool.py).
+
+Counts are checkpointed with their offsets (CHECKPOINT_FILE), so a restart
+resumes from the last checkpoint instead of replaying the topic.
 """
 
 #####################################
@@ -16,13 +23,34 @@ This script:
 
 import os
 import json
-from collections import defaultdict
+import time
 from datetime import datetime
 from dotenv import load_dotenv
 
 # Import Kafka utilities & logger
+from utils.utils_checkpoint import (
+    DEFAULT_CHECKPOINT_SECONDS,
+    CheckpointStore,
+    FeedbackCheckpointer,
+    get_checkpoint_file,
+    get_checkpoint_seconds,
+)
+from utils.utils_codec import get_json_codec
 from utils.utils_consumer import create_kafka_consumer
-from utils.utils_logger import logger
+from utils.utils_environment import (
+    EnvironmentContext,
+    get_environment_refresh_seconds,
+    get_environment_store_file,
+)
+from utils.utils_feedback_state import FeedbackState
+from utils.utils_logger import log_event, logger
+from utils.utils_metrics import SummaryReporter
+from utils.utils_negative_feedback import (
+    DEFAULT_COMPACT_SECONDS,
+    DEFAULT_FLUSH_COUNT,
+    DEFAULT_FLUSH_SECONDS,
+    NegativeFeedbackWriter,
+)
 
 #####################################
 # Load Environment Variables
@@ -48,57 +76,126 @@ def get_kafka_consumer_group_id() -> str:
     return group_id
 
 
+def get_summary_every_messages() -> int:
+    """Fetch how many messages to process between feedback summaries (0 disables)."""
+    every_messages = int(os.getenv("RAFTING_SUMMARY_EVERY_MESSAGES", 100))
+    logger.info(f"Feedback summary every {every_messages} messages")
+    return every_messages
+
+
+def get_summary_seconds() -> float:
+    """Fetch the longest time (seconds) between feedback summaries (0 disables)."""
+    summary_seconds = float(os.getenv("RAFTING_SUMMARY_SECONDS", 30))
+    logger.info(f"Feedback summary at least every {summary_seconds} seconds")
+    return summary_seconds
+
+
+def get_negative_feedback_mode() -> str:
+    """Fetch negative feedback persistence mode: 'append' (JSONL, batched) or 'rewrite'."""
+    mode = os.getenv("NEGATIVE_FEEDBACK_MODE", "append").strip().lower()
+    logger.info(f"Negative feedback persistence mode: {mode}")
+    return mode
+
+
+def get_negative_feedback_flush_count() -> int:
+    """Fetch how many negative records to batch before flushing to disk."""
+    flush_count = int(os.getenv("NEGATIVE_FEEDBACK_FLUSH_COUNT", DEFAULT_FLUSH_COUNT))
+    logger.info(f"Negative feedback flush count: {flush_count}")
+    return flush_count
+
+
+def get_negative_feedback_flush_seconds() -> float:
+    """Fetch the longest time (seconds) negative records may wait before a flush."""
+    flush_seconds = float(os.getenv("NEGATIVE_FEEDBACK_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS))
+    logger.info(f"Negative feedback flush interval: {flush_seconds} seconds")
+    return flush_seconds
+
+
+def get_negative_feedback_compact_seconds() -> float:
+    """Fetch how often (seconds) to compact the JSONL log into negative_feedback.json."""
+    compact_seconds = float(os.getenv("NEGATIVE_FEEDBACK_COMPACT_SECONDS", DEFAULT_COMPACT_SECONDS))
+    logger.info(f"Negative feedback compaction interval: {compact_seconds} seconds")
+    return compact_seconds
+
+
 #####################################
 # Load Weather & River Data
 #####################################
 
-def load_json_data(file_path: str) -> dict:
-    """Load JSON data from a given file path."""
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return {entry["date"]: entry for entry in json.load(f)}
-    except FileNotFoundError:
-        logger.error(f"File not found: {file_path}")
-        return {}
-    except json.JSONDecodeError:
-        logger.error(f"Invalid JSON format in file: {file_path}")
-        return {}
-
-# Load environmental data
+# Load environmental data (lookups and aggregate fallbacks are built once here).
+# Uses the shared memory-mapped store when it exists, otherwise the JSON files.
 WEATHER_DATA_FILE = "data/weather_conditions.json"
 RIVER_FLOW_DATA_FILE = "data/river_flow.json"
 
-weather_lookup = load_json_data(WEATHER_DATA_FILE)
-river_lookup = load_json_data(RIVER_FLOW_DATA_FILE)
+environment = EnvironmentContext(
+    WEATHER_DATA_FILE,
+    RIVER_FLOW_DATA_FILE,
+    get_environment_refresh_seconds(),
+    store_file=get_environment_store_file(),
+)
 
 #####################################
 # Tracking Data
 #####################################
 
-# Track feedback per guide
-guide_feedback = defaultdict(lambda: {"positive": 0, "negative": 0})
+# Track feedback per guide and weekly guide performance, per partition
+feedback_states = {}
 
-# Store negative comments for analysis
+# Store negative comments for analysis ('rewrite' mode only), with the uuids
+# already logged so messages replayed after a checkpoint are not logged twice
 negative_feedback_log = []
+negative_feedback_ids = set()
+
+# Background writer for negative comments ('append' mode, set up in run_consumer)
+negative_feedback_writer = None
+
+
+def get_feedback_state(partition: int) -> FeedbackState:
+    """Return the feedback counts for a partition, creating them on first use."""
+    state = feedback_states.get(partition)
+    if state is None:
+        state = feedback_states[partition] = FeedbackState()
+    return state
 
-# Track weekly guide performance
-weekly_feedback = defaultdict(lambda: {"positive": 0, "negative": 0})
+
+def merged_feedback() -> FeedbackState:
+    """Return the feedback counts merged across all partitions seen by this process."""
+    return FeedbackState.merged(feedback_states.values())
+
+
+def log_feedback_summary(metrics: dict, worker_name: str = "consumer") -> None:
+    """
+    Log one structured snapshot of throughput and guide performance.
+
+    Args:
+        metrics (dict): Throughput snapshot from SummaryReporter.
+        worker_name (str): Name of this consumer process.
+    """
+    merged = merged_feedback()
+    snapshot = {"worker": worker_name, **metrics, **merged.summary(), "partitions": len(feedback_states)}
+    snapshot["guide_feedback"] = merged.guide_feedback
+    logger.info("📊 Feedback summary: {}", json.dumps(snapshot, ensure_ascii=False))
 
 #####################################
 # Function to process a single message
 #####################################
 
-def process_message(message: str) -> None:
+# Log line templates (utils_convert_log_to_csv.py parses these lines)
+WEATHER_SUMMARY = "🌤 {} | 🌡 {}°F | 💨 Wind {} mph | 🌧 {} inches rain"
+RIVER_SUMMARY = "🌊 Flow {} cfs | 📏 Water Level {} ft | 🌡 Water Temp {}°F"
+
+def process_message(message_dict: dict, partition: int = 0) -> None:
     """
     Process a single JSON message from Kafka.
 
     Args:
-        message (str): The JSON message as a string.
+        message_dict (dict): The message, already parsed by the consumer's codec
+                             (None if it was not valid JSON).
+        partition (int): Partition the message was read from.
     """
+    if message_dict is None:
+        return
     try:
-        # Parse the JSON string into a Python dictionary
-        message_dict: dict = json.loads(message)
-
         # Extract data
         guide = message_dict.get("guide", "unknown")
         comment = message_dict.get("comment", "No comment provided")
@@ -107,65 +204,74 @@ def process_message(message: str) -> None:
 
         # Get week number for trend analysis
         try:
-            week_number = datetime.strptime(trip_date, "%Y-%m-%d").isocalendar()[1]
+            trip_day = datetime.strptime(trip_date, "%Y-%m-%d")
         except ValueError:
             logger.error(f"Invalid date format in message: {trip_date}")
             return
-
-        # Get environmental conditions for this date
-        weather = weather_lookup.get(trip_date, {
-            "weather_condition": "Data Not Available",
-            "temperature": round(sum(d["temperature"] for d in weather_lookup.values()) / len(weather_lookup), 1),
-            "wind_speed": round(sum(d["wind_speed"] for d in weather_lookup.values()) / len(weather_lookup), 1),
-            "precipitation": 0.0
-        })
-
-        river = river_lookup.get(trip_date, {
-            "river_flow": round(sum(d["river_flow"] for d in river_lookup.values()) / len(river_lookup), 1),
-            "water_level": round(sum(d["water_level"] for d in river_lookup.values()) / len(river_lookup), 1),
-            "water_temperature": round(sum(d["water_temperature"] for d in river_lookup.values()) / len(river_lookup), 1)
-        })
-
-        weather_summary = (
-            f"🌤 {weather.get('weather_condition')} | "
-            f"🌡 {weather.get('temperature')}°F | "
-            f"💨 Wind {weather.get('wind_speed')} mph | "
-            f"🌧 {weather.get('precipitation')} inches rain"
+        week_number = trip_day.isocalendar()[1]
+
+        # Get environmental conditions for this date (falls back to week/month/overall means)
+        environment.maybe_refresh()
+        weather = environment.get_weather(trip_date, trip_day)
+        river = environment.get_river(trip_date, trip_day)
+
+        weather_values = (
+            weather.get("weather_condition"),
+            weather.get("temperature"),
+            weather.get("wind_speed"),
+            weather.get("precipitation"),
+        )
+        river_values = (
+            river.get("river_flow"),
+            river.get("water_level"),
+            river.get("water_temperature"),
         )
 
-        river_summary = (
-            f"🌊 Flow {river.get('river_flow')} cfs | "
-            f"📏 Water Level {river.get('water_level')} ft | "
-            f"🌡 Water Temp {river.get('water_temperature')}°F"
+        get_feedback_state(partition).record(guide, week_number, is_negative)
+
+        # Structured record of the enriched message (read by utils_convert_log_to_csv)
+        log_event(
+            "processed",
+            id=message_dict.get("uuid"),
+            partition=partition,
+            timestamp=message_dict.get("timestamp"),
+            date=trip_date,
+            guide=guide,
+            comment=comment,
+            trip_type=message_dict.get("trip_type"),
+            is_negative=is_negative,
+            weather=weather_values[0],
+            temperature=weather_values[1],
+            wind_speed=weather_values[2],
+            rainfall=weather_values[3],
+            river_flow=river_values[0],
+            water_level=river_values[1],
+            water_temperature=river_values[2],
         )
 
         # Flag negative comments with a red 🛑
         if is_negative:
             comment = f"🛑 {comment}"
-            guide_feedback[guide]["negative"] += 1
-            weekly_feedback[(guide, week_number)]["negative"] += 1
-            message_dict["weather_summary"] = weather_summary
-            message_dict["river_summary"] = river_summary
-            negative_feedback_log.append(message_dict)
-
-        else:
-            guide_feedback[guide]["positive"] += 1
-            weekly_feedback[(guide, week_number)]["positive"] += 1
-
-        # Log ALL feedback
-        logger.info(f"📝 Feedback ({trip_date}) | Guide: {guide} | Comment: {comment}")
-        logger.info(f"⛅ {weather_summary}")
-        logger.info(f"🌊 {river_summary}")
-
-        # Log updated guide performance
-        logger.info(f"📊 Updated feedback counts: {dict(guide_feedback)}")
+            message_dict["weather_summary"] = WEATHER_SUMMARY.format(*weather_values)
+            message_dict["river_summary"] = RIVER_SUMMARY.format(*river_values)
+            if negative_feedback_writer is not None:
+                negative_feedback_writer.submit(message_dict)
+            else:
+                record_id = message_dict.get("uuid")
+                if record_id is None or record_id not in negative_feedback_ids:
+                    negative_feedback_log.append(message_dict)
+                    if record_id is not None:
+                        negative_feedback_ids.add(record_id)
+
+        # Log ALL feedback (formatted by the logger only if INFO is enabled)
+        logger.info("📝 Feedback ({}) | Guide: {} | Comment: {}", trip_date, guide, comment)
+        logger.info("⛅ " + WEATHER_SUMMARY, *weather_values)
+        logger.info("🌊 " + RIVER_SUMMARY, *river_values)
 
         # Detect possible bad weather influence on negative feedback
         if is_negative and weather.get("weather_condition") in ["Stormy", "Rainy"]:
             logger.warning(f"⚠️ Bad weather may have influenced feedback: {comment}")
 
-    except json.JSONDecodeError:
-        logger.error(f"Invalid JSON message: {message}")
     except Exception as e:
         logger.error(f"Error processing message: {e}")
 
@@ -174,15 +280,169 @@ def process_message(message: str) -> None:
 # Save Negative Feedback Log
 #####################################
 
-def log_negative_feedback():
-    """Save all negative feedback to a separate JSON file for analysis."""
+NEGATIVE_FEEDBACK_FILE = "negative_feedback.json"
+
+
+def log_negative_feedback(log_file=NEGATIVE_FEEDBACK_FILE):
+    """Save all negative feedback to a separate JSON file for analysis ('rewrite' mode)."""
     if negative_feedback_log:
-        log_file = "negative_feedback.json"
         with open(log_file, "w", encoding="utf-8") as f:
             json.dump(negative_feedback_log, f, indent=4)
         logger.info(f"📂 Negative feedback log saved to {log_file}")
 
 
+def restore_negative_feedback_log(log_file=NEGATIVE_FEEDBACK_FILE) -> int:
+    """
+    Reload the 'rewrite' mode log when resuming from a checkpoint.
+
+    The file holds every negative record processed before the restart,
+    including those after the last checkpoint, whose messages are replayed;
+    their uuids are remembered so the replay does not log them again.
+
+    Returns:
+        int: Number of records restored.
+    """
+    try:
+        with open(log_file, "r", encoding="utf-8") as f:
+            records = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except json.JSONDecodeError:
+        logger.error(f"Invalid JSON format in file: {log_file}; starting a new negative feedback log.")
+        return 0
+    negative_feedback_log[:] = records
+    negative_feedback_ids.clear()
+    negative_feedback_ids.update(r["uuid"] for r in records if r.get("uuid") is not None)
+    logger.info(f"📂 Restored {len(records)} negative feedback records from {log_file}")
+    return len(records)
+
+
+def flush_negative_feedback() -> None:
+    """Make every submitted negative record durable before a checkpoint ('append' mode)."""
+    if negative_feedback_writer is not None and not negative_feedback_writer.flush():
+        raise RuntimeError("Negative feedback writer did not flush; checkpoint skipped.")
+
+
+#####################################
+# Consume Loop
+#####################################
+
+DEFAULT_STATE_REPORT_SECONDS = 10.0
+
+
+def report_state(state_queue, worker_name: str, checkpointer=None) -> None:
+    """
+    Send this process's per-partition feedback counts to the pool runner.
+
+    With checkpoints, each partition also carries its next offset, so the
+    runner can tell which owner's counts are newest after a rebalance.
+    """
+    offsets = checkpointer.offsets if checkpointer is not None else {}
+    snapshot = {
+        partition: {"offset": offsets.get(partition), "state": state.to_dict()}
+        for partition, state in feedback_states.items()
+    }
+    state_queue.put((worker_name, snapshot))
+
+
+def run_consumer(
+    topic: str,
+    group_id: str,
+    rewrite_mode: bool = False,
+    negative_feedback_file=NEGATIVE_FEEDBACK_FILE,
+    state_queue=None,
+    worker_name: str = "consumer",
+    report_seconds: float = DEFAULT_STATE_REPORT_SECONDS,
+    checkpoint_file=None,
+    checkpoint_seconds: float = DEFAULT_CHECKPOINT_SECONDS,
+    summary_every_messages: int = 100,
+    summary_seconds: float = 30.0,
+) -> None:
+    """
+    Consume and process rafting feedback until interrupted.
+
+    Args:
+        topic (str): Kafka topic to read.
+        group_id (str): Consumer group (workers in one group share the partitions).
+        rewrite_mode (bool): Rewrite the negative feedback JSON file per message.
+        negative_feedback_file: Negative feedback JSON file for this process.
+        state_queue (optional): Queue that receives (worker_name, per-partition counts)
+                                every `report_seconds` and on exit.
+        worker_name (str): Name used in logs and state reports.
+        report_seconds (float): How often to report counts to `state_queue`.
+        checkpoint_file (optional): SQLite checkpoint file (None disables checkpoints).
+        checkpoint_seconds (float): How often to checkpoint counts and offsets.
+        summary_every_messages (int): Log a feedback summary after this many messages.
+        summary_seconds (float): Log a feedback summary at least this often while busy.
+    """
+    global negative_feedback_writer
+
+    if not rewrite_mode:
+        negative_feedback_writer = NegativeFeedbackWriter(
+            negative_feedback_file,
+            flush_count=get_negative_feedback_flush_count(),
+            flush_seconds=get_negative_feedback_flush_seconds(),
+            compact_seconds=get_negative_feedback_compact_seconds(),
+        )
+        negative_feedback_writer.start()
+
+    # Create the Kafka consumer; with checkpoints, offsets are committed with each checkpoint.
+    # Values are parsed once by the codec; malformed messages arrive as None and are skipped.
+    codec = get_json_codec()
+    checkpointer = None
+    if checkpoint_file:
+        checkpointer = FeedbackCheckpointer(
+            CheckpointStore(checkpoint_file), group_id, topic, feedback_states, checkpoint_seconds,
+            before_save=flush_negative_feedback,
+        )
+        # Resumed counts include the logged negatives, so bring the log back too
+        if rewrite_mode and checkpointer.has_checkpoints():
+            restore_negative_feedback_log(negative_feedback_file)
+        consumer = create_kafka_consumer(None, group_id, enable_auto_commit=False, codec=codec, skip_invalid=True)
+        checkpointer.attach(consumer)
+    else:
+        consumer = create_kafka_consumer(topic, group_id, codec=codec, skip_invalid=True)
+    next_report = time.monotonic() + report_seconds
+    reporter = SummaryReporter(summary_every_messages, summary_seconds)
+
+    # Poll and process messages
+    try:
+        for message in consumer:
+            process_message(message.value, message.partition)
+            if rewrite_mode:
+                log_negative_feedback(negative_feedback_file)
+            metrics = reporter.tick()
+            if metrics is not None:
+                log_feedback_summary(metrics, worker_name)
+            if checkpointer is not None:
+                checkpointer.advance(message.partition, message.offset)
+                if checkpointer.due():
+                    checkpointer.save()
+            if state_queue is not None and time.monotonic() >= next_report:
+                report_state(state_queue, worker_name, checkpointer)
+                next_report = time.monotonic() + report_seconds
+    except KeyboardInterrupt:
+        logger.warning(f"⚠️ {worker_name} interrupted by user.")
+    except Exception as e:
+        logger.error(f"❌ Error while consuming messages in {worker_name}: {e}")
+    finally:
+        log_feedback_summary(reporter.snapshot(), worker_name)
+        if checkpointer is not None:
+            try:
+                checkpointer.save()
+                logger.info(f"💾 Checkpoint saved ({worker_name}).")
+            except Exception as e:
+                logger.error(f"❌ Error saving checkpoint in {worker_name}: {e}")
+        consumer.close()
+        logger.info(f"✅ Kafka consumer closed ({worker_name}).")
+        if checkpointer is not None:
+            checkpointer.store.close()
+        if negative_feedback_writer is not None:
+            negative_feedback_writer.close()
+            negative_feedback_writer = None
+        if state_queue is not None:
+            report_state(state_queue, worker_name, checkpointer)
+
 #####################################
 # Define main function for this module
 #####################################
@@ -194,29 +454,25 @@ def main() -> None:
     - Reads the Kafka topic name and consumer group ID from environment variables.
     - Creates a Kafka consumer.
     - Processes rafting feedback messages from Kafka.
+    - Persists negative feedback in batches from a background thread
+      ('append' mode) or by rewriting the JSON file per message ('rewrite' mode).
     """
     logger.info("🚀 START rafting consumer.")
 
     # Fetch environment variables
     topic = get_kafka_topic()
     group_id = get_kafka_consumer_group_id()
-
-    # Create the Kafka consumer
-    consumer = create_kafka_consumer(topic, group_id)
-
-    # Poll and process messages
-    try:
-        for message in consumer:
-            message_str = message.value
-            process_message(message_str)
-            log_negative_feedback()
-    except KeyboardInterrupt:
-        logger.warning("⚠️ Consumer interrupted by user.")
-    except Exception as e:
-        logger.error(f"❌ Error while consuming messages: {e}")
-    finally:
-        consumer.close()
-        logger.info("✅ Kafka consumer closed.")
+    rewrite_mode = get_negative_feedback_mode() == "rewrite"
+
+    run_consumer(
+        topic,
+        group_id,
+        rewrite_mode,
+        checkpoint_file=get_checkpoint_file(),
+        checkpoint_seconds=get_checkpoint_seconds(),
+        summary_every_messages=get_summary_every_messages(),
+        summary_seconds=get_summary_seconds(),
+    )
 
 #####################################
 # Conditional Execution
@@ -0,0 +1,211 @@
+"""
+rafting_consumer_pool.py
+
+Run several rafting consumer processes in one Kafka consumer group.
+
+Kafka assigns each worker a share of the topic's partitions (create the
+topic with KAFKA_NUM_PARTITIONS >= RAFTING_CONSUMER_WORKERS, or extra
+workers sit idle). Every worker keeps its feedback counts per partition and
+reports them to this runner, which merges them on demand and logs the
+combined guide performance.
+
+Each worker persists negative feedback to its own file
+(`negative_feedback.worker<N>.json`), so workers never write the same file.
+
+With checkpoints enabled (CHECKPOINT_FILE), a partition's counts follow it
+from worker to worker through the checkpoint store, so the runner keeps the
+newest report per partition. Without checkpoints, counts are kept per
+(worker, partition) and summed.
+
+Usage:
+    python -m consumers.rafting_consumer_pool
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import multiprocessing
+import os
+import queue
+import time
+
+from dotenv import load_dotenv
+
+from consumers import rafting_consumer
+from utils.utils_checkpoint import get_checkpoint_file, get_checkpoint_seconds
+from utils.utils_feedback_state import FeedbackState
+from utils.utils_logger import close_log_sinks, logger
+
+#####################################
+# Load Environment Variables
+#####################################
+
+load_dotenv()
+
+#####################################
+# Getter Functions for .env Variables
+#####################################
+
+def get_worker_count() -> int:
+    """Fetch the number of consumer worker processes from environment or use default."""
+    workers = int(os.getenv("RAFTING_CONSUMER_WORKERS", 2))
+    logger.info(f"Rafting consumer workers: {workers}")
+    return workers
+
+
+def get_state_report_seconds() -> float:
+    """Fetch how often (seconds) workers report their counts and the runner logs the merged totals."""
+    report_seconds = float(os.getenv("RAFTING_STATE_REPORT_SECONDS", rafting_consumer.DEFAULT_STATE_REPORT_SECONDS))
+    logger.info(f"Feedback state report interval: {report_seconds} seconds")
+    return report_seconds
+
+#####################################
+# Worker Process
+#####################################
+
+def run_worker(
+    worker_id: int,
+    topic: str,
+    group_id: str,
+    rewrite_mode: bool,
+    state_queue,
+    report_seconds: float,
+    checkpoint_file: str,
+    checkpoint_seconds: float,
+    summary_every_messages: int,
+    summary_seconds: float,
+) -> None:
+    """Entry point of one worker process."""
+    worker_name = f"worker{worker_id}"
+    logger.info(f"🚀 START rafting consumer {worker_name} (pid {os.getpid()}).")
+    try:
+        rafting_consumer.run_consumer(
+            topic,
+            group_id,
+            rewrite_mode,
+            negative_feedback_file=f"negative_feedback.{worker_name}.json",
+            state_queue=state_queue,
+            worker_name=worker_name,
+            report_seconds=report_seconds,
+            checkpoint_file=checkpoint_file,
+            checkpoint_seconds=checkpoint_seconds,
+            summary_every_messages=summary_every_messages,
+            summary_seconds=summary_seconds,
+        )
+    finally:
+        # Worker processes exit without running atexit handlers
+        close_log_sinks()
+
+#####################################
+# Merged State
+#####################################
+
+def apply_report(snapshots: dict, report) -> None:
+    """
+    Store a worker's latest per-partition counts.
+
+    Checkpointed partitions (reports with an offset) are keyed by partition
+    and only replaced by a report at the same or a later offset. Others are
+    keyed by (worker, partition), so a partition that moves to another worker
+    keeps what its previous owner counted.
+    """
+    worker_name, partitions = report
+    for partition, data in partitions.items():
+        offset = data.get("offset")
+        if offset is None:
+            snapshots[(worker_name, partition)] = (None, FeedbackState.from_dict(data["state"]))
+            continue
+        current = snapshots.get(partition)
+        if current is None or current[0] <= offset:
+            snapshots[partition] = (offset, FeedbackState.from_dict(data["state"]))
+
+
+def merged_feedback(snapshots: dict) -> FeedbackState:
+    """Merge the latest counts from every worker and partition."""
+    return FeedbackState.merged(state for _, state in snapshots.values())
+
+
+def drain_reports(state_queue, snapshots: dict, timeout: float) -> None:
+    """Apply every report waiting on the queue, blocking up to `timeout` for the first."""
+    try:
+        apply_report(snapshots, state_queue.get(timeout=timeout))
+        while True:
+            apply_report(snapshots, state_queue.get_nowait())
+    except queue.Empty:
+        pass
+
+#####################################
+# Define main function for this module
+#####################################
+
+def main() -> None:
+    """
+    Main entry point for the consumer pool.
+
+    - Starts RAFTING_CONSUMER_WORKERS consumer processes in one consumer group.
+    - Collects their per-partition feedback counts.
+    - Logs the merged guide performance periodically and on shutdown.
+    """
+    logger.info("🚀 START rafting consumer pool.")
+
+    topic = rafting_consumer.get_kafka_topic()
+    group_id = rafting_consumer.get_kafka_consumer_group_id()
+    rewrite_mode = rafting_consumer.get_negative_feedback_mode() == "rewrite"
+    worker_count = get_worker_count()
+    report_seconds = get_state_report_seconds()
+    checkpoint_file = get_checkpoint_file()
+    checkpoint_seconds = get_checkpoint_seconds()
+    summary_every_messages = rafting_consumer.get_summary_every_messages()
+    summary_seconds = rafting_consumer.get_summary_seconds()
+
+    state_queue = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(
+            target=run_worker,
+            args=(
+                worker_id, topic, group_id, rewrite_mode, state_queue,
+                report_seconds, checkpoint_file, checkpoint_seconds,
+                summary_every_messages, summary_seconds,
+            ),
+            name=f"rafting-consumer-{worker_id}",
+        )
+        for worker_id in range(1, worker_count + 1)
+    ]
+    for worker in workers:
+        worker.start()
+
+    snapshots = {}
+    next_log = time.monotonic() + report_seconds
+    try:
+        while any(worker.is_alive() for worker in workers):
+            drain_reports(state_queue, snapshots, timeout=1.0)
+            if time.monotonic() >= next_log:
+                logger.info(f"📊 Merged feedback counts ({len(snapshots)} partition states): "
+                            f"{merged_feedback(snapshots).guide_feedback}")
+                next_log = time.monotonic() + report_seconds
+    except KeyboardInterrupt:
+        logger.warning("⚠️ Consumer pool interrupted by user. Waiting for workers to stop...")
+    finally:
+        # Workers get the interrupt too; collect their final reports while they exit
+        deadline = time.monotonic() + 30
+        while any(worker.is_alive() for worker in workers) and time.monotonic() < deadline:
+            drain_reports(state_queue, snapshots, timeout=0.5)
+        for worker in workers:
+            if worker.is_alive():
+                logger.warning(f"Terminating {worker.name}, which did not stop in time.")
+                worker.terminate()
+            worker.join()
+        drain_reports(state_queue, snapshots, timeout=0.1)
+
+        merged = merged_feedback(snapshots)
+        logger.info(f"📊 Final merged feedback counts ({len(merged)} records): {merged.guide_feedback}")
+        logger.info("✅ Rafting consumer pool stopped.")
+
+
+#####################################
+# Conditional Execution
+#####################################
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,6 @@ import sys
 import time  # control message intervals
 import pathlib  # work with file paths
 import csv  # handle CSV data
-import json  # work with JSON data
 from datetime import datetime  # work with timestamps
 
 # Import external packages
@@ -29,6 +28,7 @@ from utils.utils_producer import (
     create_kafka_producer,
     create_kafka_topic,
 )
+from utils.utils_codec import get_json_codec
 from utils.utils_logger import logger
 
 #####################################
@@ -144,9 +144,7 @@ def main():
         sys.exit(1)
 
     # Create the Kafka producer
-    producer = create_kafka_producer(
-        value_serializer=lambda x: json.dumps(x).encode("utf-8")
-    )
+    producer = create_kafka_producer(codec=get_json_codec())
     if not producer:
         logger.error("Failed to create Kafka producer. Exiting...")
         sys.exit(3)
@@ -15,10 +15,21 @@ This script:
 # Import Modules
 #####################################
 
-import json
-import time
-from kafka import KafkaConsumer, KafkaProducer
+import os
+from dotenv import load_dotenv
+from utils.utils_codec import get_json_codec
+from utils.utils_consumer import create_kafka_consumer
 from utils.utils_logger import logger
+from utils.utils_metrics import ThroughputCounter
+from utils.utils_pacing import ReplayPacer, TokenBucket
+from utils.utils_producer import create_kafka_producer
+from utils.utils_wire import get_wire_format
+
+#####################################
+# Load Environment Variables
+#####################################
+
+load_dotenv()
 
 #####################################
 # Kafka Configuration
@@ -26,22 +37,75 @@ from utils.utils_logger import logger
 
 KAFKA_SOURCE_TOPIC = "rafting_csv_feedback"  # Topic with structured CSV data
 KAFKA_TARGET_TOPIC = "processed_csv_feedback"  # Topic for processed messages
-KAFKA_BROKER = "localhost:9092"
+KAFKA_GROUP_ID = "csv_producer_group"
+
+PACING_MODES = ("none", "rate", "replay")
+
+#####################################
+# Getter Functions for .env Variables
+#####################################
+
+def get_pacing_mode() -> str:
+    """Fetch pacing mode: 'none' (as fast as possible), 'rate' (fixed msgs/sec), or 'replay' (original timestamps)."""
+    mode = os.getenv("CSV_PRODUCER_PACING", "none").strip().lower()
+    if mode not in PACING_MODES:
+        logger.warning(f"Unknown pacing mode '{mode}'; using 'none'.")
+        mode = "none"
+    logger.info(f"Pacing mode: {mode}")
+    return mode
+
 
-# Create Kafka Consumer (Reads CSV-Formatted Messages)
-consumer = KafkaConsumer(
-    KAFKA_SOURCE_TOPIC,
-    bootstrap_servers=KAFKA_BROKER,
-    auto_offset_reset="earliest",
-    group_id="csv_producer_group",
-    value_deserializer=lambda x: json.loads(x.decode("utf-8"))
-)
+def get_pacing_rate() -> float:
+    """Fetch the fixed send rate (msgs/sec) used in 'rate' pacing mode."""
+    rate = float(os.getenv("CSV_PRODUCER_MESSAGES_PER_SECOND", 100))
+    logger.info(f"Pacing rate: {rate} msgs/sec")
+    return rate
 
-# Create Kafka Producer (Publishes Processed Messages)
-producer = KafkaProducer(
-    bootstrap_servers=KAFKA_BROKER,
-    value_serializer=lambda v: json.dumps(v).encode("utf-8")
-)
+
+def get_replay_speed() -> float:
+    """Fetch the speed multiplier used in 'replay' pacing mode."""
+    speed = float(os.getenv("CSV_PRODUCER_REPLAY_SPEED", 1.0))
+    logger.info(f"Replay speed: {speed}x")
+    return speed
+
+
+def get_batch_size() -> int:
+    """Fetch the maximum number of records per poll/send batch."""
+    batch_size = int(os.getenv("CSV_PRODUCER_BATCH_SIZE", 500))
+    logger.info(f"Batch size: {batch_size}")
+    return batch_size
+
+
+def get_poll_timeout_ms() -> int:
+    """Fetch how long (ms) a poll waits for records."""
+    timeout_ms = int(os.getenv("CSV_PRODUCER_POLL_TIMEOUT_MS", 1000))
+    logger.info(f"Poll timeout: {timeout_ms} ms")
+    return timeout_ms
+
+
+def get_report_seconds() -> float:
+    """Fetch how often (seconds) to log the throughput counter."""
+    report_seconds = float(os.getenv("CSV_PRODUCER_REPORT_SECONDS", 10))
+    logger.info(f"Throughput report interval: {report_seconds} seconds")
+    return report_seconds
+
+#####################################
+# Create Kafka Clients
+#####################################
+
+def create_consumer():
+    """Create the Kafka consumer that reads CSV-formatted messages (manual commits)."""
+    return create_kafka_consumer(
+        KAFKA_SOURCE_TOPIC,
+        KAFKA_GROUP_ID,
+        codec=get_json_codec(),
+        enable_auto_commit=False,
+    )
+
+
+def create_producer():
+    """Create the Kafka producer that publishes processed messages."""
+    return create_kafka_producer(codec=get_json_codec(), wire_format=get_wire_format())
 
 #####################################
 # Function to Process CSV Data
@@ -56,7 +120,6 @@ def process_csv_data(csv_data):
     - Adds weather and river summary fields.
     - Flags potential trip disruptions due to bad weather.
     """
-    guide = csv_data.get("guide", "Unknown")
     is_negative = csv_data.get("is_negative", "no") == "yes"
     weather = csv_data.get("weather", "Unknown")
 
@@ -69,7 +132,7 @@ def process_csv_data(csv_data):
         logger.warning(f"⚠️ Trip may be disrupted due to bad weather: {weather}")
 
     # Log processed data
-    logger.info(f"✅ Processed CSV Data: {csv_data}")
+    logger.debug(f"✅ Processed CSV Data: {csv_data}")
 
     return csv_data
 
@@ -77,14 +140,93 @@ def process_csv_data(csv_data):
 # Consume, Process, and Publish Messages
 #####################################
 
-for message in consumer:
-    csv_data = message.value
+def create_pacer(mode: str):
+    """
+    Return a function that delays a record according to the pacing mode.
+
+    'none' returns None so the hot loop skips pacing entirely.
+    """
+    if mode == "rate":
+        bucket = TokenBucket(get_pacing_rate())
+        return lambda record: bucket.acquire()
+    if mode == "replay":
+        pacer = ReplayPacer(get_replay_speed())
+        return lambda record: pacer.wait(record.get("timestamp"))
+    return None
+
 
-    # Process the message
-    processed_data = process_csv_data(csv_data)
+def run_stage(consumer, producer, pace, batch_size: int, timeout_ms: int, counter: ThroughputCounter,
+              should_stop=None) -> None:
+    """
+    Consume, process, and republish batches until interrupted.
+
+    Each polled batch is processed and sent, the producer is flushed once,
+    and the batch's offsets are committed. `should_stop`, if given, is called
+    after each batch with the number of records sent (0 when idle); the loop
+    returns when it returns True.
+    """
+    while True:
+        records = consumer.poll(timeout_ms=timeout_ms, max_records=batch_size)
+
+        sent = 0
+        for batch in records.values():
+            for message in batch:
+                if pace is not None:
+                    pace(message.value)
+                producer.send(KAFKA_TARGET_TOPIC, value=process_csv_data(message.value))
+                sent += 1
+
+        if sent:
+            producer.flush()
+            consumer.commit()
+            counter.add(sent)
+            logger.debug(f"🚀 Republished {sent} processed records to {KAFKA_TARGET_TOPIC}")
+
+        report = counter.maybe_report()
+        if report:
+            logger.info(report)
+        if should_stop is not None and should_stop(sent):
+            return
 
-    # Publish to the next Kafka topic
-    producer.send(KAFKA_TARGET_TOPIC, value=processed_data)
-    logger.info(f"🚀 Republished Processed CSV Data to {KAFKA_TARGET_TOPIC}")
+#####################################
+# Main Function
+#####################################
+
+def main() -> None:
+    """
+    Main entry point for the CSV processing stage.
+
+    - Reads CSV-formatted feedback from `rafting_csv_feedback`.
+    - Assigns trip status and flags weather disruptions.
+    - Publishes batches to `processed_csv_feedback`, paced per CSV_PRODUCER_PACING.
+    """
+    logger.info("🚀 START CSV rafting producer stage.")
+
+    pace = create_pacer(get_pacing_mode())
+    batch_size = get_batch_size()
+    timeout_ms = get_poll_timeout_ms()
+    counter = ThroughputCounter(get_report_seconds())
+
+    consumer = create_consumer()
+    producer = create_producer()
+
+    try:
+        run_stage(consumer, producer, pace, batch_size, timeout_ms, counter)
+    except KeyboardInterrupt:
+        logger.warning("⚠️ CSV producer stage interrupted by user.")
+    except Exception as e:
+        logger.error(f"❌ Error in CSV producer stage: {e}")
+    finally:
+        consumer.close()
+        producer.close()
+        logger.info(
+            f"✅ Kafka clients closed. Republished {counter.total} records "
+            f"({counter.overall_rate():.1f} msgs/sec)."
+        )
+
+#####################################
+# Conditional Execution
+#####################################
 
-    time.sleep(1)  # Simulating real-time processing
+if __name__ == "__main__":
+    main()
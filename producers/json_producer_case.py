@@ -31,6 +31,8 @@ from utils.utils_producer import (
     create_kafka_producer,
     create_kafka_topic,
 )
+from utils.utils_codec import get_json_codec
+from utils.utils_json_stream import iter_json_records
 from utils.utils_logger import logger
 
 #####################################
@@ -92,22 +94,13 @@ def generate_messages(file_path: pathlib.Path):
     """
     while True:
         try:
-            logger.info(f"Opening data file in read mode: {DATA_FILE}")
-            with open(DATA_FILE, "r") as json_file:
-                logger.info(f"Reading data from file: {DATA_FILE}")
-
-                # Load the JSON file as a list of dictionaries
-                json_data: list = json.load(json_file)
-
-                if not isinstance(json_data, list):
-                    raise ValueError(
-                        f"Expected a list of JSON objects, got {type(json_data)}."
-                    )
-
-                # Iterate over the entries in the JSON file
-                for buzz_entry in json_data:
-                    logger.debug(f"Generated JSON: {buzz_entry}")
-                    yield buzz_entry
+            logger.info(f"Reading data from file: {DATA_FILE}")
+
+            # Parse entries incrementally (JSON array or JSON Lines)
+            # instead of loading the whole file into memory first
+            for buzz_entry in iter_json_records(DATA_FILE):
+                logger.debug(f"Generated JSON: {buzz_entry}")
+                yield buzz_entry
         except FileNotFoundError:
             logger.error(f"File not found: {file_path}. Exiting.")
             sys.exit(1)
@@ -146,9 +139,7 @@ def main():
         sys.exit(1)
 
     # Create the Kafka producer
-    producer = create_kafka_producer(
-        value_serializer=lambda x: json.dumps(x).encode("utf-8")
-    )
+    producer = create_kafka_producer(codec=get_json_codec())
     if not producer:
         logger.error("Failed to create Kafka producer. Exiting...")
         sys.exit(3)
@@ -1,8 +1,6 @@
 import os
 import sys
-import time
 import pathlib
-import json
 import subprocess
 from dotenv import load_dotenv
 
@@ -12,7 +10,12 @@ from utils.utils_producer import (
     create_kafka_producer,
     create_kafka_topic,
 )
-from utils.utils_logger import logger
+from utils.utils_codec import get_json_codec
+from utils.utils_json_stream import iter_json_records
+from utils.utils_logger import log_event, logger
+from utils.utils_metrics import SendStats
+from utils.utils_pacing import TokenBucket
+from utils.utils_wire import get_wire_format
 
 #####################################
 # Function to Run Data Generators
@@ -52,6 +55,37 @@ def run_data_generators():
 
 load_dotenv()
 
+#####################################
+# Getter Functions for .env Variables
+#####################################
+
+def get_message_interval() -> float:
+    """Fetch message interval (seconds) for paced mode from environment or use default."""
+    interval = float(os.getenv("RAFTING_INTERVAL_SECONDS", 2))
+    logger.info(f"Message interval: {interval} seconds")
+    return interval
+
+
+def get_replay_mode() -> bool:
+    """Fetch whether to bulk-replay the data file instead of pacing one message per interval."""
+    replay = os.getenv("RAFTING_REPLAY_MODE", "false").strip().lower() in ("1", "true", "yes")
+    logger.info(f"Replay mode: {replay}")
+    return replay
+
+
+def get_replay_rate() -> float:
+    """Fetch replay rate in messages/sec (0 = as fast as possible)."""
+    rate = float(os.getenv("RAFTING_MESSAGES_PER_SECOND", 0))
+    logger.info(f"Replay rate: {rate if rate > 0 else 'unlimited'} msgs/sec")
+    return rate
+
+
+def get_delivery_batch_size() -> int:
+    """Fetch how many sends to accumulate before gathering their delivery futures."""
+    batch_size = int(os.getenv("RAFTING_DELIVERY_BATCH_SIZE", 1000))
+    logger.info(f"Delivery batch size: {batch_size}")
+    return batch_size
+
 #####################################
 # Set up Paths
 #####################################
@@ -60,6 +94,70 @@ PROJECT_ROOT = pathlib.Path(__file__).parent.parent  # Go one level up
 DATA_FOLDER: pathlib.Path = PROJECT_ROOT.joinpath("data")
 DATA_FILE: pathlib.Path = DATA_FOLDER.joinpath("all_rafting_remarks.json")
 
+#####################################
+# Delivery Futures
+#####################################
+
+def gather_deliveries(producer, pending: list) -> None:
+    """
+    Flush the producer once and resolve a whole batch of send futures.
+
+    Args:
+        producer: Kafka producer the futures came from.
+        pending (list): Send futures; cleared after they are resolved.
+    """
+    if not pending:
+        return
+    producer.flush()
+    failures = [future.exception for future in pending if future.failed()]
+    if failures:
+        logger.error(f"❌ {len(failures)} of {len(pending)} sends failed; first error: {failures[0]}")
+    pending.clear()
+
+#####################################
+# Send Loop
+#####################################
+
+def send_records(producer, topic: str, records, bucket: TokenBucket, replay_mode: bool,
+                 delivery_batch_size: int, stats: SendStats) -> int:
+    """
+    Send records to Kafka until the iterable is exhausted.
+
+    Args:
+        producer: Kafka producer.
+        topic (str): Topic to send to.
+        records (iterable): Message dicts; stop sending by ending the iterable.
+        bucket (TokenBucket): Paces the sends.
+        replay_mode (bool): Log each message at DEBUG and skip its "sent" event.
+        delivery_batch_size (int): Resolve delivery futures once this many are pending.
+        stats (SendStats): Tracks send latency and throughput.
+
+    Returns:
+        int: Number of records sent.
+    """
+    pending = []
+    sent = 0
+    try:
+        for message_dict in records:
+            bucket.acquire()
+            future = producer.send(topic, value=message_dict)
+            stats.track(future)
+            pending.append(future)
+            sent += 1
+
+            if replay_mode:
+                logger.debug("📨 Sent message to Kafka: {}", message_dict)
+            else:
+                logger.info("📨 Sent message to Kafka: {}", message_dict)
+                # Per-message event only when paced; replay mode is for throughput
+                log_event("sent", id=message_dict.get("uuid"), topic=topic, record=message_dict)
+
+            if len(pending) >= delivery_batch_size:
+                gather_deliveries(producer, pending)
+    finally:
+        gather_deliveries(producer, pending)
+    return sent
+
 #####################################
 # Main Function
 #####################################
@@ -70,7 +168,8 @@ def main():
     - Runs all data generation scripts.
     - Ensures Kafka topic exists.
     - Creates Kafka producer.
-    - Streams messages from JSON file to Kafka.
+    - Streams messages from JSON file to Kafka, paced by a token bucket.
+    - Reports achieved msgs/sec and p50/p99 send latency at the end.
     """
 
     logger.info("🚀 START: Rafting Producer")
@@ -81,9 +180,18 @@ def main():
     # Step 2: Verify Kafka Services
     verify_services()
 
-    # Step 3: Get Kafka topic and message interval
+    # Step 3: Get Kafka topic and pacing
+    # Paced mode sends one message per interval; replay mode sends at a fixed
+    # msgs/sec (or unlimited) and only logs per-message detail at DEBUG.
     topic = os.getenv("RAFTING_TOPIC", "rafting_feedback")
-    interval_secs = int(os.getenv("RAFTING_INTERVAL_SECONDS", 2))
+    replay_mode = get_replay_mode()
+    if replay_mode:
+        rate = get_replay_rate()
+    else:
+        interval_secs = get_message_interval()
+        rate = 1.0 / interval_secs if interval_secs > 0 else 0.0
+    bucket = TokenBucket(rate, burst=1.0 if not replay_mode else None)
+    delivery_batch_size = max(1, get_delivery_batch_size())
 
     # Step 4: Verify the JSON data file exists
     if not DATA_FILE.exists():
@@ -91,9 +199,7 @@ def main():
         sys.exit(1)
 
     # Step 5: Create Kafka producer
-    producer = create_kafka_producer(
-        value_serializer=lambda x: json.dumps(x).encode("utf-8")
-    )
+    producer = create_kafka_producer(codec=get_json_codec(), wire_format=get_wire_format())
     if not producer:
         logger.error("❌ Failed to create Kafka producer. Exiting...")
         sys.exit(3)
@@ -107,21 +213,20 @@ def main():
         sys.exit(1)
 
     # Step 7: Stream messages to Kafka
+    stats = SendStats()
     try:
-        with open(DATA_FILE, "r", encoding="utf-8") as json_file:
-            json_data = json.load(json_file)
-
-            for message_dict in json_data:
-                producer.send(topic, value=message_dict)
-                logger.info(f"📨 Sent message to Kafka: {message_dict}")
-                time.sleep(interval_secs)
+        # Records are parsed incrementally, so sending starts immediately
+        # and memory stays flat even for multi-GB replay files (array or JSONL).
+        send_records(producer, topic, iter_json_records(DATA_FILE), bucket, replay_mode, delivery_batch_size, stats)
     except KeyboardInterrupt:
         logger.warning("⛔ Producer interrupted by user.")
     except Exception as e:
         logger.error(f"❌ Error during message production: {e}")
     finally:
+        stats.stop()
         producer.close()
         logger.info("🔻 Kafka producer closed.")
+        logger.info(stats.summary())
 
     logger.info("✅ END: Rafting Producer")
 
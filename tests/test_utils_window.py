@@ -0,0 +1,61 @@
+"""
+Regression tests for utils_window.KeyedWindowStore time windows.
+
+Each case feeds one key a stream of readings and compares window_range()
+against a brute-force reference that scans every reading kept so far.
+"""
+
+import random
+
+import pytest
+
+from utils.utils_window import KeyedWindowStore
+
+
+def reference_range(readings, seconds, max_capacity):
+    """
+    (min, max) over readings in the last `seconds`, or None before a full span
+    or when the store (keeping at most `max_capacity` readings) lost part of it.
+    """
+    first, last = readings[0][0], readings[-1][0]
+    if last - first < seconds:
+        return None
+    if len(readings) > max_capacity and readings[-max_capacity - 1][0] >= last - seconds:
+        return None
+    inside = [value for timestamp, value in readings if timestamp >= last - seconds]
+    return min(inside), max(inside)
+
+
+def run_stream(store, seconds, rate_hz, count, seed=0):
+    """Feed `count` readings at `rate_hz`; return (mismatches, full windows)."""
+    rng = random.Random(seed)
+    readings, mismatches, full = [], 0, 0
+    for i in range(count):
+        timestamp = i / rate_hz
+        value = 225.0 if rng.random() < 0.5 else 225.0 + rng.uniform(-1.0, 1.0)
+        readings.append((timestamp, value))
+        slot = store.update("P1", value, timestamp, now=0.0)
+        expected = reference_range(readings, seconds, store.max_capacity)
+        full += expected is not None
+        mismatches += store.window_range(slot, 0) != expected
+    return mismatches, full
+
+
+def test_window_exactly_at_capacity_reports_range():
+    # 255 s at 1 Hz holds exactly 256 readings: the default capacity, so it never grows
+    store = KeyedWindowStore((), (255.0,), max_keys=1)
+    mismatches, full = run_stream(store, 255.0, 1.0, 2000)
+    assert full > 1700
+    assert mismatches == 0
+
+
+@pytest.mark.parametrize("seconds, rate_hz, max_capacity", [
+    (60.0, 10.0, 8192),
+    (60.0, 10.0, 256),
+    (30.0, 3.0, 64),
+    (12.5, 7.0, 128),
+])
+def test_time_window_matches_brute_force(seconds, rate_hz, max_capacity):
+    store = KeyedWindowStore((), (seconds,), max_keys=1, capacity=16, max_capacity=max_capacity)
+    mismatches, _ = run_stream(store, seconds, rate_hz, 3000)
+    assert mismatches == 0
@@ -0,0 +1,297 @@
+"""
+utils_checkpoint.py - checkpoint consumer aggregates together with their offsets.
+
+A consumer that keeps FeedbackState per partition saves each partition's
+state and the offset of the next unprocessed message in one SQLite
+transaction. On startup (and whenever the group rebalances) the consumer
+restores the saved state and seeks to the saved offset, so restarting costs
+a single read instead of a replay of the whole topic.
+
+Offsets are also committed to Kafka after every checkpoint, so tools that
+read the group's committed offsets stay accurate; the checkpoint is what
+the consumer resumes from.
+
+Checkpoints hold offsets, so they are only valid for the topic they were
+taken from. When a producer clears a topic by deleting and re-creating it
+(KAFKA_CLEAR_MODE=recreate, or the fallback when DeleteRecords is refused),
+offsets restart at 0 and forget_topic_checkpoints() drops that topic's rows
+for every group, so consumers start over instead of restoring counts for
+deleted messages and seeking past new ones. Clearing with DeleteRecords
+keeps offsets increasing, so checkpoints stay valid.
+
+Usage:
+    from utils.utils_checkpoint import CheckpointStore, FeedbackCheckpointer
+    checkpointer = FeedbackCheckpointer(CheckpointStore(path), group_id, topic, feedback_states)
+    consumer = create_kafka_consumer(None, group_id, enable_auto_commit=False)
+    checkpointer.attach(consumer)
+    for message in consumer:
+        process_message(message.value, message.partition)
+        checkpointer.advance(message.partition, message.offset)
+        if checkpointer.due():
+            checkpointer.save()
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import json
+import os
+import pathlib
+import sqlite3
+import time
+from datetime import datetime
+
+from kafka import ConsumerRebalanceListener
+from kafka.structs import OffsetAndMetadata, TopicPartition
+
+from utils.utils_feedback_state import FeedbackState
+from utils.utils_logger import logger
+
+#####################################
+# Default Configurations
+#####################################
+
+DEFAULT_CHECKPOINT_FILE = "data/consumer_checkpoints.db"
+DEFAULT_CHECKPOINT_SECONDS = 10.0
+
+#####################################
+# Getter Functions for .env Variables
+#####################################
+
+def get_checkpoint_file() -> str:
+    """Fetch the consumer checkpoint database path (empty disables checkpoints)."""
+    checkpoint_file = os.getenv("CHECKPOINT_FILE", DEFAULT_CHECKPOINT_FILE).strip()
+    logger.info(f"Consumer checkpoint file: {checkpoint_file or 'disabled'}")
+    return checkpoint_file
+
+
+def get_checkpoint_seconds() -> float:
+    """Fetch how often (seconds) consumers checkpoint their aggregates and offsets."""
+    checkpoint_seconds = float(os.getenv("CHECKPOINT_SECONDS", DEFAULT_CHECKPOINT_SECONDS))
+    logger.info(f"Consumer checkpoint interval: {checkpoint_seconds} seconds")
+    return checkpoint_seconds
+
+#####################################
+# Checkpoint Store
+#####################################
+
+class CheckpointStore:
+    """SQLite table of (group, topic, partition) -> next offset and state payload."""
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # WAL lets several worker processes share one checkpoint file
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                group_id TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                partition INTEGER NOT NULL,
+                next_offset INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (group_id, topic, partition)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def load(self, group_id: str, topic: str) -> dict:
+        """
+        Return the saved checkpoints for a consumer group and topic.
+
+        Returns:
+            dict: partition -> (next_offset, state payload dict)
+        """
+        rows = self._conn.execute(
+            "SELECT partition, next_offset, state FROM checkpoints WHERE group_id = ? AND topic = ?",
+            (group_id, topic),
+        )
+        return {partition: (next_offset, json.loads(state)) for partition, next_offset, state in rows}
+
+    def save(self, group_id: str, topic: str, entries: dict) -> None:
+        """
+        Save checkpoints for several partitions in one transaction.
+
+        Args:
+            entries (dict): partition -> (next_offset, state payload dict)
+        """
+        updated_at = datetime.now().isoformat(timespec="seconds")
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (group_id, topic, partition, next_offset, json.dumps(state, separators=(",", ":")), updated_at)
+                    for partition, (next_offset, state) in entries.items()
+                ],
+            )
+
+    def delete_topic(self, topic: str) -> int:
+        """
+        Remove the checkpoints of every consumer group for a topic.
+
+        Returns:
+            int: Number of partition checkpoints removed.
+        """
+        with self._conn:
+            return self._conn.execute("DELETE FROM checkpoints WHERE topic = ?", (topic,)).rowcount
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def forget_topic_checkpoints(topic: str, checkpoint_file=None) -> int:
+    """
+    Drop every saved checkpoint for a topic whose offsets were reset (e.g. re-created).
+
+    Args:
+        topic (str): Topic name.
+        checkpoint_file (optional): Checkpoint database. Defaults to CHECKPOINT_FILE.
+
+    Returns:
+        int: Number of partition checkpoints removed (0 if checkpoints are disabled).
+    """
+    checkpoint_file = get_checkpoint_file() if checkpoint_file is None else checkpoint_file
+    if not checkpoint_file or not pathlib.Path(checkpoint_file).exists():
+        return 0
+    store = CheckpointStore(checkpoint_file)
+    try:
+        removed = store.delete_topic(topic)
+    finally:
+        store.close()
+    if removed:
+        logger.info(f"Removed {removed} consumer checkpoints for re-created topic '{topic}'.")
+    return removed
+
+#####################################
+# Feedback Checkpointer
+#####################################
+
+class FeedbackCheckpointer:
+    """
+    Checkpoint a consumer's per-partition FeedbackState together with its offsets.
+
+    `states` is the consumer's own partition -> FeedbackState dict; restored
+    partitions are written into it, and revoked partitions are saved and
+    removed from it so their new owner continues from the checkpoint.
+
+    `before_save` (e.g. `producer.flush`) runs before every save, including
+    the one on a rebalance, so output derived from the checkpointed messages
+    is durable before their offsets are.
+    """
+
+    def __init__(self, store: CheckpointStore, group_id: str, topic: str, states: dict,
+                 interval_seconds: float = DEFAULT_CHECKPOINT_SECONDS, before_save=None):
+        self.store = store
+        self.before_save = before_save
+        self.group_id = group_id
+        self.topic = topic
+        self.states = states
+        self.interval_seconds = interval_seconds
+        self.consumer = None
+        self.offsets: dict = {}  # partition -> next offset to process
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def attach(self, consumer) -> None:
+        """Subscribe the consumer to the topic with a listener that restores and saves checkpoints."""
+        self.consumer = consumer
+        consumer.subscribe([self.topic], listener=_CheckpointListener(self))
+
+    def advance(self, partition: int, offset: int) -> None:
+        """Record that the message at `offset` has been processed."""
+        self.offsets[partition] = offset + 1
+        self._dirty = True
+
+    def due(self) -> bool:
+        """True when there is unsaved progress and the checkpoint interval has passed."""
+        return self._dirty and time.monotonic() - self._last_save >= self.interval_seconds
+
+    def has_checkpoints(self) -> bool:
+        """True if any partition of this group and topic has a saved checkpoint."""
+        return bool(self.store.load(self.group_id, self.topic))
+
+    def restore(self, partitions) -> int:
+        """
+        Load saved state for newly assigned partitions and seek to their saved offsets.
+
+        Returns:
+            int: Number of partitions restored.
+        """
+        saved = self.store.load(self.group_id, self.topic)
+        restored = 0
+        for tp in partitions:
+            checkpoint = saved.get(tp.partition)
+            if checkpoint is None:
+                continue
+            next_offset, state = checkpoint
+            self.states[tp.partition] = FeedbackState.from_dict(state)
+            self.offsets[tp.partition] = next_offset
+            if self.consumer is not None:
+                self.consumer.seek(tp, next_offset)
+            restored += 1
+            logger.info(f"♻️ Restored {self.topic}[{tp.partition}] from checkpoint at offset {next_offset}.")
+        return restored
+
+    def save(self, partitions=None) -> int:
+        """
+        Save state and offsets (all tracked partitions by default), then commit the offsets to Kafka.
+
+        Returns:
+            int: Number of partitions saved.
+        """
+        targets = self.offsets.keys() if partitions is None else [p for p in partitions if p in self.offsets]
+        entries = {
+            partition: (self.offsets[partition], self.states.get(partition, FeedbackState()).to_dict())
+            for partition in targets
+        }
+        if entries:
+            if self.before_save is not None:
+                self.before_save()
+            self.store.save(self.group_id, self.topic, entries)
+            self._commit(entries)
+        if partitions is None:
+            self._dirty = False
+            self._last_save = time.monotonic()
+        return len(entries)
+
+    def _commit(self, entries: dict) -> None:
+        """Commit the checkpointed offsets to Kafka (best effort; the checkpoint is authoritative)."""
+        if self.consumer is None:
+            return
+        offsets = {
+            TopicPartition(self.topic, partition): OffsetAndMetadata(next_offset, "", -1)
+            for partition, (next_offset, _) in entries.items()
+        }
+        try:
+            self.consumer.commit(offsets)
+        except Exception as e:
+            logger.warning(f"Could not commit checkpointed offsets to Kafka: {e}")
+
+    def release(self, partitions) -> None:
+        """Save revoked partitions and drop their state from this consumer."""
+        numbers = [tp.partition for tp in partitions]
+        self.save(numbers)
+        for partition in numbers:
+            self.states.pop(partition, None)
+            self.offsets.pop(partition, None)
+
+
+class _CheckpointListener(ConsumerRebalanceListener):
+    """Rebalance listener that hands partitions over through the checkpoint store."""
+
+    def __init__(self, checkpointer: FeedbackCheckpointer):
+        self.checkpointer = checkpointer
+
+    def on_partitions_revoked(self, revoked):
+        if revoked:
+            self.checkpointer.release(revoked)
+
+    def on_partitions_assigned(self, assigned):
+        if assigned:
+            self.checkpointer.restore(assigned)
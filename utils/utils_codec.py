@@ -0,0 +1,268 @@
+"""
+utils_codec.py - JSON codecs for Kafka message values.
+
+Producers and consumers exchange JSON. Instead of each script passing its own
+`lambda x: json.dumps(x).encode("utf-8")` / `json.loads(x.decode("utf-8"))`,
+they ask create_kafka_producer / create_kafka_consumer for a codec:
+
+    producer = create_kafka_producer(codec=get_json_codec())
+    consumer = create_kafka_consumer(topic, group_id, codec=get_json_codec())
+
+Every backend writes the same compact UTF-8 JSON and takes the raw message
+`bytes`, so each message is decoded exactly once. orjson and msgspec parse
+the bytes directly with no intermediate `str`:
+
+- json     Python standard library (always available; decodes UTF-8 internally)
+- orjson   pip install orjson
+- msgspec  pip install msgspec
+- auto     the fastest installed backend (msgspec, then orjson, then json)
+
+Pick one with KAFKA_JSON_CODEC in .env. Compare them on rafting records:
+    python -m utils.utils_codec --benchmark 100000
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import argparse
+import json
+import os
+import pathlib
+import time
+
+from dotenv import load_dotenv
+
+from utils.utils_logger import logger
+
+#####################################
+# Load Environment Variables
+#####################################
+
+load_dotenv()
+
+#####################################
+# Default Configurations
+#####################################
+
+DEFAULT_JSON_CODEC = "auto"
+AUTO_ORDER = ("msgspec", "orjson", "json")
+
+#####################################
+# Codec
+#####################################
+
+class Codec:
+    """A named pair of functions: encode(value) -> bytes and decode(bytes) -> value."""
+
+    def __init__(self, name: str, encode, decode, errors: tuple = (ValueError,)):
+        """
+        Args:
+            name (str): Registry name.
+            encode (callable): Serialize one value to bytes.
+            decode (callable): Parse bytes (or str) into a value.
+            errors (tuple): Exception types `decode` raises for malformed input.
+        """
+        self.name = name
+        self.encode = encode
+        self.decode = decode
+        self.errors = errors
+
+    def __repr__(self) -> str:
+        return f"Codec({self.name!r})"
+
+#####################################
+# Backends
+#####################################
+
+def _stdlib_codec() -> Codec:
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    decoder = json.JSONDecoder()
+
+    def decode(data):
+        # The C scanner only reads str; skip json.loads' encoding detection
+        if isinstance(data, (bytes, bytearray)):
+            data = data.decode("utf-8")
+        return decoder.decode(data)
+
+    return Codec("json", lambda value: encoder.encode(value).encode("utf-8"), decode)
+
+
+def _orjson_codec() -> Codec:
+    import orjson
+    return Codec("orjson", orjson.dumps, orjson.loads, errors=(orjson.JSONDecodeError,))
+
+
+def _msgspec_codec() -> Codec:
+    import msgspec
+    return Codec(
+        "msgspec",
+        msgspec.json.Encoder().encode,
+        msgspec.json.Decoder().decode,
+        errors=(msgspec.DecodeError,),
+    )
+
+
+# Name -> factory; factories import their package on first use
+_FACTORIES = {
+    "json": _stdlib_codec,
+    "orjson": _orjson_codec,
+    "msgspec": _msgspec_codec,
+}
+_codecs: dict = {}
+
+
+def register_codec(name: str, factory) -> None:
+    """
+    Add (or replace) a codec backend.
+
+    Args:
+        name (str): Registry name, as used in KAFKA_JSON_CODEC.
+        factory (callable): Returns a Codec; raises ImportError if unavailable.
+    """
+    name = name.strip().lower()
+    _FACTORIES[name] = factory
+    _codecs.pop(name, None)
+
+
+def available_codecs() -> list:
+    """Return the names of the registered backends that can be imported here."""
+    names = []
+    for name in _FACTORIES:
+        try:
+            get_codec(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_codec(name: str = DEFAULT_JSON_CODEC) -> Codec:
+    """
+    Return a codec by name ("json", "orjson", "msgspec", or "auto").
+
+    Raises:
+        ValueError: Unknown name.
+        ImportError: The backend's package is not installed.
+    """
+    name = (name or DEFAULT_JSON_CODEC).strip().lower()
+    if name == "auto":
+        for candidate in AUTO_ORDER:
+            try:
+                return get_codec(candidate)
+            except ImportError:
+                continue
+    codec = _codecs.get(name)
+    if codec is None:
+        factory = _FACTORIES.get(name)
+        if factory is None:
+            raise ValueError(f"Unknown JSON codec '{name}'. Choose from: auto, {', '.join(_FACTORIES)}")
+        try:
+            codec = _codecs[name] = factory()
+        except ImportError as e:
+            raise ImportError(f"JSON codec '{name}' requires its package: pip install {name}") from e
+    return codec
+
+
+def resolve_codec(codec) -> Codec:
+    """Accept a Codec or a registry name and return the Codec."""
+    return codec if isinstance(codec, Codec) else get_codec(codec)
+
+#####################################
+# Getter Functions for .env Variables
+#####################################
+
+def get_json_codec() -> Codec:
+    """Fetch the JSON codec for message values from environment or use default."""
+    name = os.getenv("KAFKA_JSON_CODEC", DEFAULT_JSON_CODEC).strip().lower() or DEFAULT_JSON_CODEC
+    try:
+        codec = get_codec(name)
+    except ImportError as e:
+        logger.warning(f"{e}; falling back to the standard library codec.")
+        codec = get_codec("json")
+    logger.info(f"JSON codec: {codec.name}" + (" (auto)" if name == "auto" else ""))
+    return codec
+
+#####################################
+# Benchmark
+#####################################
+
+SAMPLE_FILE = pathlib.Path(__file__).parent.parent.joinpath("data", "all_rafting_remarks.json")
+
+# Fields csv_rafting_consumer adds before publishing to rafting_csv_feedback
+ENRICHED_FIELDS = {
+    "weather": "Sunny",
+    "temperature": 84,
+    "wind_speed": 6,
+    "rainfall": 0.1,
+    "river_flow": 1450,
+    "water_level": 3.2,
+    "water_temperature": 61,
+}
+
+
+def sample_records(count: int, enriched: bool = False) -> list:
+    """Return `count` rafting feedback records, cycling through data/all_rafting_remarks.json."""
+    with open(SAMPLE_FILE, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    if enriched:
+        base = [{**record, **ENRICHED_FIELDS} for record in base]
+    return [base[i % len(base)] for i in range(count)]
+
+
+def time_per_message(func, items: list) -> float:
+    """Return the mean microseconds `func` takes per item."""
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def benchmark(count: int, enriched: bool = False) -> dict:
+    """
+    Time encode and decode per message for every available backend.
+
+    The "legacy" row is the lambdas the scripts used before: json.dumps
+    plus .encode, and .decode to str plus json.loads (also rafting_consumer's
+    old path, which decoded to str in the consumer and parsed the JSON again
+    inside process_message).
+    """
+    records = sample_records(count, enriched)
+    payloads = [json.dumps(record).encode("utf-8") for record in records]
+
+    results = {
+        "legacy": {
+            "encode_us": time_per_message(lambda x: json.dumps(x).encode("utf-8"), records),
+            "decode_us": time_per_message(lambda x: json.loads(x.decode("utf-8")), payloads),
+        },
+    }
+    for name in available_codecs():
+        codec = get_codec(name)
+        encoded = [codec.encode(record) for record in records]
+        assert codec.decode(encoded[0]) == records[0]
+        results[name] = {
+            "encode_us": time_per_message(codec.encode, records),
+            "decode_us": time_per_message(codec.decode, payloads),
+            "bytes": round(sum(map(len, encoded)) / len(encoded), 1),
+        }
+
+    legacy_total = results["legacy"]["encode_us"] + results["legacy"]["decode_us"]
+    for name, row in results.items():
+        row["speedup"] = round(legacy_total / (row["encode_us"] + row["decode_us"]), 2)
+        row["encode_us"] = round(row["encode_us"], 3)
+        row["decode_us"] = round(row["decode_us"], 3)
+    return {"messages": count, "enriched": enriched, "codecs": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the JSON codecs on rafting records.")
+    parser.add_argument("--benchmark", type=int, default=100_000, metavar="MESSAGES",
+                        help="Messages to encode and decode per backend (default: 100,000).")
+    parser.add_argument("--enriched", action="store_true",
+                        help="Use records with the weather and river fields added by csv_rafting_consumer.")
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.benchmark, args.enriched), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,8 @@ from kafka import KafkaConsumer
 
 # Import functions from local modules
 from utils.utils_logger import logger
+from utils.utils_transport import MemoryConsumer, is_memory_transport
+from utils.utils_wire import WireDeserializer
 from .utils_producer import get_kafka_broker_address
 
 
@@ -26,17 +28,30 @@ def create_kafka_consumer(
     topic_provided: str = None,
     group_id_provided: str = None,
     value_deserializer_provided=None,
+    enable_auto_commit: bool = True,
+    codec=None,
+    skip_invalid: bool = False,
 ):
     """
     Create and return a Kafka consumer instance.
 
     Args:
-        topic_provided (str): The Kafka topic to subscribe to. Defaults to the environment variable or default.
+        topic_provided (str): The Kafka topic to subscribe to. If None, the caller
+                              subscribes later (e.g. with a rebalance listener).
         group_id_provided (str): The consumer group ID. Defaults to the environment variable or default.
         value_deserializer_provided (callable, optional): Function to deserialize message values.
+        enable_auto_commit (bool): Commit offsets automatically in the background.
+        codec (Codec or str, optional): JSON codec for message values, e.g.
+                                        get_json_codec() or "orjson" (see utils_codec).
+                                        Used when no deserializer is provided; binary
+                                        messages (see utils_wire) are read too, by their
+                                        content-type header.
+        skip_invalid (bool): With a codec, log malformed messages and deliver
+                             their value as None instead of raising.
 
     Returns:
-        KafkaConsumer: Configured Kafka consumer instance.
+        KafkaConsumer: Configured Kafka consumer instance (a MemoryConsumer
+                       when KAFKA_TRANSPORT=memory).
     """
     kafka_broker = get_kafka_broker_address()
     topic = topic_provided
@@ -46,15 +61,21 @@ def create_kafka_consumer(
     )
     logger.debug(f"Kafka broker: {kafka_broker}")
 
+    value_deserializer = value_deserializer_provided
+    if value_deserializer is None and codec is not None:
+        value_deserializer = WireDeserializer(codec, skip_invalid)
+
     try:
-        consumer = KafkaConsumer(
-            topic,
+        topics = (topic,) if topic else ()
+        consumer_class = MemoryConsumer if is_memory_transport() else KafkaConsumer
+        consumer = consumer_class(
+            *topics,
             group_id=consumer_group_id,
-            value_deserializer=value_deserializer_provided
+            value_deserializer=value_deserializer
             or (lambda x: x.decode("utf-8")),
             bootstrap_servers=kafka_broker,
             auto_offset_reset="earliest",
-            enable_auto_commit=True,
+            enable_auto_commit=enable_auto_commit,
         )
         logger.info("Kafka consumer created successfully.")
         return consumer
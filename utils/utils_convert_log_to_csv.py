@@ -1,85 +1,501 @@
-import os
-import re
+"""
+utils_convert_log_to_csv.py - build data/rafting_feedback.csv from the logs.
+
+Reads the structured event stream (logs/rafting_events.jsonl) written by
+utils_logger.log_event(): every "processed" event from the rafting consumer
+already carries the feedback record together with the weather and river
+conditions it was enriched with, so each event becomes one CSV row.
+
+If there is no event stream (logs written before it existed), the text log
+is parsed with the original patterns instead; the latest weather and river
+lines are carried forward onto each sent record.
+
+Large inputs are split into byte ranges aligned on line boundaries and
+converted by a process pool; rows are written out in file order as each
+chunk finishes, so memory stays bounded by the chunks in flight. Rotated
+(`<name>.1`, `<name>.<date>.log`) and gzip-compressed (`.gz`) siblings of the
+log are converted too, oldest first. Compressed files cannot be split by
+byte range, so they are decompressed as a stream and parsed in chunks of
+about the same size in the main process, never held in memory whole.
+
+With --incremental (or LOG_CONVERT_INCREMENTAL=true), the byte offset and
+inode reached in the active log are saved to data/log_to_csv_state.json and
+the next run appends only the rows logged since then. If the log was
+rotated in between, the rest of the rotated file (found by its inode, or the
+newest compressed sibling) and any newer files are converted first. The
+first run, a truncated log, or a switch between event stream and text log
+falls back to a full conversion.
+
+Usage:
+    python -m utils.utils_convert_log_to_csv [--workers N] [--chunk-mb MB] [--incremental]
+"""
+
+import argparse
+import ast
 import csv
+import gzip
+import hashlib
 import json
-from datetime import datetime
+import os
+import pathlib
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from dotenv import load_dotenv
+
+load_dotenv()
 
 # Path to the log file
 LOG_FILE_PATH = "logs/rafting_project_log.log"
+EVENTS_FILE_PATH = "logs/rafting_events.jsonl"
 CSV_OUTPUT_PATH = "data/rafting_feedback.csv"
+STATE_FILE_PATH = "data/log_to_csv_state.json"
 
 # Define CSV columns
-CSV_COLUMNS = ["timestamp", "date", "guide", "comment", "trip_type", "is_negative", 
-               "weather", "temperature", "wind_speed", "rainfall", 
+CSV_COLUMNS = ["timestamp", "date", "guide", "comment", "trip_type", "is_negative",
+               "weather", "temperature", "wind_speed", "rainfall",
                "river_flow", "water_level", "water_temperature"]
 
-def extract_json_from_log(log_line):
-    """Extract JSON data from a log line using regex."""
-    match = re.search(r"Sent message to Kafka: ({.*})", log_line)
-    if match:
-        return json.loads(match.group(1))
-    return None
-
-def extract_weather_from_log(log_line):
-    """Extract weather-related data from log entries."""
-    match = re.search(r"🌤 (.*?) \| 🌡 (\d+)°F \| 💨 Wind (\d+) mph \| 🌧 (.*?) inches rain", log_line)
-    if match:
-        return {
-            "weather": match.group(1),
-            "temperature": int(match.group(2)),
-            "wind_speed": int(match.group(3)),
-            "rainfall": float(match.group(4))
-        }
-    return None
-
-def extract_river_data_from_log(log_line):
-    """Extract river conditions from log entries."""
-    match = re.search(r"Flow (\d+) cfs \| 📏 Water Level (.*?) ft \| 🌡 Water Temp (\d+)°F", log_line)
-    if match:
-        return {
-            "river_flow": int(match.group(1)),
-            "water_level": float(match.group(2)),
-            "water_temperature": int(match.group(3))
-        }
-    return None
-
-def convert_log_to_csv():
-    """Read JSON messages from log, extract data, and write to CSV."""
-    data_records = []
-    current_weather = {}
-    current_river_data = {}
-
-    with open(LOG_FILE_PATH, "r", encoding="utf-8") as log_file:
-        for line in log_file:
-            json_data = extract_json_from_log(line)
-            if json_data:
-                record = {
-                    "timestamp": json_data.get("timestamp"),
-                    "date": json_data.get("date"),
-                    "guide": json_data.get("guide"),
-                    "comment": json_data.get("comment"),
-                    "trip_type": json_data.get("trip_type"),
-                    "is_negative": json_data.get("is_negative"),
-                    **current_weather,  # Add latest weather data
-                    **current_river_data  # Add latest river data
-                }
-                data_records.append(record)
-            
-            weather_data = extract_weather_from_log(line)
-            if weather_data:
-                current_weather = weather_data
-            
-            river_data = extract_river_data_from_log(line)
-            if river_data:
-                current_river_data = river_data
-
-    # Write extracted data to CSV
-    with open(CSV_OUTPUT_PATH, "w", newline="", encoding="utf-8") as csv_file:
-        writer = csv.DictWriter(csv_file, fieldnames=CSV_COLUMNS)
-        writer.writeheader()
-        writer.writerows(data_records)
-
-    print(f"✅ Converted log file to CSV: {CSV_OUTPUT_PATH}")
+DEFAULT_CHUNK_MB = 32
+FINGERPRINT_BYTES = 256
+
+# Text log patterns, compiled once per process
+SENT_PATTERN = re.compile(r"Sent message to Kafka: ({.*})")
+WEATHER_PATTERN = re.compile(r"🌤 (.*?) \| 🌡 (\d+)°F \| 💨 Wind (\d+) mph \| 🌧 (.*?) inches rain")
+RIVER_PATTERN = re.compile(r"Flow (\d+) cfs \| 📏 Water Level (.*?) ft \| 🌡 Water Temp (\d+)°F")
+
+NO_WEATHER = ("", "", "", "")
+NO_RIVER = ("", "", "")
+
+
+def get_convert_workers() -> int:
+    """Fetch the number of converter processes (LOG_CONVERT_WORKERS, default: CPU count)."""
+    return int(os.getenv("LOG_CONVERT_WORKERS", 0)) or os.cpu_count() or 1
+
+
+def get_convert_chunk_mb() -> float:
+    """Fetch the target chunk size in MB (LOG_CONVERT_CHUNK_MB)."""
+    return float(os.getenv("LOG_CONVERT_CHUNK_MB", DEFAULT_CHUNK_MB))
+
+
+def get_convert_incremental() -> bool:
+    """Fetch whether to append only new log lines (LOG_CONVERT_INCREMENTAL)."""
+    return os.getenv("LOG_CONVERT_INCREMENTAL", "false").strip().lower() in ("1", "true", "yes")
+
+#####################################
+# Input Files and Chunks
+#####################################
+
+def find_log_inputs(path) -> list:
+    """
+    Return the rotated/compressed siblings of a log file, oldest first, then the file itself.
+
+    Siblings are files in the same folder whose names start with the log's
+    stem (e.g. rafting_project_log.log.1, rafting_project_log.2025-02-03_05-06-08.log.gz).
+    """
+    path = pathlib.Path(path)
+    if not path.parent.exists():
+        return []
+    rotated = [
+        sibling for sibling in path.parent.glob(f"{path.stem}*")
+        if sibling != path and sibling.is_file() and not sibling.name.endswith((".json", ".tmp"))
+    ]
+    rotated.sort(key=lambda sibling: sibling.stat().st_mtime)
+    return rotated + ([path] if path.exists() else [])
+
+
+def complete_size(path) -> int:
+    """Return the offset just past the last newline, so a line still being written is left for later."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        position = size
+        while position > 0:
+            step = min(65536, position)
+            f.seek(position - step)
+            block = f.read(step)
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                return position - step + newline + 1
+            position -= step
+    return 0
+
+
+def split_ranges(path, chunk_bytes: int, start: int = 0, end: int = None) -> list:
+    """
+    Split a file into (start, end) byte ranges that begin and end on line boundaries.
+
+    Args:
+        path: File to split.
+        chunk_bytes (int): Target size of each range.
+        start (int): Offset to start from (must be at a line boundary).
+        end (int, optional): Offset to stop at (must be at a line boundary). Defaults to the file size.
+    """
+    size = os.path.getsize(path) if end is None else end
+    ranges = []
+    with open(path, "rb") as f:
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            if end < size:
+                f.seek(end)
+                f.readline()  # Move to the end of the line the cut landed in
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def chunk_tasks(kind: str, inputs, chunk_bytes: int) -> list:
+    """
+    Build (kind, path, start, end) tasks from (path, start, end) inputs.
+
+    Compressed files are one task each (end=None), streamed from the
+    uncompressed offset `start`; `end=None` in an input means the file size.
+    """
+    tasks = []
+    for path, start, end in inputs:
+        if str(path).endswith(".gz"):
+            tasks.append((kind, str(path), start, None))
+        else:
+            tasks.extend((kind, str(path), a, b) for a, b in split_ranges(path, chunk_bytes, start, end))
+    return tasks
+
+
+def read_lines(path: str, start: int, end: int) -> list:
+    """Read the lines in [start, end) of an uncompressed file."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return data.decode("utf-8", errors="replace").split("\n")
+
+
+def iter_compressed_lines(path: str, start: int, chunk_bytes: int):
+    """Yield lists of lines from a gzip file, from uncompressed offset `start`, about `chunk_bytes` at a time."""
+    with gzip.open(path, "rb") as f:
+        f.seek(start)
+        lines = []
+        size = 0
+        for raw in f:
+            lines.append(raw.decode("utf-8", errors="replace").rstrip("\n"))
+            size += len(raw)
+            if size >= chunk_bytes:
+                yield lines
+                lines = []
+                size = 0
+        if lines:
+            yield lines
+
+#####################################
+# Chunk Parsers
+#####################################
+
+def parse_event_lines(lines) -> list:
+    """Return CSV rows for the "processed" events among JSONL lines."""
+    rows = []
+    for line in lines:
+        if '"processed"' not in line:
+            continue  # Cheap pre-check before decoding
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue  # e.g. a partially written last line
+        if event.get("event") == "processed":
+            rows.append([event.get(column, "") for column in CSV_COLUMNS])
+    return rows
+
+
+def parse_sent_record(text: str):
+    """Parse a logged message: JSON, or the Python dict repr the producers log."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        try:
+            return ast.literal_eval(text)
+        except (ValueError, SyntaxError):
+            return None
+
+
+def parse_text_lines(lines, weather=None, river=None) -> tuple:
+    """
+    Parse text log lines into CSV rows, carrying the latest weather and river values.
+
+    Args:
+        lines: Text log lines.
+        weather (tuple, optional): Weather values carried in from earlier lines.
+        river (tuple, optional): River values carried in from earlier lines.
+
+    Returns:
+        tuple: (rows, weather_head, river_head, weather, river) where the first
+        `weather_head` / `river_head` rows saw no weather / river line in these
+        lines (None when the carried values were given, so nothing is missing),
+        and `weather` / `river` are the latest values at the end (None if none seen).
+    """
+    rows = []
+    weather_head = None if weather is not None else 0
+    river_head = None if river is not None else 0
+    for line in lines:
+        if "Sent message to Kafka" in line:
+            match = SENT_PATTERN.search(line)
+            record = parse_sent_record(match.group(1)) if match else None
+            if record:
+                rows.append([
+                    record.get("timestamp"), record.get("date"), record.get("guide"),
+                    record.get("comment"), record.get("trip_type"), record.get("is_negative"),
+                    *(weather or NO_WEATHER), *(river or NO_RIVER),
+                ])
+                if weather is None:
+                    weather_head += 1
+                if river is None:
+                    river_head += 1
+        elif "🌤" in line:
+            match = WEATHER_PATTERN.search(line)
+            if match:
+                weather = (match.group(1), int(match.group(2)), int(match.group(3)), float(match.group(4)))
+        elif "cfs" in line:
+            match = RIVER_PATTERN.search(line)
+            if match:
+                river = (int(match.group(1)), float(match.group(2)), int(match.group(3)))
+    return rows, weather_head, river_head, weather, river
+
+
+def parse_lines(kind: str, lines) -> tuple:
+    """Parse a chunk of lines; returns the parse_text_lines() tuple shape for both kinds."""
+    if kind == "events":
+        return parse_event_lines(lines), None, None, None, None
+    return parse_text_lines(lines)
+
+
+def convert_chunk(task) -> tuple:
+    """Worker: read and parse one byte-range chunk task."""
+    kind, path, start, end = task
+    return parse_lines(kind, read_lines(path, start, end))
+
+
+def chunk_results(tasks, pool, chunk_bytes: int):
+    """
+    Yield parse results for every task in order.
+
+    Runs of byte-range tasks go to the pool (or run inline without one);
+    compressed files are streamed here, one chunk of lines at a time.
+    """
+    i = 0
+    while i < len(tasks):
+        kind, path, start, end = tasks[i]
+        if end is None:
+            for lines in iter_compressed_lines(path, start, chunk_bytes):
+                yield parse_lines(kind, lines)
+            i += 1
+            continue
+        j = i
+        while j < len(tasks) and tasks[j][3] is not None:
+            j += 1
+        yield from (pool.map(convert_chunk, tasks[i:j]) if pool else map(convert_chunk, tasks[i:j]))
+        i = j
+
+
+def stitch_chunk(result, weather, river) -> tuple:
+    """
+    Fill the leading rows of a text chunk with the values carried from earlier chunks.
+
+    Returns:
+        tuple: (rows, weather, river) with the values to carry into the next chunk.
+    """
+    rows, weather_head, river_head, chunk_weather, chunk_river = result
+    if weather_head:
+        for row in rows[:weather_head]:
+            row[6:10] = weather or NO_WEATHER
+    if river_head:
+        for row in rows[:river_head]:
+            row[10:13] = river or NO_RIVER
+    return rows, chunk_weather or weather, chunk_river or river
+
+#####################################
+# Conversion
+#####################################
+
+def write_rows(kind: str, inputs, csv_path, workers: int = None, chunk_mb: float = DEFAULT_CHUNK_MB,
+               append: bool = False, weather=None, river=None) -> tuple:
+    """
+    Convert (path, start, end) input ranges, chunked and in parallel, writing rows in file order.
+
+    Args:
+        kind (str): "events" (JSONL event stream) or "text" (text log).
+        inputs (list): (path, start, end) ranges, oldest first.
+        csv_path: Output CSV file.
+        workers (int, optional): Worker processes. Defaults to the CPU count.
+        chunk_mb (float): Target chunk size in MB.
+        append (bool): Append to the CSV instead of overwriting it (and skip the header).
+        weather, river (tuple, optional): Text log values carried in from an earlier run.
+
+    Returns:
+        tuple: (rows written, latest weather, latest river)
+    """
+    chunk_bytes = max(1, int(chunk_mb * 1024 * 1024))
+    tasks = chunk_tasks(kind, inputs, chunk_bytes)
+    workers = max(1, min(int(workers or os.cpu_count() or 1), len(tasks) or 1))
+
+    pathlib.Path(csv_path).parent.mkdir(parents=True, exist_ok=True)
+    rows_written = 0
+    with open(csv_path, "a" if append else "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.writer(csv_file)
+        if not append:
+            writer.writerow(CSV_COLUMNS)
+
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            for result in chunk_results(tasks, pool, chunk_bytes):
+                rows, weather, river = stitch_chunk(result, weather, river)
+                writer.writerows(rows)
+                rows_written += len(rows)
+        finally:
+            if pool:
+                pool.shutdown()
+    return rows_written, weather, river
+
+
+def convert_files(kind: str, paths, csv_path=CSV_OUTPUT_PATH, workers: int = None,
+                  chunk_mb: float = DEFAULT_CHUNK_MB) -> int:
+    """
+    Convert whole log files to CSV (overwritten), chunked and in parallel.
+
+    Returns:
+        int: Number of rows written.
+    """
+    rows, _, _ = write_rows(kind, [(path, 0, None) for path in paths], csv_path, workers, chunk_mb)
+    return rows
+
+#####################################
+# Incremental Conversion
+#####################################
+
+def load_state(path=STATE_FILE_PATH) -> dict:
+    """Load the saved conversion state, or {} if there is none."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_state(state: dict, path=STATE_FILE_PATH) -> None:
+    """Save the conversion state atomically."""
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def fingerprint(path, length: int = FINGERPRINT_BYTES) -> str:
+    """Hash the first `length` bytes of a (possibly compressed) file, to recognise it after rotation."""
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rb") as f:
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+
+def plan_incremental(kind: str, log_path, state: dict, csv_path=CSV_OUTPUT_PATH):
+    """
+    Work out which byte ranges are new since the saved state.
+
+    Returns:
+        list | None: (path, start, end) inputs, oldest first, or None when a
+        full conversion is needed.
+    """
+    log_path = pathlib.Path(log_path)
+    if ("fingerprint" not in state or state.get("kind") != kind or state.get("path") != str(log_path)
+            or not pathlib.Path(csv_path).exists() or not log_path.exists()):
+        return None
+
+    inputs = []
+    resumed = False
+    for path in find_log_inputs(log_path):
+        stat = path.stat()
+        compressed = path.name.endswith(".gz")
+        if resumed and stat.st_mtime <= state["mtime"]:
+            continue
+        # The file we stopped in: still active, rotated by rename (same inode), or rotated and
+        # compressed (new inode); the fingerprint guards against a reused inode
+        same_file = (compressed or stat.st_ino == state["inode"]) and \
+            fingerprint(path, state["fingerprint_bytes"]) == state["fingerprint"]
+        if not resumed and same_file:
+            if not compressed and stat.st_size < state["offset"]:
+                return None  # Truncated; the saved offset means nothing any more
+            inputs.append((path, state["offset"], None if compressed else complete_size(path)))
+            resumed = True
+        elif stat.st_mtime > state["mtime"]:
+            # Written since the last run
+            inputs.append((path, 0, None if compressed else complete_size(path)))
+
+    return inputs if resumed else None
+
+
+def convert_incremental(kind: str, log_path, csv_path=CSV_OUTPUT_PATH, state_path=STATE_FILE_PATH,
+                        workers: int = None, chunk_mb: float = DEFAULT_CHUNK_MB) -> int:
+    """
+    Append the rows logged since the last run, or convert everything on the first run.
+
+    Returns:
+        int: Number of rows written.
+    """
+    log_path = pathlib.Path(log_path)
+    state = load_state(state_path)
+    inputs = plan_incremental(kind, log_path, state, csv_path)
+    append = inputs is not None
+    if not append:
+        inputs = [(path, 0, None if path.name.endswith(".gz") else complete_size(path))
+                  for path in find_log_inputs(log_path)]
+        state = {}
+
+    weather = tuple(state["weather"]) if state.get("weather") else None
+    river = tuple(state["river"]) if state.get("river") else None
+    rows, weather, river = write_rows(kind, inputs, csv_path, workers, chunk_mb, append, weather, river)
+
+    if log_path.exists():
+        stat = log_path.stat()
+        # Stop at the end of the last complete line converted from the active file
+        offset = next((end for path, _, end in reversed(inputs) if path == log_path), state.get("offset", 0))
+        fingerprint_bytes = min(offset, FINGERPRINT_BYTES)
+        save_state({
+            "kind": kind,
+            "path": str(log_path),
+            "inode": stat.st_ino,
+            "offset": offset,
+            "mtime": stat.st_mtime,
+            "fingerprint": fingerprint(log_path, fingerprint_bytes),
+            "fingerprint_bytes": fingerprint_bytes,
+            "weather": weather,
+            "river": river,
+        }, state_path)
+    return rows
+
+
+def convert_log_to_csv(workers: int = None, chunk_mb: float = DEFAULT_CHUNK_MB, incremental: bool = False) -> int:
+    """Convert the event stream (or, without one, the text log) and its rotated files to CSV."""
+    event_inputs = find_log_inputs(EVENTS_FILE_PATH)
+    kind, log_path, inputs = ("events", EVENTS_FILE_PATH, event_inputs) if event_inputs \
+        else ("text", LOG_FILE_PATH, find_log_inputs(LOG_FILE_PATH))
+
+    if incremental:
+        rows = convert_incremental(kind, log_path, CSV_OUTPUT_PATH, STATE_FILE_PATH, workers, chunk_mb)
+        print(f"✅ Added {rows} rows from {log_path} to CSV: {CSV_OUTPUT_PATH}")
+    elif kind == "events":
+        rows = convert_files(kind, inputs, CSV_OUTPUT_PATH, workers, chunk_mb)
+        print(f"✅ Converted {rows} events from {len(inputs)} file(s) to CSV: {CSV_OUTPUT_PATH}")
+    else:
+        rows = convert_files(kind, inputs, CSV_OUTPUT_PATH, workers, chunk_mb)
+        print(f"✅ Converted log file to CSV: {CSV_OUTPUT_PATH} ({rows} rows from {len(inputs)} file(s))")
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert rafting logs to data/rafting_feedback.csv.")
+    parser.add_argument("--workers", type=int, default=get_convert_workers(), help="Worker processes.")
+    parser.add_argument("--chunk-mb", type=float, default=get_convert_chunk_mb(), help="Target chunk size in MB.")
+    parser.add_argument("--incremental", action="store_true", default=get_convert_incremental(),
+                        help="Append only rows logged since the last run.")
+    args = parser.parse_args()
+    convert_log_to_csv(args.workers, args.chunk_mb, args.incremental)
+
 
 if __name__ == "__main__":
-    convert_log_to_csv()
+    main()
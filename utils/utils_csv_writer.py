@@ -0,0 +1,224 @@
+"""
+utils_csv_writer.py - buffered, rolling CSV writer for sink consumers.
+
+Keeps one file handle open for the life of the consumer, buffers rows in
+memory, and writes them in one call when a row-count or time threshold is
+reached (and on close). Each flush is fsync'ed, so the caller can commit
+Kafka offsets right after flush() returns.
+
+The active file can be rotated by size and/or by day. Finished segments are
+renamed to `<stem>.<YYYYMMDD>.<NNNN><suffix>` and listed in a JSON manifest
+next to the active file.
+
+Usage:
+    from utils.utils_csv_writer import RollingCsvWriter
+    writer = RollingCsvWriter("data/rafting_feedback.csv", CSV_COLUMNS)
+    if writer.write(row):      # True when a flush is due
+        writer.flush()
+        consumer.commit()
+    writer.close()
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import csv
+import io
+import json
+import os
+import pathlib
+import re
+import time
+from datetime import date, datetime
+
+from utils.utils_logger import logger
+
+#####################################
+# Default Configurations
+#####################################
+
+DEFAULT_FLUSH_ROWS = 500
+DEFAULT_FLUSH_SECONDS = 2.0
+
+#####################################
+# Rolling CSV Writer
+#####################################
+
+class RollingCsvWriter:
+    """Buffered CSV writer with size/day rotation and a segment manifest."""
+
+    def __init__(
+        self,
+        file_path,
+        fieldnames,
+        flush_rows: int = DEFAULT_FLUSH_ROWS,
+        flush_seconds: float = DEFAULT_FLUSH_SECONDS,
+        max_bytes: int = 0,
+        rotate_daily: bool = False,
+        fsync: bool = True,
+    ):
+        """
+        Args:
+            file_path: Active CSV file (appended to if it already exists).
+            fieldnames (list): Header row, written whenever a new file is started.
+            flush_rows (int): Flush once this many rows are buffered.
+            flush_seconds (float): Flush buffered rows at least this often.
+            max_bytes (int): Rotate once the active file reaches this size (0 = never).
+            rotate_daily (bool): Rotate when the calendar day changes.
+            fsync (bool): fsync after each flush so rows survive a crash.
+        """
+        self.file_path = pathlib.Path(file_path)
+        self.fieldnames = list(fieldnames)
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_seconds = float(flush_seconds)
+        self.max_bytes = int(max_bytes)
+        self.rotate_daily = rotate_daily
+        self.fsync = fsync
+        self.manifest_file = self.file_path.with_name(self.file_path.stem + ".manifest.json")
+
+        self.rows_flushed = 0
+        self._buffer = io.StringIO()
+        self._buffer_writer = csv.writer(self._buffer)
+        self._buffered_rows = 0
+        self._last_flush = time.monotonic()
+        self._file = None
+        self._open()
+
+        # A file left over from a previous day is rotated straight away
+        if self.rotate_daily and self._file_rows is None and self._opened_day != date.today():
+            self._rotate()
+
+    def _open(self) -> None:
+        """Open (or create) the active file and write the header if it is empty."""
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.file_path, mode="a", newline="", encoding="utf-8")
+        self._file_rows = 0
+        if self._file.tell() == 0:
+            csv.writer(self._file).writerow(self.fieldnames)
+            self._file.flush()
+            self._opened_day = date.today()
+        else:
+            self._file_rows = None  # Unknown: rows written before this run
+            self._opened_day = date.fromtimestamp(self.file_path.stat().st_mtime)
+
+    def write(self, row) -> bool:
+        """
+        Buffer one row (a sequence in `fieldnames` order).
+
+        Returns:
+            bool: True if a flush is now due.
+        """
+        self._buffer_writer.writerow(row)
+        self._buffered_rows += 1
+        return self.flush_due()
+
+    def flush_due(self) -> bool:
+        """True when the buffer has reached its row or time threshold."""
+        if self._buffered_rows >= self.flush_rows:
+            return True
+        return self._buffered_rows > 0 and time.monotonic() - self._last_flush >= self.flush_seconds
+
+    def flush(self) -> int:
+        """
+        Write buffered rows to disk durably, then rotate if a limit was reached.
+
+        Returns:
+            int: Number of rows flushed.
+        """
+        flushed = self._buffered_rows
+        if flushed:
+            self._file.write(self._buffer.getvalue())
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._buffer.seek(0)
+            self._buffer.truncate()
+            self._buffered_rows = 0
+            self.rows_flushed += flushed
+            if self._file_rows is not None:
+                self._file_rows += flushed
+        self._last_flush = time.monotonic()
+
+        if self._rotation_due():
+            self._rotate()
+        return flushed
+
+    def _rotation_due(self) -> bool:
+        """True when the active file has reached its size limit or the day changed."""
+        if self._file_rows == 0:
+            return False  # Header only
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            return True
+        return self.rotate_daily and date.today() != self._opened_day
+
+    def _segments_on_disk(self) -> list:
+        """Return (day, sequence, path) for the segment files next to the active file, in order."""
+        pattern = re.compile(
+            rf"{re.escape(self.file_path.stem)}\.(\d{{8}})\.(\d{{4,}}){re.escape(self.file_path.suffix)}"
+        )
+        segments = []
+        for path in self.file_path.parent.glob(f"{self.file_path.stem}.*{self.file_path.suffix}"):
+            match = pattern.fullmatch(path.name)
+            if match:
+                segments.append((match.group(1), int(match.group(2)), path))
+        return sorted(segments)
+
+    def _read_manifest(self) -> dict:
+        """Load the segment manifest, or rebuild it from the segment files on disk."""
+        try:
+            with open(self.manifest_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError:
+            logger.warning(f"Unreadable manifest {self.manifest_file}; rebuilding it from the segment files.")
+        return {
+            "active": self.file_path.name,
+            "segments": [
+                {"file": path.name, "day": day, "rows": None, "bytes": path.stat().st_size}
+                for day, _, path in self._segments_on_disk()
+            ],
+        }
+
+    def _next_sequence(self, manifest: dict, day: str) -> int:
+        """Next segment number for a day, past both the manifest and the files on disk."""
+        listed = sum(1 for s in manifest["segments"] if s.get("day") == day)
+        on_disk = max((seq for d, seq, _ in self._segments_on_disk() if d == day), default=0)
+        return max(listed, on_disk) + 1
+
+    def _rotate(self) -> None:
+        """Close the active file, rename it to a numbered segment, and start a new one."""
+        size = self._file.tell()
+        self._file.close()
+
+        manifest = self._read_manifest()
+        day = self._opened_day.strftime("%Y%m%d")
+        # The files on disk count too: the manifest may be missing, corrupt, or
+        # one rotation behind after a crash, and os.replace would overwrite a segment
+        sequence = self._next_sequence(manifest, day)
+        segment = self.file_path.with_name(f"{self.file_path.stem}.{day}.{sequence:04d}{self.file_path.suffix}")
+        os.replace(self.file_path, segment)
+
+        manifest["segments"].append({
+            "file": segment.name,
+            "day": day,
+            "rows": self._file_rows,
+            "bytes": size,
+            "closed": datetime.now().isoformat(timespec="seconds"),
+        })
+        tmp_file = self.manifest_file.with_name(self.manifest_file.name + ".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=4)
+        os.replace(tmp_file, self.manifest_file)
+
+        logger.info(f"📦 Rotated {self.file_path.name} -> {segment.name} ({size} bytes)")
+        self._open()
+
+    def close(self) -> None:
+        """Flush any buffered rows and close the active file."""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
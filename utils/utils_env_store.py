@@ -0,0 +1,302 @@
+"""
+utils_env_store.py - memory-mapped columnar store for weather & river history.
+
+Converts `data/weather_conditions.json` and `data/river_flow.json` into one
+compact, date-indexed binary file and reads it back through `mmap`, so every
+consumer process shares the same OS page-cache copy instead of holding its
+own dicts of dicts keyed by date string.
+
+File layout (little-endian):
+- 8-byte magic `RFENV\\x00\\x00\\x01`, then a uint32 metadata length.
+- UTF-8 JSON metadata: first date, number of days, column names/types, the
+  weather condition dictionary, and the (mtime_ns, size) fingerprint of each
+  JSON source, so readers can tell when the store is out of date.
+- One fixed-width column per field, each `n_days` long and 8-byte aligned:
+  `i` (int32, missing = INT32_MIN) for whole-number fields, `d` (float64,
+  missing = NaN) for fractional fields, and `B` (uint8) for the
+  dictionary-encoded condition and the presence flags.
+
+Row `i` is the day `first_date + i`, so a lookup is one subtraction.
+
+Usage:
+    python -m utils.utils_env_store          # build data/environment_store.bin
+
+    from utils.utils_env_store import EnvironmentStore
+    store = EnvironmentStore("data/environment_store.bin")
+    store.weather("2024-07-04")
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import json
+import math
+import mmap
+import os
+import pathlib
+import struct
+from datetime import date, timedelta
+
+from dotenv import load_dotenv
+
+from utils.utils_logger import logger
+
+#####################################
+# Format Definitions
+#####################################
+
+MAGIC = b"RFENV\x00\x00\x01"
+HEADER = struct.Struct("<8sI")
+ALIGNMENT = 8
+
+DEFAULT_STORE_FILE = "data/environment_store.bin"
+DEFAULT_WEATHER_FILE = "data/weather_conditions.json"
+DEFAULT_RIVER_FILE = "data/river_flow.json"
+
+INT_MISSING = -(2 ** 31)
+CONDITION_MISSING = 255
+
+# Presence flags (bitmask column)
+HAS_WEATHER = 1
+HAS_RIVER = 2
+
+WEATHER_FIELDS = ("temperature", "wind_speed", "precipitation")
+RIVER_FIELDS = ("river_flow", "water_level", "water_temperature")
+
+_ITEM_SIZES = {"i": 4, "d": 8, "B": 1}
+
+#####################################
+# Converter
+#####################################
+
+def source_fingerprint(file_path):
+    """Return [mtime_ns, size] for a JSON source file, or None if it is missing."""
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _load_entries(file_path) -> dict:
+    """Load a JSON list of daily entries keyed by date (empty if missing)."""
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            return {entry["date"]: entry for entry in json.load(f)}
+    except FileNotFoundError:
+        logger.warning(f"File not found, column left empty: {file_path}")
+        return {}
+
+
+def _column_type(values) -> str:
+    """Pick int32 for whole-number fields that fit, otherwise float64."""
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, int) and not isinstance(v, bool) and INT_MISSING < v < 2 ** 31 for v in present):
+        return "i"
+    return "d"
+
+
+def _pad(n: int) -> int:
+    """Return the padding needed to align an offset to ALIGNMENT bytes."""
+    return (-n) % ALIGNMENT
+
+
+def convert_json_to_store(
+    weather_file=DEFAULT_WEATHER_FILE,
+    river_file=DEFAULT_RIVER_FILE,
+    output_file=DEFAULT_STORE_FILE,
+) -> pathlib.Path:
+    """
+    Build the columnar store from the weather and river JSON files.
+
+    The file is written next to its destination and moved into place, so
+    processes that already have the old file mapped keep a consistent view.
+
+    Returns:
+        pathlib.Path: The path to the store file.
+    """
+    # Fingerprint before reading, so a write that lands mid-build looks stale
+    sources = {"weather": source_fingerprint(weather_file), "river": source_fingerprint(river_file)}
+    weather = _load_entries(weather_file)
+    river = _load_entries(river_file)
+    output_file = pathlib.Path(output_file)
+
+    days = sorted(date.fromisoformat(d) for d in set(weather) | set(river))
+    first = days[0] if days else date(1970, 1, 1)
+    n_days = (days[-1] - first).days + 1 if days else 0
+    keys = [(first + timedelta(days=i)).isoformat() for i in range(n_days)]
+
+    conditions = sorted({e["weather_condition"] for e in weather.values() if e.get("weather_condition")})
+    if len(conditions) >= CONDITION_MISSING:
+        raise ValueError(f"Too many distinct weather conditions ({len(conditions)}).")
+    condition_codes = {c: i for i, c in enumerate(conditions)}
+
+    columns = []
+    for source, fields in ((weather, WEATHER_FIELDS), (river, RIVER_FIELDS)):
+        for field in fields:
+            values = [source.get(k, {}).get(field) for k in keys]
+            typecode = _column_type(values)
+            missing = INT_MISSING if typecode == "i" else math.nan
+            columns.append((field, typecode, [missing if v is None else v for v in values]))
+
+    columns.append(("weather_condition", "B", [
+        condition_codes.get(weather.get(k, {}).get("weather_condition"), CONDITION_MISSING) for k in keys
+    ]))
+    columns.append(("present", "B", [
+        (HAS_WEATHER if k in weather else 0) | (HAS_RIVER if k in river else 0) for k in keys
+    ]))
+
+    metadata = json.dumps({
+        "first_date": first.isoformat(),
+        "days": n_days,
+        "columns": [[name, typecode] for name, typecode, _ in columns],
+        "conditions": conditions,
+        "sources": sources,
+    }).encode("utf-8")
+
+    # Per-process temp name: several consumers may rebuild a stale store at once
+    tmp_file = output_file.with_name(f"{output_file.name}.{os.getpid()}.tmp")
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(tmp_file, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(metadata)))
+        f.write(metadata)
+        f.write(b"\x00" * _pad(HEADER.size + len(metadata)))
+        for _, typecode, values in columns:
+            data = struct.pack(f"<{len(values)}{typecode}", *values)
+            f.write(data)
+            f.write(b"\x00" * _pad(len(data)))
+    os.replace(tmp_file, output_file)
+
+    logger.info(f"Environment store written to {output_file}: {n_days} days, {len(columns)} columns.")
+    return output_file
+
+#####################################
+# Memory-Mapped Reader
+#####################################
+
+class EnvironmentStore:
+    """Read-only, memory-mapped view of the columnar environment store."""
+
+    def __init__(self, file_path=DEFAULT_STORE_FILE):
+        self.file_path = pathlib.Path(file_path)
+        with open(self.file_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, meta_len = HEADER.unpack_from(self._mmap, 0) if len(self._mmap) >= HEADER.size else (None, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"Not an environment store file: {self.file_path}")
+
+        offset = HEADER.size
+        metadata = json.loads(bytes(self._mmap[offset:offset + meta_len]).decode("utf-8"))
+        offset += meta_len + _pad(HEADER.size + meta_len)
+
+        self.first_ordinal = date.fromisoformat(metadata["first_date"]).toordinal()
+        self.days = metadata["days"]
+        self.conditions = metadata["conditions"]
+        self.sources = metadata.get("sources")
+
+        layout = []
+        for name, typecode in metadata["columns"]:
+            size = self.days * _ITEM_SIZES[typecode]
+            layout.append((name, typecode, offset, size))
+            offset += size + _pad(size)
+        if layout and layout[-1][2] + layout[-1][3] > len(self._mmap):
+            self._mmap.close()
+            raise ValueError(f"Truncated environment store file: {self.file_path}")
+
+        view = memoryview(self._mmap)
+        self._columns = {}
+        for name, typecode, start, size in layout:
+            self._columns[name] = view[start:start + size].cast(typecode)
+
+        self._presence = self._columns["present"]
+        self._condition = self._columns["weather_condition"]
+
+    def close(self) -> None:
+        """Release the column views and unmap the file."""
+        self._columns.clear()
+        self._presence = self._condition = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # A caller still holds a view; the mapping is freed when it is dropped
+            pass
+
+    def is_stale(self, weather_file, river_file) -> bool:
+        """
+        True if either JSON source changed since the store was built.
+
+        Stores written before fingerprints were recorded are stale when a
+        source is newer than the store file. A missing source is ignored.
+        """
+        current = {"weather": source_fingerprint(weather_file), "river": source_fingerprint(river_file)}
+        if self.sources is None:
+            built = self.file_path.stat().st_mtime_ns
+            return any(f is not None and f[0] > built for f in current.values())
+        return any(f is not None and f != self.sources.get(kind) for kind, f in current.items())
+
+    def _index(self, date_str: str):
+        """Return the row for a date string, or None if it is out of range or invalid."""
+        try:
+            i = date.fromisoformat(date_str).toordinal() - self.first_ordinal
+        except (TypeError, ValueError):
+            return None
+        return i if 0 <= i < self.days else None
+
+    def _value(self, field: str, i: int):
+        """Return one cell as a Python number, or None if it is missing."""
+        value = self._columns[field][i]
+        if value == INT_MISSING or value != value:  # NaN check
+            return None
+        return value
+
+    def _record(self, i: int, fields) -> dict:
+        """Build a record dict (matching the JSON layout) for row i."""
+        record = {"date": date.fromordinal(self.first_ordinal + i).isoformat()}
+        for field in fields:
+            record[field] = self._value(field, i)
+        return record
+
+    def weather(self, date_str: str):
+        """Return the weather record for a date, or None if there is no entry."""
+        i = self._index(date_str)
+        if i is None or not self._presence[i] & HAS_WEATHER:
+            return None
+        record = self._record(i, WEATHER_FIELDS)
+        code = self._condition[i]
+        record["weather_condition"] = self.conditions[code] if code != CONDITION_MISSING else None
+        return record
+
+    def river(self, date_str: str):
+        """Return the river record for a date, or None if there is no entry."""
+        i = self._index(date_str)
+        if i is None or not self._presence[i] & HAS_RIVER:
+            return None
+        return self._record(i, RIVER_FIELDS)
+
+    def iter_records(self, kind: str):
+        """Yield every present weather or river record (kind = 'weather' or 'river')."""
+        flag, fields = (HAS_WEATHER, WEATHER_FIELDS) if kind == "weather" else (HAS_RIVER, RIVER_FIELDS)
+        for i in range(self.days):
+            if self._presence[i] & flag:
+                record = self._record(i, fields)
+                if kind == "weather":
+                    code = self._condition[i]
+                    record["weather_condition"] = self.conditions[code] if code != CONDITION_MISSING else None
+                yield record
+
+#####################################
+# Main Function
+#####################################
+
+def main() -> None:
+    """Convert the JSON environment files into the columnar store."""
+    load_dotenv()
+    output_file = os.getenv("ENVIRONMENT_STORE_FILE", DEFAULT_STORE_FILE)
+    convert_json_to_store(DEFAULT_WEATHER_FILE, DEFAULT_RIVER_FILE, output_file)
+
+
+if __name__ == "__main__":
+    main()
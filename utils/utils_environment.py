@@ -0,0 +1,372 @@
+"""
+utils_environment.py - environmental context (weather & river) for rafting consumers.
+
+Builds the date-keyed weather and river lookups once at load time, together
+with their aggregate fallbacks (ISO week, month, and overall means), so each
+message is enriched with O(1) dictionary lookups no matter how long the
+weather/river history grows.
+
+When a JSON data file changes on disk, only the entries that were added,
+changed, or removed are applied to the running aggregates.
+
+If the memory-mapped columnar store (see utils_env_store.py) exists, exact
+lookups are served from it instead of per-process dicts. The store is
+rebuilt from the JSON files whenever they change (rafting_producer rewrites
+them on every run), and a failed rebuild or reload keeps the current store.
+
+Usage:
+    from utils.utils_environment import EnvironmentContext
+    environment = EnvironmentContext("data/weather_conditions.json", "data/river_flow.json")
+    weather = environment.get_weather("2024-07-04")
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import json
+import os
+import pathlib
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from utils.utils_env_store import DEFAULT_STORE_FILE, EnvironmentStore, convert_json_to_store
+from utils.utils_logger import logger
+
+#####################################
+# Field Definitions
+#####################################
+
+WEATHER_NUMERIC_FIELDS = ("temperature", "wind_speed", "precipitation")
+RIVER_NUMERIC_FIELDS = ("river_flow", "water_level", "water_temperature")
+
+WEATHER_FALLBACK_DEFAULTS = {"weather_condition": "Data Not Available"}
+RIVER_FALLBACK_DEFAULTS = {}
+
+DEFAULT_REFRESH_SECONDS = 30.0
+
+#####################################
+# Getter Functions for .env Variables
+#####################################
+
+def get_environment_refresh_seconds() -> float:
+    """Fetch how often (seconds) to check the environmental data files for changes."""
+    refresh_seconds = float(os.getenv("ENVIRONMENT_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS))
+    logger.info(f"Environmental data refresh interval: {refresh_seconds} seconds")
+    return refresh_seconds
+
+
+def get_environment_store_file() -> str:
+    """Fetch the columnar environment store path from environment or use default."""
+    store_file = os.getenv("ENVIRONMENT_STORE_FILE", DEFAULT_STORE_FILE)
+    logger.info(f"Environmental store file: {store_file}")
+    return store_file
+
+#####################################
+# Load JSON Data
+#####################################
+
+def read_json_data(file_path):
+    """Load JSON data from a given file path, keyed by date, or None if it cannot be read."""
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            return {entry["date"]: entry for entry in json.load(f)}
+    except FileNotFoundError:
+        logger.error(f"File not found: {file_path}")
+    except json.JSONDecodeError:
+        logger.error(f"Invalid JSON format in file: {file_path}")
+    return None
+
+
+def load_json_data(file_path) -> dict:
+    """Load JSON data from a given file path, keyed by date ({} if it cannot be read)."""
+    data = read_json_data(file_path)
+    return {} if data is None else data
+
+
+def _parse_date(date_str: str):
+    """Return a datetime for a YYYY-MM-DD string, or None if it is invalid."""
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+#####################################
+# Environment Table
+#####################################
+
+class EnvironmentTable:
+    """
+    Date-keyed lookup for one environmental data file, plus aggregate fallbacks.
+
+    Running sums and counts are kept per ISO week number, per month, and
+    overall, so a refresh only touches the entries that changed. The fallback
+    records themselves are rebuilt only for the buckets that changed.
+    """
+
+    def __init__(self, file_path, numeric_fields, fallback_defaults=None):
+        self.file_path = pathlib.Path(file_path)
+        self.numeric_fields = tuple(numeric_fields)
+        self.fallback_defaults = dict(fallback_defaults or {})
+
+        # Exact lookups keyed by date string (updated in place on refresh)
+        self.lookup: dict = {}
+
+        # Running aggregates: bucket -> {"count": n, field: sum, ...}
+        self._sums = defaultdict(lambda: defaultdict(float))
+
+        # Precomputed fallback records per bucket
+        self._fallbacks: dict = {}
+
+        self._signature = None
+        self.load()
+
+    @staticmethod
+    def _buckets(date_str: str):
+        """Return the aggregate buckets an entry for this date contributes to."""
+        day = _parse_date(date_str)
+        if day is None:
+            return ("all",)
+        return (("week", day.isocalendar()[1]), ("month", day.month), "all")
+
+    def _file_signature(self):
+        """Return (mtime_ns, size) for the data file, or None if it is missing."""
+        try:
+            stat = self.file_path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _apply(self, entry: dict, sign: int, touched: set) -> None:
+        """Add (sign=1) or remove (sign=-1) one entry from the running aggregates."""
+        for bucket in self._buckets(entry.get("date")):
+            sums = self._sums[bucket]
+            sums["count"] += sign
+            for field in self.numeric_fields:
+                value = entry.get(field)
+                if isinstance(value, (int, float)):
+                    sums[field] += sign * value
+                    sums[f"{field}_count"] += sign
+            touched.add(bucket)
+
+    def _rebuild_fallback(self, bucket) -> None:
+        """Recompute the fallback record for a single bucket from its sums."""
+        sums = self._sums.get(bucket)
+        if not sums or sums["count"] <= 0:
+            self._sums.pop(bucket, None)
+            self._fallbacks.pop(bucket, None)
+            return
+
+        record = dict(self.fallback_defaults)
+        for field in self.numeric_fields:
+            count = sums[f"{field}_count"]
+            record[field] = round(sums[field] / count, 1) if count > 0 else "N/A"
+        self._fallbacks[bucket] = record
+
+    def load(self) -> bool:
+        """
+        (Re)load the data file and apply only the differences to the aggregates.
+
+        A missing or half-written file leaves the current lookups and
+        aggregates in place; the next refresh tries again.
+
+        Returns:
+            bool: True if any entries were added, changed, or removed.
+        """
+        signature = self._file_signature()
+        new_lookup = read_json_data(self.file_path)
+        if new_lookup is None:
+            self._signature = None
+            return False
+        self._signature = signature
+
+        touched: set = set()
+        for date_str, old_entry in list(self.lookup.items()):
+            new_entry = new_lookup.get(date_str)
+            if new_entry != old_entry:
+                self._apply(old_entry, -1, touched)
+                del self.lookup[date_str]
+
+        for date_str, new_entry in new_lookup.items():
+            if date_str not in self.lookup:
+                self._apply(new_entry, 1, touched)
+                self.lookup[date_str] = new_entry
+
+        for bucket in touched:
+            self._rebuild_fallback(bucket)
+
+        if touched:
+            logger.info(
+                f"Environmental data loaded from {self.file_path}: "
+                f"{len(self.lookup)} days, {len(touched)} aggregate buckets updated."
+            )
+        return bool(touched)
+
+    def refresh(self) -> bool:
+        """Reload the data file only if it changed on disk since the last load."""
+        if self._file_signature() == self._signature:
+            return False
+        return self.load()
+
+    def fallback(self, day=None) -> dict:
+        """Return the best available aggregate: ISO week, then month, then overall."""
+        if day is not None:
+            record = self._fallbacks.get(("week", day.isocalendar()[1]))
+            if record is None:
+                record = self._fallbacks.get(("month", day.month))
+            if record is not None:
+                return record
+
+        record = self._fallbacks.get("all")
+        if record is None:
+            record = dict(self.fallback_defaults)
+            for field in self.numeric_fields:
+                record[field] = "N/A"
+        return record
+
+    def find(self, date_str: str):
+        """Return the exact entry for a date, or None if there is no entry."""
+        return self.lookup.get(date_str)
+
+    def get(self, date_str: str, day=None) -> dict:
+        """
+        Return the entry for a date, or the best aggregate fallback if it is missing.
+
+        Args:
+            date_str (str): Trip date as YYYY-MM-DD.
+            day (datetime, optional): The already-parsed date, to avoid parsing twice.
+        """
+        entry = self.find(date_str)
+        if entry is not None:
+            return entry
+        return self.fallback(day if day is not None else _parse_date(date_str))
+
+
+class StoreEnvironmentTable(EnvironmentTable):
+    """
+    EnvironmentTable backed by the shared memory-mapped columnar store.
+
+    Exact lookups read the mapped columns; the aggregate fallbacks are
+    rebuilt from the columns whenever the store file is replaced.
+    """
+
+    def __init__(self, store_file, kind: str, numeric_fields, fallback_defaults=None):
+        self.kind = kind
+        self.store = None
+        super().__init__(store_file, numeric_fields, fallback_defaults)
+
+    def load(self) -> bool:
+        """
+        (Re)map the store file and rebuild the aggregate fallbacks from its columns.
+
+        The new file is mapped before the old mapping is closed, so if it
+        cannot be opened the table keeps serving the current store.
+        """
+        signature = self._file_signature()
+        store = EnvironmentStore(self.file_path)
+        old_store, self.store = self.store, store
+        if old_store is not None:
+            old_store.close()
+        self._signature = signature
+        self._sums.clear()
+        self._fallbacks.clear()
+
+        touched: set = set()
+        for record in self.store.iter_records(self.kind):
+            self._apply(record, 1, touched)
+        for bucket in touched:
+            self._rebuild_fallback(bucket)
+
+        logger.info(f"Environmental {self.kind} data mapped from {self.file_path}: {self.store.days} days.")
+        return True
+
+    def find(self, date_str: str):
+        """Return the exact entry for a date from the store, or None if there is no entry."""
+        return self.store.weather(date_str) if self.kind == "weather" else self.store.river(date_str)
+
+#####################################
+# Environment Context
+#####################################
+
+class EnvironmentContext:
+    """Weather and river tables with rate-limited change detection."""
+
+    def __init__(self, weather_file, river_file, refresh_seconds: float = DEFAULT_REFRESH_SECONDS, store_file=None):
+        """
+        Args:
+            weather_file: Weather JSON file (used when there is no store).
+            river_file: River flow JSON file (used when there is no store).
+            refresh_seconds (float): Minimum time between change checks (0 disables).
+            store_file (optional): Columnar store to use instead of the JSON files, if it exists.
+        """
+        self.weather_file = weather_file
+        self.river_file = river_file
+        self.store_file = None
+        if store_file and pathlib.Path(store_file).exists():
+            self.store_file = store_file
+            try:
+                store = EnvironmentStore(store_file)
+                try:
+                    self.rebuild_stale_store(store)
+                finally:
+                    store.close()
+            except Exception as e:
+                logger.error(f"Error checking environmental store {store_file}: {e}")
+            self.weather = StoreEnvironmentTable(store_file, "weather", WEATHER_NUMERIC_FIELDS, WEATHER_FALLBACK_DEFAULTS)
+            self.river = StoreEnvironmentTable(store_file, "river", RIVER_NUMERIC_FIELDS, RIVER_FALLBACK_DEFAULTS)
+        else:
+            if store_file:
+                logger.info(
+                    f"Environmental store {store_file} not found; reading JSON files "
+                    f"(build it with: python -m utils.utils_env_store)."
+                )
+            self.weather = EnvironmentTable(weather_file, WEATHER_NUMERIC_FIELDS, WEATHER_FALLBACK_DEFAULTS)
+            self.river = EnvironmentTable(river_file, RIVER_NUMERIC_FIELDS, RIVER_FALLBACK_DEFAULTS)
+        self.refresh_seconds = refresh_seconds
+        self._next_refresh = time.monotonic() + refresh_seconds
+
+    def rebuild_stale_store(self, store) -> bool:
+        """Rebuild the store file if its JSON sources changed since it was built."""
+        if not store.is_stale(self.weather_file, self.river_file):
+            return False
+        logger.info(f"Environmental JSON files changed; rebuilding {self.store_file}.")
+        convert_json_to_store(self.weather_file, self.river_file, self.store_file)
+        return True
+
+    def maybe_refresh(self) -> None:
+        """Check the data files for changes at most once per refresh interval."""
+        if self.refresh_seconds <= 0:
+            return
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return
+        self._next_refresh = now + self.refresh_seconds
+        # Each step fails on its own; the tables keep serving the data
+        # already loaded and everything is retried next interval
+        if self.store_file is not None:
+            try:
+                self.rebuild_stale_store(self.weather.store)
+            except Exception as e:
+                logger.error(f"Error rebuilding environmental store: {e}")
+        for table in (self.weather, self.river):
+            try:
+                table.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing environmental data from {table.file_path}: {e}")
+
+    def find_weather(self, date_str: str):
+        """Return the exact weather entry for a date, or None."""
+        return self.weather.find(date_str)
+
+    def find_river(self, date_str: str):
+        """Return the exact river entry for a date, or None."""
+        return self.river.find(date_str)
+
+    def get_weather(self, date_str: str, day=None) -> dict:
+        """Return weather conditions for a date (or its aggregate fallback)."""
+        return self.weather.get(date_str, day)
+
+    def get_river(self, date_str: str, day=None) -> dict:
+        """Return river conditions for a date (or its aggregate fallback)."""
+        return self.river.get(date_str, day)
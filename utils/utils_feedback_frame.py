@@ -0,0 +1,214 @@
+"""
+utils_feedback_frame.py - load rafting feedback into typed pandas DataFrames.
+
+The analysis scripts share these loaders instead of cleaning data row by row:
+
+- explicit dtypes at read time; guide, weather, trip_type and the other
+  low-cardinality text columns become categoricals
+- measurements stay numeric ("N/A" becomes NaN instead of turning the column
+  into objects); only categorical columns get an "Unknown" fill
+- is_negative becomes 0/1 (int8) from yes/no, true/false or booleans,
+  evaluated once per distinct value rather than once per row
+- summary strings ("Flow 1200 cfs | ...") are parsed with the .str accessor
+
+Usage:
+    from utils.utils_feedback_frame import load_feedback_csv
+    df = load_feedback_csv("data/rafting_feedback.csv")
+
+Compare against the original per-row preprocessing:
+    python -m utils.utils_feedback_frame --benchmark 1000000
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import argparse
+import json
+import pathlib
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+#####################################
+# Column Types
+#####################################
+
+CATEGORY_COLUMNS = ["guide", "trip_type", "weather", "status"]
+NUMERIC_COLUMNS = ["temperature", "wind_speed", "rainfall", "river_flow", "water_level", "water_temperature"]
+FLAG_TRUE_VALUES = ("yes", "true", "1")
+MISSING_VALUES = ["N/A", "", "Data Not Available"]
+
+CSV_DTYPES = {
+    **{column: "category" for column in CATEGORY_COLUMNS},
+    **{column: "float32" for column in NUMERIC_COLUMNS},
+    "timestamp": "string",
+    "date": "string",
+    "comment": "string",
+    "is_negative": "category",
+}
+
+#####################################
+# Vectorized Conversions
+#####################################
+
+def to_flag(values: pd.Series) -> pd.Series:
+    """Return 0/1 (int8) for yes/no, true/false, or boolean values; anything else is 0."""
+    if pd.api.types.is_bool_dtype(values):
+        return values.astype("int8")
+    values = values.astype("category")
+    categories = values.cat.categories.astype(str).str.strip().str.lower()
+    is_true = np.asarray(categories.isin(FLAG_TRUE_VALUES))
+    codes = values.cat.codes.to_numpy()
+    # Code -1 marks missing values, which count as 0
+    return pd.Series(np.where(codes >= 0, is_true[codes], False).astype("int8"), index=values.index)
+
+
+def fill_categories(values: pd.Series, fill: str = "Unknown") -> pd.Series:
+    """Fill missing values in a categorical column without touching other columns."""
+    values = values.astype("category")
+    if values.isna().any():
+        if fill not in values.cat.categories:
+            values = values.cat.add_categories([fill])
+        values = values.fillna(fill)
+    return values.cat.remove_unused_categories()
+
+
+def parse_summary_number(summary: pd.Series, position: int = 1) -> pd.Series:
+    """Return the space-separated token at `position` of each summary string as a float ("Flow 1200 cfs" -> 1200)."""
+    tokens = summary.astype("string").str.split(" ", n=position + 1).str[position]
+    return pd.to_numeric(tokens, errors="coerce")
+
+#####################################
+# Loaders
+#####################################
+
+def prepare_feedback(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Apply the shared dtypes and derived columns to a feedback DataFrame (in place).
+
+    Adds `week` (ISO week) when there is a date column, and `river_flow`
+    from `river_summary` when only the summary is present.
+    """
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = fill_categories(df[column])
+    for column in NUMERIC_COLUMNS:
+        if column in df.columns and not pd.api.types.is_numeric_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("float32")
+    if "is_negative" in df.columns:
+        df["is_negative"] = to_flag(df["is_negative"])
+    if "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d", errors="coerce")
+        df["week"] = df["date"].dt.isocalendar().week
+    if "river_summary" in df.columns and "river_flow" not in df.columns:
+        df["river_flow"] = parse_summary_number(df["river_summary"]).astype("float32")
+    return df
+
+
+def load_feedback_csv(path, columns=None) -> pd.DataFrame:
+    """
+    Load a feedback CSV (e.g. data/rafting_feedback.csv) with explicit dtypes.
+
+    Args:
+        path: CSV file.
+        columns (list, optional): Columns to read. Defaults to all.
+    """
+    df = pd.read_csv(
+        path,
+        usecols=columns,
+        dtype=CSV_DTYPES,
+        na_values={column: MISSING_VALUES for column in NUMERIC_COLUMNS},
+        keep_default_na=True,
+    )
+    return prepare_feedback(df)
+
+
+def load_feedback_json(path) -> pd.DataFrame:
+    """Load a JSON list of feedback records (e.g. data/all_rafting_remarks.json)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return prepare_feedback(pd.DataFrame(json.load(f)))
+
+#####################################
+# Benchmark
+#####################################
+
+def legacy_preprocess(path) -> pd.DataFrame:
+    """The original per-row preprocessing from rafting_analysis.py, kept for comparison."""
+    df = pd.read_csv(path)
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    # pandas < 3 silently upcast gappy numeric columns to object here; pandas 3 raises instead
+    df = df.astype({column: object for column in df.columns[df.isna().any()]})
+    df.fillna("Unknown", inplace=True)
+    df["is_negative"] = df["is_negative"].apply(lambda x: 1 if x.lower() == "yes" else 0)
+    df["week"] = df["date"].dt.isocalendar().week
+    df["river_flow"] = pd.to_numeric(df["river_flow"], errors="coerce")
+    return df
+
+
+def write_sample_csv(path, rows: int, seed: int = 42) -> None:
+    """Write a synthetic data/rafting_feedback.csv-shaped file with `rows` rows."""
+    rng = np.random.default_rng(seed)
+    guides = np.array(["Jake", "Ava", "Tyler", "Samantha", "Emily", "Noah", "Liam", "Mia"])
+    weather = np.array(["Sunny", "Cloudy", "Rainy", "Stormy", "Windy", "Data Not Available"])
+    dates = pd.date_range("2024-05-01", "2024-09-30").strftime("%Y-%m-%d").to_numpy()
+
+    def numbers(low, high):
+        values = rng.integers(low, high, rows).astype(str).astype(object)
+        values[rng.random(rows) < 0.02] = "N/A"
+        return values
+
+    pd.DataFrame({
+        "timestamp": "2025-02-03T05:06:08.624580",
+        "date": dates[rng.integers(0, len(dates), rows)],
+        "guide": guides[rng.integers(0, len(guides), rows)],
+        "comment": "The guides kept us entertained the whole time.",
+        "trip_type": np.where(rng.random(rows) < 0.5, "Half Day", "Full Day"),
+        "is_negative": np.where(rng.random(rows) < 0.2, "yes", "no"),
+        "weather": weather[rng.integers(0, len(weather), rows)],
+        "temperature": numbers(50, 95),
+        "wind_speed": numbers(0, 25),
+        "rainfall": numbers(0, 3),
+        "river_flow": numbers(400, 2500),
+        "water_level": numbers(1, 8),
+        "water_temperature": numbers(45, 70),
+    }).to_csv(path, index=False)
+
+
+def benchmark(rows: int) -> dict:
+    """Time the legacy and vectorized loaders on a synthetic CSV and compare memory."""
+    with tempfile.TemporaryDirectory() as folder:
+        path = pathlib.Path(folder) / "rafting_feedback.csv"
+        write_sample_csv(path, rows)
+
+        start = time.perf_counter()
+        legacy = legacy_preprocess(path)
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized = load_feedback_csv(path)
+        vectorized_seconds = time.perf_counter() - start
+
+    assert (legacy["is_negative"].to_numpy() == vectorized["is_negative"].to_numpy()).all()
+    return {
+        "rows": rows,
+        "legacy_seconds": round(legacy_seconds, 3),
+        "vectorized_seconds": round(vectorized_seconds, 3),
+        "speedup": round(legacy_seconds / vectorized_seconds, 2),
+        "legacy_mb": round(legacy.memory_usage(deep=True).sum() / 1e6, 1),
+        "vectorized_mb": round(vectorized.memory_usage(deep=True).sum() / 1e6, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the feedback loaders.")
+    parser.add_argument("--benchmark", type=int, default=1_000_000, metavar="ROWS",
+                        help="Rows in the synthetic CSV (default: 1,000,000).")
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.benchmark), indent=2))
+
+
+if __name__ == "__main__":
+    main()
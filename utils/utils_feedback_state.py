@@ -0,0 +1,102 @@
+"""
+utils_feedback_state.py - mergeable guide feedback aggregates.
+
+FeedbackState holds the positive/negative counts per guide and per
+(guide, ISO week). Consumers keep one state per Kafka partition, so the
+counts can be combined on demand (across partitions, worker processes, or
+restarts) with merge(), and moved between processes as plain dicts with
+to_dict()/from_dict().
+
+Usage:
+    from utils.utils_feedback_state import FeedbackState
+    state = FeedbackState()
+    state.record("Jake", 27, is_negative=False)
+    total = FeedbackState.merged(states.values())
+"""
+
+#####################################
+# Feedback State
+#####################################
+
+class FeedbackState:
+    """Positive/negative feedback counts per guide and per (guide, week)."""
+
+    def __init__(self):
+        # guide -> {"positive": n, "negative": n}
+        self.guide_feedback: dict = {}
+        # (guide, week) -> {"positive": n, "negative": n}
+        self.weekly_feedback: dict = {}
+
+    def __len__(self) -> int:
+        """Number of feedback records counted."""
+        return sum(counts["positive"] + counts["negative"] for counts in self.guide_feedback.values())
+
+    def summary(self) -> dict:
+        """Return totals and sizes: positive, negative, guides, and guide-weeks tracked."""
+        positive = sum(counts["positive"] for counts in self.guide_feedback.values())
+        negative = sum(counts["negative"] for counts in self.guide_feedback.values())
+        return {
+            "positive": positive,
+            "negative": negative,
+            "guides": len(self.guide_feedback),
+            "guide_weeks": len(self.weekly_feedback),
+        }
+
+    def record(self, guide: str, week_number: int, is_negative: bool) -> None:
+        """Count one feedback record for a guide in an ISO week."""
+        kind = "negative" if is_negative else "positive"
+
+        counts = self.guide_feedback.get(guide)
+        if counts is None:
+            counts = self.guide_feedback[guide] = {"positive": 0, "negative": 0}
+        counts[kind] += 1
+
+        key = (guide, week_number)
+        counts = self.weekly_feedback.get(key)
+        if counts is None:
+            counts = self.weekly_feedback[key] = {"positive": 0, "negative": 0}
+        counts[kind] += 1
+
+    def merge(self, other: "FeedbackState") -> "FeedbackState":
+        """Add another state's counts into this one and return self."""
+        for target, source in (
+            (self.guide_feedback, other.guide_feedback),
+            (self.weekly_feedback, other.weekly_feedback),
+        ):
+            for key, counts in source.items():
+                totals = target.get(key)
+                if totals is None:
+                    target[key] = dict(counts)
+                else:
+                    totals["positive"] += counts["positive"]
+                    totals["negative"] += counts["negative"]
+        return self
+
+    @classmethod
+    def merged(cls, states) -> "FeedbackState":
+        """Return a new state holding the combined counts of `states`."""
+        total = cls()
+        for state in states:
+            total.merge(state)
+        return total
+
+    def to_dict(self) -> dict:
+        """Return the counts as JSON-compatible plain data."""
+        return {
+            "guides": {guide: dict(counts) for guide, counts in self.guide_feedback.items()},
+            "weekly": [
+                [guide, week, counts["positive"], counts["negative"]]
+                for (guide, week), counts in self.weekly_feedback.items()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FeedbackState":
+        """Rebuild a state from to_dict() output."""
+        state = cls()
+        state.guide_feedback = {guide: dict(counts) for guide, counts in data.get("guides", {}).items()}
+        state.weekly_feedback = {
+            (guide, week): {"positive": positive, "negative": negative}
+            for guide, week, positive, negative in data.get("weekly", [])
+        }
+        return state
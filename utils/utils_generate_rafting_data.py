@@ -3,20 +3,35 @@ utils_generate_rafting_data.py
 
 Utility for generating synthetic rafting feedback data.
 
-This script generates and saves 170 rafting reviews (150 positive, 20 negative)
-from Memorial Day to Labor Day 2024.
+By default this script generates and saves 170 rafting reviews (150 positive,
+20 negative) from Memorial Day to Labor Day 2024.
+
+For load testing, `generate_rafting_feedback_bulk()` produces any number of
+records with NumPy-vectorized sampling, streaming them to disk in chunks as
+JSONL, CSV, or Parquet and generating chunks in parallel across processes.
+Output is reproducible for a given seed, whatever the number of workers.
 
 Usage:
     from utils.utils_generate_rafting_data import generate_rafting_feedback
     data_file = generate_rafting_feedback()
+
+    # 10M records, 10% negative, 8 processes
+    python utils/utils_generate_rafting_data.py --count 10000000 --negative-ratio 0.1 --workers 8
 """
 
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+import argparse
+import csv
+import os
 import random
 import json
+import shutil
 import uuid
 import pathlib
 
+import numpy as np
+
 # Define rafting guides
 GUIDES = ["Jake", "Samantha", "Carlos", "Emily", "Tyler", "Ava", "Liam", "Sophia", "Mason", "Olivia"]
 
@@ -166,7 +181,252 @@ def generate_rafting_feedback(output_file="data/all_rafting_remarks.json"):
 
     return data_file  # Return the path for confirmation
 
+#####################################
+# Bulk Generation (load testing)
+#####################################
+
+# Field order matches generate_rafting_feedback()
+FIELD_NAMES = ["comment", "guide", "uuid", "date", "trip_type", "timestamp", "is_negative"]
+SUPPORTED_FORMATS = ("jsonl", "csv", "parquet")
+DEFAULT_NEGATIVE_RATIO = 20 / 170
+DEFAULT_CHUNK_SIZE = 250_000
+
+# Lookup tables indexed by the sampled integer codes
+ALL_COMMENTS = POSITIVE_COMMENTS + NEGATIVE_COMMENTS
+DATE_STRINGS = [(MEMORIAL_DAY_2024 + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(DATE_RANGE + 1)]
+
+# Pre-escaped JSON fragments, so each JSONL line is a single string format
+_JSON_COMMENTS = [json.dumps(c) for c in ALL_COMMENTS]
+_JSON_GUIDES = [json.dumps(g) for g in GUIDES]
+_JSON_TRIP_TYPES = [json.dumps(t) for t in TRIP_TYPES]
+
+# Byte positions of the dashes in a formatted UUID
+_UUID_DASHES = (8, 13, 18, 23)
+
+
+def _sample_columns(rng, count: int, negative_ratio: float) -> dict:
+    """
+    Sample one chunk of records as integer code arrays plus formatted UUIDs.
+
+    Args:
+        rng (np.random.Generator): Generator for this chunk.
+        count (int): Number of records in the chunk.
+        negative_ratio (float): Probability that a record is negative.
+    """
+    is_negative = rng.random(count) < negative_ratio
+    comment_idx = np.where(
+        is_negative,
+        rng.integers(0, len(NEGATIVE_COMMENTS), count) + len(POSITIVE_COMMENTS),
+        rng.integers(0, len(POSITIVE_COMMENTS), count),
+    )
+
+    # Random version-4 UUIDs, formatted as a (count, 36) byte matrix in one pass
+    raw = rng.integers(0, 256, size=(count, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    hex_digits = np.frombuffer(raw.tobytes().hex().encode("ascii"), dtype=np.uint8).reshape(count, 32)
+    formatted = np.full((count, 36), ord("-"), dtype=np.uint8)
+    formatted[:, np.setdiff1d(np.arange(36), _UUID_DASHES)] = hex_digits
+    uuid_text = formatted.tobytes().decode("ascii")
+
+    return {
+        "comment": comment_idx,
+        "guide": rng.integers(0, len(GUIDES), count),
+        "uuid": [uuid_text[i:i + 36] for i in range(0, 36 * count, 36)],
+        "date": rng.integers(0, DATE_RANGE + 1, count),
+        "trip_type": rng.integers(0, len(TRIP_TYPES), count),
+        "is_negative": is_negative,
+    }
+
+
+def _write_chunk(columns: dict, fmt: str, part_file: pathlib.Path, timestamp: str) -> None:
+    """Write one sampled chunk to its own part file (no CSV header)."""
+    comments = columns["comment"].tolist()
+    guides = columns["guide"].tolist()
+    dates = columns["date"].tolist()
+    trip_types = columns["trip_type"].tolist()
+    negatives = columns["is_negative"].tolist()
+    uuids = columns["uuid"]
+
+    if fmt == "jsonl":
+        with open(part_file, "w", encoding="utf-8") as f:
+            f.writelines(
+                f'{{"comment": {_JSON_COMMENTS[c]}, "guide": {_JSON_GUIDES[g]}, "uuid": "{u}", '
+                f'"date": "{DATE_STRINGS[d]}", "trip_type": {_JSON_TRIP_TYPES[t]}, '
+                f'"timestamp": "{timestamp}", "is_negative": {"true" if n else "false"}}}\n'
+                for c, g, u, d, t, n in zip(comments, guides, uuids, dates, trip_types, negatives)
+            )
+
+    elif fmt == "csv":
+        with open(part_file, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(
+                (ALL_COMMENTS[c], GUIDES[g], u, DATE_STRINGS[d], TRIP_TYPES[t], timestamp, n)
+                for c, g, u, d, t, n in zip(comments, guides, uuids, dates, trip_types, negatives)
+            )
+
+    elif fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow: pip install pyarrow") from e
+
+        def dictionary_column(codes, values):
+            return pa.DictionaryArray.from_arrays(pa.array(codes, type=pa.int32()), pa.array(values))
+
+        table = pa.table({
+            "comment": dictionary_column(columns["comment"], ALL_COMMENTS),
+            "guide": dictionary_column(columns["guide"], GUIDES),
+            "uuid": pa.array(uuids, type=pa.string()),
+            "date": dictionary_column(columns["date"], DATE_STRINGS),
+            "trip_type": dictionary_column(columns["trip_type"], TRIP_TYPES),
+            "timestamp": pa.array([timestamp] * len(uuids), type=pa.string()),
+            "is_negative": pa.array(columns["is_negative"], type=pa.bool_()),
+        })
+        pq.write_table(table, part_file)
+
+
+def _generate_chunk(task: tuple) -> tuple:
+    """Worker entry point: sample and write one chunk. Returns (part_file, count)."""
+    seed_seq, count, negative_ratio, fmt, part_file, timestamp = task
+    rng = np.random.default_rng(seed_seq)
+    _write_chunk(_sample_columns(rng, count, negative_ratio), fmt, part_file, timestamp)
+    return part_file, count
+
+
+def generate_rafting_feedback_bulk(
+    count: int,
+    output_file="data/all_rafting_remarks.jsonl",
+    seed: int = None,
+    negative_ratio: float = DEFAULT_NEGATIVE_RATIO,
+    fmt: str = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = None,
+    overwrite: bool = False,
+):
+    """
+    Generate a large synthetic rafting feedback dataset for load testing.
+
+    Records are sampled in chunks with NumPy (guides, dates, trip types,
+    comment indices, UUIDs), each chunk is written to a part file by a worker
+    process, and the parts are stitched together in order. Parquet output is
+    written as a directory of part files instead; an existing non-empty
+    directory is refused unless `overwrite` is set, and then only its
+    `part-*.parquet` files are replaced.
+
+    Args:
+        count (int): Number of records to generate.
+        output_file (str): Output path (a directory for Parquet).
+        seed (int, optional): Seed for reproducible output.
+        negative_ratio (float): Fraction of records that are negative (0-1).
+        fmt (str, optional): 'jsonl', 'csv', or 'parquet'. Defaults to the output suffix.
+        chunk_size (int): Records per chunk (bounds memory per worker).
+        workers (int, optional): Worker processes. Defaults to the CPU count.
+        overwrite (bool): Replace the part files of an existing Parquet directory.
+
+    Returns:
+        pathlib.Path: The path to the generated file or directory.
+    """
+    data_file = pathlib.Path(output_file)
+    fmt = (fmt or data_file.suffix.lstrip(".") or "jsonl").lower()
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Choose from {SUPPORTED_FORMATS}.")
+    if not 0.0 <= negative_ratio <= 1.0:
+        raise ValueError(f"negative_ratio must be between 0 and 1, got {negative_ratio}.")
+
+    chunk_size = max(1, int(chunk_size))
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    timestamp = datetime.utcnow().isoformat()
+
+    if fmt == "parquet":
+        if data_file.exists() and not data_file.is_dir():
+            raise NotADirectoryError(f"Parquet output must be a directory, but {data_file} is a file.")
+        if data_file.exists() and any(data_file.iterdir()):
+            if not overwrite:
+                raise FileExistsError(f"{data_file} is not empty; pass overwrite=True (--overwrite) to replace it.")
+            for old_part in data_file.glob("part-*.parquet"):
+                old_part.unlink()
+        parts_folder = data_file
+    else:
+        parts_folder = data_file.with_name(data_file.name + ".parts")
+    parts_folder.mkdir(parents=True, exist_ok=True)
+
+    # One independent, reproducible stream per chunk
+    n_chunks = (count + chunk_size - 1) // chunk_size
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    tasks = [
+        (
+            seeds[i],
+            min(chunk_size, count - i * chunk_size),
+            negative_ratio,
+            fmt,
+            parts_folder.joinpath(f"part-{i:05d}.{fmt}"),
+            timestamp,
+        )
+        for i in range(n_chunks)
+    ]
+
+    if workers == 1 or n_chunks <= 1:
+        results = map(_generate_chunk, tasks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(workers, n_chunks))
+        results = pool.map(_generate_chunk, tasks)
+
+    try:
+        if fmt == "parquet":
+            for _ in results:
+                pass
+            return data_file
+
+        # Stitch part files together in chunk order as they complete
+        with open(data_file, "w", newline="", encoding="utf-8") as out:
+            if fmt == "csv":
+                csv.writer(out).writerow(FIELD_NAMES)
+            for part_file, _ in results:
+                with open(part_file, "r", newline="", encoding="utf-8") as part:
+                    shutil.copyfileobj(part, out, 1024 * 1024)
+                part_file.unlink()
+        parts_folder.rmdir()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return data_file
+
+#####################################
+# Command Line Interface
+#####################################
+
+def parse_args(argv=None):
+    """Parse command line options for bulk generation."""
+    parser = argparse.ArgumentParser(description="Generate synthetic rafting feedback.")
+    parser.add_argument("--count", type=int, help="Number of records (enables bulk mode).")
+    parser.add_argument("--output", default=None, help="Output file (directory for Parquet).")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible output.")
+    parser.add_argument("--negative-ratio", type=float, default=DEFAULT_NEGATIVE_RATIO, help="Fraction of negative records.")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS, default=None, help="Output format (default: from suffix).")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Records per chunk.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--overwrite", action="store_true", help="Replace the part files of an existing Parquet directory.")
+    return parser.parse_args(argv)
+
+
 # Example usage:
 if __name__ == "__main__":
-    generated_file = generate_rafting_feedback()
+    args = parse_args()
+    if args.count is None:
+        generated_file = generate_rafting_feedback()
+    else:
+        # With --output, leave the format to its suffix unless --format is given
+        generated_file = generate_rafting_feedback_bulk(
+            args.count,
+            output_file=args.output or f"data/all_rafting_remarks.{args.format or 'jsonl'}",
+            seed=args.seed,
+            negative_ratio=args.negative_ratio,
+            fmt=args.format,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            overwrite=args.overwrite,
+        )
     print(f"Generated rafting feedback file: {generated_file}")
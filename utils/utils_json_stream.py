@@ -0,0 +1,131 @@
+"""
+utils_json_stream.py - incremental JSON record reader for producers.
+
+Yields records from a data file as they are parsed, instead of calling
+json.load() on the whole file. Memory stays proportional to the largest
+single record (plus one read chunk), and the first record is available
+as soon as it has been read.
+
+Supported layouts:
+- A top-level JSON array, e.g. `json.dump(records, f, indent=4)`.
+- JSON Lines (one object per line), or any sequence of concatenated
+  JSON values separated by whitespace.
+
+Usage:
+    from utils.utils_json_stream import iter_json_records
+    for record in iter_json_records("data/all_rafting_remarks.json"):
+        producer.send(topic, value=record)
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import json
+
+#####################################
+# Default Configurations
+#####################################
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\r\n"
+_ARRAY_SEPARATORS = " \t\r\n,"
+
+#####################################
+# Streaming Reader
+#####################################
+
+def iter_json_records(file_path, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Yield JSON records from a file one at a time.
+
+    The layout is detected from the first non-whitespace character: `[` means
+    a JSON array, anything else is read as JSON Lines / concatenated values.
+
+    Args:
+        file_path: Path to the JSON or JSONL file.
+        chunk_size (int): Characters to read from disk at a time.
+
+    Yields:
+        The parsed records (usually dicts).
+
+    Raises:
+        json.JSONDecodeError: If the file contains invalid or truncated JSON.
+    """
+    decoder = json.JSONDecoder()
+
+    with open(file_path, "r", encoding="utf-8-sig") as f:
+        buf = ""
+        pos = 0
+        eof = False
+        read_size = chunk_size
+
+        # Find the first non-whitespace character to pick the layout
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            more = f.read(chunk_size)
+            eof = not more
+            buf = buf[pos:] + more
+            pos = 0
+
+        if pos >= len(buf):
+            return  # Empty file
+
+        in_array = buf[pos] == "["
+        if in_array:
+            pos += 1
+        separators = _ARRAY_SEPARATORS if in_array else _WHITESPACE
+
+        while True:
+            while pos < len(buf) and buf[pos] in separators:
+                pos += 1
+
+            if pos >= len(buf):
+                if eof:
+                    if in_array:
+                        raise json.JSONDecodeError("Unterminated JSON array", buf, pos)
+                    return
+                more = f.read(read_size)
+                eof = not more
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+
+            if in_array and buf[pos] == "]":
+                return
+
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # The record continues past the buffer; read more and retry.
+                # Doubling the read size keeps very large records linear overall.
+                more = f.read(read_size)
+                eof = not more
+                read_size *= 2
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+
+            # A number at the very end of the buffer may have been cut mid-digit
+            if end == len(buf) and not eof:
+                more = f.read(read_size)
+                if more:
+                    buf = buf[pos:] + more
+                    pos = 0
+                    continue
+                eof = True
+
+            yield record
+            pos = end
+            read_size = chunk_size
+
+            # Drop consumed text so the buffer stays around one chunk in size
+            if pos > chunk_size:
+                buf = buf[pos:]
+                pos = 0
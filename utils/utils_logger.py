@@ -4,12 +4,38 @@ File: utils/utils_logger.py
 
 This script provides logging functions for the rafting project.
 Logs all rafting feedback (positive & negative) and flags negative comments with 🛑.
+
+Set LOG_ASYNC=true to write the log file from a background thread: records
+go through a bounded queue (LOG_QUEUE_SIZE) and are written in batches
+(LOG_BATCH_SIZE). When the queue is full, LOG_OVERFLOW_POLICY decides whether
+callers wait ("block") or the record is dropped and counted ("drop").
+
+LOG_MODULE_LEVELS sets levels per module, e.g.
+"INFO,consumers.rafting_consumer=WARNING" (an entry without "=" sets the
+default level).
+
+Alongside the text log, log_event() appends one JSON object per line to
+logs/rafting_events.jsonl (LOG_EVENTS=false turns it off). The CSV
+converter reads this event stream instead of parsing the text log. Events
+are always written by a background thread and flushed at most every
+EVENTS_FLUSH_SECONDS, so the producer and consumer hot paths never wait on
+disk I/O for them. LOG_OVERFLOW_POLICY does not apply: events are never
+dropped, since each one becomes a CSV row.
 """
 
 # Imports from Python Standard Library
+import atexit
+import json
+import os
 import pathlib
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
 
 # Imports from external packages
+from dotenv import load_dotenv
 from loguru import logger
 
 # Get this file name without the extension
@@ -21,6 +47,219 @@ LOG_FOLDER: pathlib.Path = pathlib.Path("logs")
 # Set the name of the rafting log file
 LOG_FILE: pathlib.Path = LOG_FOLDER.joinpath("rafting_project_log.log")
 
+# Set the name of the structured event stream
+EVENTS_FILE: pathlib.Path = LOG_FOLDER.joinpath("rafting_events.jsonl")
+
+# Load logging options from .env before the sinks are configured
+load_dotenv()
+
+DEFAULT_LOG_QUEUE_SIZE = 10000
+DEFAULT_LOG_BATCH_SIZE = 256
+EVENTS_FLUSH_SECONDS = 1.0
+OVERFLOW_POLICIES = ("block", "drop")
+
+
+def get_log_async() -> bool:
+    """Fetch whether the log file is written by a background thread."""
+    return os.getenv("LOG_ASYNC", "false").strip().lower() in ("1", "true", "yes")
+
+
+def get_log_queue_size() -> int:
+    """Fetch the maximum number of records waiting to be written."""
+    return int(os.getenv("LOG_QUEUE_SIZE", DEFAULT_LOG_QUEUE_SIZE))
+
+
+def get_log_batch_size() -> int:
+    """Fetch the maximum number of records written per batch."""
+    return int(os.getenv("LOG_BATCH_SIZE", DEFAULT_LOG_BATCH_SIZE))
+
+
+def get_log_overflow_policy() -> str:
+    """Fetch what happens when the log queue is full: 'block' or 'drop'."""
+    policy = os.getenv("LOG_OVERFLOW_POLICY", "block").strip().lower()
+    return policy if policy in OVERFLOW_POLICIES else "block"
+
+
+def get_log_events() -> bool:
+    """Fetch whether to write the structured JSONL event stream."""
+    return os.getenv("LOG_EVENTS", "true").strip().lower() in ("1", "true", "yes")
+
+
+def get_log_module_levels() -> dict:
+    """
+    Fetch per-module log levels for a loguru filter dict.
+
+    Entries with an unknown level are logged and skipped, so a typo never
+    leaves the logger without its sinks.
+
+    Returns:
+        dict: module name -> level ("" holds the default level, if one was given).
+    """
+    levels = {}
+    for entry in os.getenv("LOG_MODULE_LEVELS", "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        module, _, level = entry.rpartition("=")
+        level = level.strip().upper()
+        try:
+            logger.level(level)
+        except ValueError:
+            logger.error(f"Ignoring LOG_MODULE_LEVELS entry '{entry}': unknown level '{level}'")
+            continue
+        levels[module.strip()] = level
+    return levels
+
+
+def lowest_level(levels: dict) -> int:
+    """Return the lowest severity in a filter dict, so the sink level never hides a module level."""
+    return min(logger.level(level).no for level in levels.values())
+
+#####################################
+# Background File Sink
+#####################################
+
+_STOP = object()
+
+
+class BackgroundFileSink:
+    """
+    Loguru sink that appends records to a file from a background thread.
+
+    Records wait in a bounded queue and are written in batches, so callers
+    never wait on disk I/O unless the queue fills up under the "block" policy.
+    With flush_seconds > 0, written batches are flushed to the file at most
+    that often (and when the sink is closed) instead of after every batch.
+    """
+
+    def __init__(self, path, queue_size: int = DEFAULT_LOG_QUEUE_SIZE,
+                 batch_size: int = DEFAULT_LOG_BATCH_SIZE, policy: str = "block",
+                 flush_seconds: float = 0.0):
+        self.path = pathlib.Path(path)
+        self.queue_size = max(1, queue_size)
+        self.batch_size = max(1, batch_size)
+        self.policy = policy
+        self.flush_seconds = max(0.0, float(flush_seconds))
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self._inherited = []
+        self._start()
+        # A forked worker process gets its own queue, file handle, and writer
+        # thread. multiprocessing children leave through os._exit, which skips
+        # atexit, so they must call close_log_sinks() before returning.
+        os.register_at_fork(after_in_child=self._start_in_child)
+
+    def _start(self) -> None:
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._file = open(self.path, mode="a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def _start_in_child(self) -> None:
+        """Restart in a forked child without writing the parent's buffered records again."""
+        # The inherited file object still buffers records the parent flushes
+        # itself. Point its descriptor at /dev/null and keep it referenced,
+        # so it is never collected and flushed into the log.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, self._file.fileno())
+        os.close(devnull)
+        self._inherited.append(self._file)
+        self._start()
+
+    def write(self, message) -> None:
+        """Queue one formatted record (called by loguru)."""
+        if self.policy == "drop":
+            try:
+                self._queue.put_nowait(message)
+            except queue.Full:
+                self.dropped += 1
+                return
+        else:
+            self._queue.put(message)
+        self.enqueued += 1
+
+    def _run(self) -> None:
+        """Write queued records in batches until stopped."""
+        stopping = False
+        unflushed = False
+        next_flush = 0.0
+        while not stopping:
+            if unflushed:
+                try:
+                    batch = [self._queue.get(timeout=max(0.0, next_flush - time.monotonic()))]
+                except queue.Empty:
+                    batch = []
+            else:
+                batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [record for record in batch if record is not _STOP]
+            if batch:
+                self._file.write("".join(batch))
+                self.written += len(batch)
+                if not unflushed:
+                    unflushed = True
+                    next_flush = time.monotonic() + self.flush_seconds
+            if unflushed and (stopping or time.monotonic() >= next_flush):
+                self._file.flush()
+                unflushed = False
+
+    def stats(self) -> dict:
+        """Return counters: records enqueued, written, dropped, and currently queued."""
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+        }
+
+    def close(self) -> None:
+        """Write everything still queued, then close the file."""
+        if self._file.closed:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout=10)
+        if self.dropped:
+            self._file.write(f"Log writer dropped {self.dropped} records under load.\n")
+        self._file.close()
+
+
+background_sink = None
+background_handler_id = None
+event_sink = None
+
+
+def get_log_stats() -> dict:
+    """Return the background sink counters (empty when LOG_ASYNC is off)."""
+    return background_sink.stats() if background_sink is not None else {}
+
+
+def close_log_sinks() -> None:
+    """
+    Write everything still queued and close the log and event files.
+
+    Runs at exit in the main process. multiprocessing workers exit without
+    running atexit handlers, so they call this before their target returns.
+    """
+    global background_handler_id, event_sink
+    if background_handler_id is not None:
+        logger.remove(background_handler_id)
+        background_handler_id = None
+        background_sink.close()
+    if event_sink is not None:
+        sink, event_sink = event_sink, None
+        sink.close()
+
+#####################################
+# Configure Sinks
+#####################################
+
 # Ensure the log folder exists or create it
 try:
     LOG_FOLDER.mkdir(exist_ok=True)
@@ -30,11 +269,56 @@ except Exception as e:
 
 # Configure Loguru to write to the rafting log file
 try:
-    logger.add(LOG_FILE, level="INFO", format="{time} | {level} | {message}")
-    logger.info(f"Logging rafting feedback to file: {LOG_FILE}")
+    module_levels = get_log_module_levels()
+    file_levels = {"": "INFO", **module_levels}
+    if module_levels:
+        # Apply the per-module levels to the console as well
+        console_levels = {"": "DEBUG", **module_levels}
+        logger.remove()
+        logger.add(sys.stderr, level=lowest_level(console_levels), filter=console_levels)
+
+    if get_log_async():
+        background_sink = BackgroundFileSink(
+            LOG_FILE, get_log_queue_size(), get_log_batch_size(), get_log_overflow_policy()
+        )
+        background_handler_id = logger.add(background_sink.write, level=lowest_level(file_levels),
+                                           filter=file_levels, format="{time} | {level} | {message}")
+        logger.info(f"Logging rafting feedback to file in the background: {LOG_FILE} "
+                    f"(queue {background_sink.queue_size}, policy {background_sink.policy})")
+    else:
+        logger.add(LOG_FILE, level=lowest_level(file_levels), filter=file_levels,
+                   format="{time} | {level} | {message}")
+        logger.info(f"Logging rafting feedback to file: {LOG_FILE}")
 except Exception as e:
     logger.error(f"Error configuring logger to write to file: {e}")
 
+# Configure the structured event stream (always written in the background)
+try:
+    if get_log_events():
+        event_sink = BackgroundFileSink(
+            # Always "block": the CSV converter builds its rows from these events
+            EVENTS_FILE, get_log_queue_size(), get_log_batch_size(), "block",
+            flush_seconds=EVENTS_FLUSH_SECONDS,
+        )
+except Exception as e:
+    logger.error(f"Error opening event stream {EVENTS_FILE}: {e}")
+
+atexit.register(close_log_sinks)
+
+
+def log_event(event: str, **fields) -> None:
+    """
+    Append one structured event to the JSONL event stream.
+
+    Args:
+        event (str): Event type, e.g. "sent" or "processed".
+        **fields: JSON-serialisable event fields.
+    """
+    if event_sink is None:
+        return
+    record = {"time": datetime.now().isoformat(), "event": event, **fields}
+    event_sink.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
 
 def log_feedback(guide: str, comment: str, is_negative: bool, trip_date: str, weather_summary: str, river_summary: str) -> None:
     """
@@ -0,0 +1,197 @@
+"""
+utils_metrics.py - lightweight throughput and latency metrics.
+
+Used by producers and consumers to report achieved messages/sec and
+latency percentiles, periodically or at the end of a run, without logging
+per message.
+
+Usage:
+    from utils.utils_metrics import SendStats
+    stats = SendStats()
+    future = producer.send(topic, value=record)
+    stats.track(future)
+    ...
+    logger.info(stats.summary())
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import math
+import time
+from array import array
+
+#####################################
+# Percentiles
+#####################################
+
+def percentile(sorted_values, pct: float) -> float:
+    """
+    Return the nearest-rank percentile of an already-sorted sequence.
+
+    Args:
+        sorted_values: Values sorted ascending.
+        pct (float): Percentile between 0 and 100.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+#####################################
+# Send Statistics
+#####################################
+
+class SendStats:
+    """
+    Track producer sends, delivery latency, and failures.
+
+    Latency is measured from the send() call to the broker acknowledgement
+    (the delivery callback) and stored compactly as doubles in milliseconds.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.sent = 0
+        self.delivered = 0
+        self.failed = 0
+        self.latencies_ms = array("d")
+
+    def track(self, future) -> None:
+        """Attach delivery callbacks to a send future and count the send."""
+        self.sent += 1
+        send_time = time.perf_counter()
+
+        def on_success(_metadata):
+            self.delivered += 1
+            self.latencies_ms.append((time.perf_counter() - send_time) * 1000.0)
+
+        def on_error(_exc):
+            self.failed += 1
+
+        future.add_callback(on_success)
+        future.add_errback(on_error)
+
+    def stop(self) -> None:
+        """Mark the end of the measured run."""
+        self.finished = time.perf_counter()
+
+    def snapshot(self) -> dict:
+        """Return the run's throughput and latency percentiles as a dict."""
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        latencies = sorted(self.latencies_ms)
+        return {
+            "sent": self.sent,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "elapsed_s": round(elapsed, 3),
+            "msgs_per_sec": round(self.delivered / elapsed, 1) if elapsed > 0 else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+        }
+
+    def summary(self) -> str:
+        """Return a one-line, human-readable run report."""
+        s = self.snapshot()
+        return (
+            f"📈 Sent {s['sent']} | Delivered {s['delivered']} | Failed {s['failed']} | "
+            f"{s['msgs_per_sec']} msgs/sec over {s['elapsed_s']}s | "
+            f"send latency p50 {s['p50_ms']} ms, p99 {s['p99_ms']} ms"
+        )
+
+
+#####################################
+# Throughput Counter
+#####################################
+
+class ThroughputCounter:
+    """Count processed messages and report the rate at most once per interval."""
+
+    def __init__(self, report_seconds: float = 10.0):
+        self.report_seconds = report_seconds
+        self.started = time.perf_counter()
+        self.total = 0
+        self._window_start = self.started
+        self._window_count = 0
+
+    def add(self, count: int = 1) -> None:
+        """Record that `count` more messages were processed."""
+        self.total += count
+        self._window_count += count
+
+    def overall_rate(self) -> float:
+        """Messages/sec since the counter was created."""
+        elapsed = time.perf_counter() - self.started
+        return self.total / elapsed if elapsed > 0 else 0.0
+
+    def maybe_report(self):
+        """
+        Return a report line if the interval has passed, otherwise None.
+
+        The line gives the rate over the last interval and the running total.
+        """
+        now = time.perf_counter()
+        elapsed = now - self._window_start
+        if elapsed < self.report_seconds:
+            return None
+        rate = self._window_count / elapsed if elapsed > 0 else 0.0
+        self._window_start = now
+        self._window_count = 0
+        return f"📈 {rate:.1f} msgs/sec over the last {elapsed:.1f}s | total {self.total}"
+
+
+#####################################
+# Periodic Summary Reporter
+#####################################
+
+class SummaryReporter:
+    """
+    Decide when to emit a periodic summary: every N messages or every T
+    seconds, whichever comes first.
+
+    Replaces per-message dumps of aggregate state, so the logging cost no
+    longer grows with the size of the aggregates.
+    """
+
+    def __init__(self, every_messages: int = 1000, every_seconds: float = 30.0):
+        """
+        Args:
+            every_messages (int): Report after this many messages (0 disables).
+            every_seconds (float): Report after this many seconds (0 disables).
+        """
+        self.every_messages = every_messages
+        self.every_seconds = every_seconds
+        self.total = 0
+        self._interval_count = 0
+        self._interval_start = time.monotonic()
+
+    def tick(self, count: int = 1):
+        """
+        Record processed messages.
+
+        Returns:
+            dict: A metrics snapshot if a report is due, otherwise None.
+        """
+        self.total += count
+        self._interval_count += count
+        if self.every_messages and self._interval_count >= self.every_messages:
+            return self.snapshot()
+        if self.every_seconds and time.monotonic() - self._interval_start >= self.every_seconds:
+            return self.snapshot()
+        return None
+
+    def snapshot(self) -> dict:
+        """Return throughput for the interval since the last report and start a new interval."""
+        now = time.monotonic()
+        elapsed = now - self._interval_start
+        snapshot = {
+            "messages": self.total,
+            "interval_messages": self._interval_count,
+            "interval_seconds": round(elapsed, 3),
+            "msgs_per_sec": round(self._interval_count / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        self._interval_start = now
+        self._interval_count = 0
+        return snapshot
@@ -0,0 +1,302 @@
+"""
+utils_negative_feedback.py - batched, append-only persistence for negative feedback.
+
+Negative feedback records are handed to a background writer thread and
+appended to a JSON Lines file (`negative_feedback.jsonl`) in batches, so the
+consume loop never waits on disk. A batch is flushed when it reaches a
+record count or when a time limit passes, whichever comes first.
+
+The JSON Lines file is periodically compacted into the familiar
+`negative_feedback.json` array (indent=4) for analysis tools, and once more
+when the writer is closed. Compaction appends only the records written since
+the last compaction and then removes them from the JSON Lines file, so its
+cost follows the new records rather than the whole history.
+
+Usage:
+    from utils.utils_negative_feedback import NegativeFeedbackWriter
+    writer = NegativeFeedbackWriter("negative_feedback.json")
+    writer.start()
+    writer.submit({"guide": "Ava", "comment": "Too short.", "is_negative": True})
+    writer.close()
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import json
+import os
+import pathlib
+import queue
+import textwrap
+import threading
+import time
+
+from utils.utils_logger import logger
+
+#####################################
+# Default Configurations
+#####################################
+
+DEFAULT_FLUSH_COUNT = 100
+DEFAULT_FLUSH_SECONDS = 5.0
+DEFAULT_COMPACT_SECONDS = 300.0
+
+# Sentinel placed on the queue to ask the writer thread to stop
+_STOP = object()
+
+#####################################
+# Compaction
+#####################################
+
+def _quarantine(json_file: pathlib.Path) -> None:
+    """Move an unreadable JSON file aside so compaction can start a fresh array."""
+    aside = json_file.with_name(f"{json_file.name}.corrupt-{time.strftime('%Y%m%d%H%M%S')}")
+    os.replace(json_file, aside)
+    logger.error(f"{json_file} is not a JSON array; moved it to {aside} and starting a new one")
+
+
+def _array_prefix(json_file: pathlib.Path):
+    """
+    Locate the closing bracket of an existing JSON array file.
+
+    A missing or empty file is treated as a fresh array; any other file that
+    is not a JSON array is quarantined (renamed aside) and replaced.
+
+    Returns:
+        tuple: (bytes to keep before the closing bracket, whether the array has records).
+    """
+    if not json_file.exists():
+        return 0, False
+    size = json_file.stat().st_size
+    with open(json_file, "rb") as f:
+        head = f.read(64).lstrip()
+        f.seek(max(0, size - 4096))
+        tail = f.read()
+    stripped = tail.rstrip()
+    if not head:
+        return 0, False
+    if not head.startswith(b"[") or not stripped.endswith(b"]"):
+        _quarantine(json_file)
+        return 0, False
+    before = stripped[:-1].rstrip()
+    return size - len(tail) + len(before), not before.endswith(b"[")
+
+
+def _read_journal(journal: pathlib.Path):
+    """Return the (keep, has_records) saved by an interrupted compaction, or None."""
+    try:
+        keep, has_records = journal.read_text(encoding="utf-8").split()
+        return int(keep), has_records == "1"
+    except (OSError, ValueError):
+        return None
+
+
+def _write_journal(journal: pathlib.Path, keep: int, has_records: bool) -> None:
+    """Durably record where the array ended before a compaction starts appending."""
+    with open(journal, "w", encoding="utf-8") as f:
+        f.write(f"{keep} {int(has_records)}\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def compact_jsonl_to_json(jsonl_file, json_file) -> int:
+    """
+    Append the records of a JSON Lines file to an indented JSON array, then remove them.
+
+    The JSONL file is first renamed aside and the array's end offset is
+    journaled before anything is appended. The closing bracket is then
+    truncated, the new records and a new bracket are appended in place and
+    fsynced, so the cost follows the new records rather than the array size.
+    If a compaction is interrupted at any point, the next call truncates the
+    array back to the journaled offset and appends the same batch again, so
+    every record lands in `json_file` exactly once. While appending, readers
+    may briefly see an array without its closing bracket.
+
+    Returns:
+        int: Number of records appended.
+    """
+    jsonl_file = pathlib.Path(jsonl_file)
+    json_file = pathlib.Path(json_file)
+    compacting = jsonl_file.with_name(jsonl_file.name + ".compacting")
+    journal = compacting.with_name(compacting.name + ".offset")
+    resumed = compacting.exists()
+    if not resumed:
+        # A journal without its batch belongs to a compaction that already finished
+        journal.unlink(missing_ok=True)
+        if not jsonl_file.exists():
+            return 0
+        os.replace(jsonl_file, compacting)
+
+    saved = _read_journal(journal) if resumed else None
+    if saved is None:
+        keep, has_records = _array_prefix(json_file)
+        _write_journal(journal, keep, has_records)
+    else:
+        keep, has_records = saved
+
+    count = 0
+    with open(json_file, "a+b") as dst:
+        dst.truncate(keep)
+        if not keep:
+            dst.write(b"[")
+        with open(compacting, "r", encoding="utf-8") as src:
+            for line in src:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash; skip it rather than fail compaction
+                    logger.warning(f"Skipping unreadable line in {jsonl_file}")
+                    continue
+                dst.write(b",\n" if has_records or count else b"\n")
+                dst.write(textwrap.indent(json.dumps(record, indent=4), "    ").encode("utf-8"))
+                count += 1
+        dst.write(b"\n]" if has_records or count else b"]")
+        dst.flush()
+        os.fsync(dst.fileno())
+
+    # Drop the batch before its journal: a journal alone is ignored on the next call
+    compacting.unlink()
+    journal.unlink()
+    if resumed:
+        # Records appended since the interrupted compaction
+        count += compact_jsonl_to_json(jsonl_file, json_file)
+    return count
+
+#####################################
+# Background Writer
+#####################################
+
+class NegativeFeedbackWriter:
+    """Append negative feedback to JSON Lines from a background thread."""
+
+    def __init__(
+        self,
+        json_file="negative_feedback.json",
+        jsonl_file=None,
+        flush_count: int = DEFAULT_FLUSH_COUNT,
+        flush_seconds: float = DEFAULT_FLUSH_SECONDS,
+        compact_seconds: float = DEFAULT_COMPACT_SECONDS,
+    ):
+        """
+        Args:
+            json_file: Compacted JSON array kept for analysis tools.
+            jsonl_file: Append-only log. Defaults to `json_file` with a `.jsonl` suffix.
+            flush_count (int): Flush once this many records are pending.
+            flush_seconds (float): Flush pending records at least this often.
+            compact_seconds (float): Compact the JSONL into `json_file` this often (0 = only on close).
+        """
+        self.json_file = pathlib.Path(json_file)
+        self.jsonl_file = pathlib.Path(jsonl_file) if jsonl_file else self.json_file.with_suffix(".jsonl")
+        self.flush_count = max(1, int(flush_count))
+        self.flush_seconds = float(flush_seconds)
+        self.compact_seconds = float(compact_seconds)
+
+        self.records_written = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="negative-feedback-writer", daemon=True)
+
+    def start(self) -> None:
+        """Start the background writer thread."""
+        self._thread.start()
+        logger.info(
+            f"📂 Negative feedback writer started: {self.jsonl_file} "
+            f"(flush every {self.flush_count} records or {self.flush_seconds}s)"
+        )
+
+    def submit(self, record: dict) -> None:
+        """Queue a record for writing. Never blocks the caller on disk I/O."""
+        self._queue.put(record)
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """
+        Wait until every record submitted so far has been appended to the JSONL file.
+
+        Returns:
+            bool: True if the writer confirmed the flush within `timeout` seconds.
+        """
+        if not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """Flush everything still queued, compact, and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._compact()
+        logger.info(f"📂 Negative feedback log saved to {self.json_file} ({self.records_written} new records)")
+
+    def _flush(self, pending: list) -> None:
+        """Append a batch of records to the JSONL file in a single write."""
+        if not pending:
+            return
+        lines = "".join(json.dumps(record) + "\n" for record in pending)
+        with open(self.jsonl_file, "a", encoding="utf-8") as f:
+            f.write(lines)
+        self.records_written += len(pending)
+        pending.clear()
+
+    def _compact(self) -> bool:
+        """Compact the JSONL file into the JSON array, logging (not raising) failures."""
+        try:
+            compact_jsonl_to_json(self.jsonl_file, self.json_file)
+        except Exception as e:
+            logger.error(f"Error compacting negative feedback log: {e}")
+            return False
+        return True
+
+    def _run(self) -> None:
+        """Writer loop: batch queued records and flush them by count or time."""
+        pending: list = []
+        next_flush = 0.0
+        next_compact = time.monotonic() + self.compact_seconds
+        # Records (or a previous run's leftovers) not yet compacted
+        uncompacted = self.jsonl_file.exists()
+        flushed = None
+        stopping = False
+
+        while not stopping:
+            # Wake up only for a due flush or compaction; otherwise block until a record arrives
+            if pending:
+                timeout = max(0.0, next_flush - time.monotonic())
+            elif uncompacted and self.compact_seconds > 0:
+                timeout = max(0.0, next_compact - time.monotonic())
+            else:
+                timeout = None
+            try:
+                item = self._queue.get(timeout=timeout)
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    # flush() request: write what is pending now, then confirm
+                    flushed = item
+                else:
+                    if not pending:
+                        next_flush = time.monotonic() + self.flush_seconds
+                    pending.append(item)
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            if pending and (stopping or flushed is not None or len(pending) >= self.flush_count or now >= next_flush):
+                try:
+                    self._flush(pending)
+                    uncompacted = True
+                except Exception as e:
+                    logger.error(f"Error writing negative feedback to {self.jsonl_file}: {e}")
+                    # Keep the batch and retry after another interval
+                    next_flush = now + self.flush_seconds
+
+            if flushed is not None and not pending:
+                flushed.set()
+                flushed = None
+
+            if not stopping and uncompacted and self.compact_seconds > 0 and now >= next_compact:
+                uncompacted = not self._compact()
+                next_compact = now + self.compact_seconds
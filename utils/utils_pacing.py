@@ -0,0 +1,136 @@
+"""
+utils_pacing.py - message pacing for producers.
+
+Provides a token-bucket rate limiter so producers can send at a steady
+messages-per-second rate (or as fast as possible) instead of sleeping a
+fixed interval after every message, and a replay pacer that reproduces the
+spacing of the records' original timestamps.
+
+Usage:
+    from utils.utils_pacing import TokenBucket
+    bucket = TokenBucket(rate=500)   # 500 msgs/sec; rate=0 means unlimited
+    for record in records:
+        bucket.acquire()
+        producer.send(topic, value=record)
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import time
+from datetime import datetime
+
+#####################################
+# Token Bucket Rate Limiter
+#####################################
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `burst`. Each
+    acquire() takes one token, sleeping only when the bucket is empty, so
+    short bursts are smoothed without a sleep per message.
+    """
+
+    def __init__(self, rate: float, burst: float = None):
+        """
+        Args:
+            rate (float): Tokens (messages) per second. 0 or less disables limiting.
+            burst (float, optional): Bucket capacity. Defaults to one second of tokens (min 1).
+        """
+        self.rate = float(rate)
+        self.burst = float(burst) if burst else max(1.0, self.rate)
+        self._tokens = self.burst if self.rate > 0 else 0.0
+        self._last = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        """True when the bucket does not limit the rate at all."""
+        return self.rate <= 0
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens from the bucket, sleeping until enough are available.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        if self.unlimited:
+            return 0.0
+
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+        self._tokens -= tokens
+        if self._tokens >= 0:
+            return 0.0
+
+        # Sleep just long enough for the deficit to refill
+        wait = -self._tokens / self.rate
+        time.sleep(wait)
+        self._last = time.monotonic()
+        self._tokens = 0.0
+        return wait
+
+
+#####################################
+# Timestamp Replay Pacer
+#####################################
+
+class ReplayPacer:
+    """
+    Pace records by their original timestamps.
+
+    The first record is sent immediately; each later record waits until the
+    same time has passed (divided by `speed`) as between its timestamp and
+    the first record's. Records without a parsable timestamp are not delayed.
+    """
+
+    def __init__(self, speed: float = 1.0, max_gap_seconds: float = None):
+        """
+        Args:
+            speed (float): Replay speed multiplier (2.0 = twice as fast).
+            max_gap_seconds (float, optional): Cap on any single wait.
+        """
+        self.speed = speed if speed > 0 else 1.0
+        self.max_gap_seconds = max_gap_seconds
+        self._anchor_wall = None
+        self._anchor_ts = None
+
+    def wait(self, timestamp) -> float:
+        """
+        Sleep until this record's replay time.
+
+        Args:
+            timestamp: ISO-8601 string (or datetime) from the record.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        try:
+            ts = timestamp if isinstance(timestamp, datetime) else datetime.fromisoformat(str(timestamp))
+        except ValueError:
+            return 0.0
+
+        now = time.monotonic()
+        if self._anchor_ts is None:
+            self._anchor_wall, self._anchor_ts = now, ts
+            return 0.0
+
+        try:
+            offset = (ts - self._anchor_ts).total_seconds() / self.speed
+        except TypeError:
+            return 0.0  # Mixed naive/aware timestamps
+
+        wait = self._anchor_wall + offset - now
+        if wait <= 0:
+            return 0.0
+        if self.max_gap_seconds is not None and wait > self.max_gap_seconds:
+            # Skip long idle gaps: shift the anchor so later records keep their spacing
+            self._anchor_wall -= wait - self.max_gap_seconds
+            wait = self.max_gap_seconds
+        time.sleep(wait)
+        return wait
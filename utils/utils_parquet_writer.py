@@ -0,0 +1,340 @@
+"""
+utils_parquet_writer.py - buffered, partitioned Parquet writer for sink consumers.
+
+Buffers processed feedback records, converts them to typed Arrow columns
+(timestamps, booleans, floats, dictionary-encoded categories) and writes one
+Parquet file per date partition on each flush, in a hive layout:
+
+    data/rafting_feedback_parquet/date=2025-06-01/part-00000042-<id>.parquet
+
+The guide is a dictionary-encoded column rather than a folder level, so a
+flush writes one file per day it touches, not one per (day, guide). Once a
+day collects `compact_files` files smaller than a row group, they are merged
+into a single file, which keeps the file count (and dataset open time)
+proportional to the data rather than to the number of flushes.
+
+Each file holds row groups of up to `row_group_rows` rows. Files are written
+under a hidden temporary name, fsync'ed, and renamed into place, so readers
+never see a partial file and the caller can commit Kafka offsets right after
+flush() returns. Like RollingCsvWriter, a flush is due once `flush_rows` rows
+are buffered or `flush_seconds` have passed.
+
+Readers load only the columns and partitions they need:
+
+    from utils.utils_parquet_writer import read_feedback
+    df = read_feedback("data/rafting_feedback_parquet", columns=["guide", "is_negative"],
+                       filters=[("date", ">=", "2025-06-01")])
+
+Requires pyarrow (pip install pyarrow).
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import json
+import os
+import pathlib
+import re
+import time
+import uuid
+from datetime import datetime
+
+from utils.utils_logger import logger
+
+#####################################
+# Default Configurations
+#####################################
+
+DEFAULT_FLUSH_ROWS = 5000
+DEFAULT_FLUSH_SECONDS = 30.0
+DEFAULT_ROW_GROUP_ROWS = 10000
+DEFAULT_COMPRESSION = "zstd"
+DEFAULT_COMPACT_FILES = 16
+
+PARTITION_COLUMNS = ("date",)
+
+# Compacted files list the files they replace in this schema metadata key
+COMPACTED_FROM_KEY = b"compacted_from"
+
+# Column name -> Arrow type name (see feedback_schema)
+FEEDBACK_COLUMNS = {
+    "guide": "category",
+    "timestamp": "timestamp",
+    "comment": "string",
+    "trip_type": "category",
+    "is_negative": "bool",
+    "status": "category",
+    "trip_disruption": "bool",
+    "weather": "category",
+    "temperature": "float",
+    "wind_speed": "float",
+    "rainfall": "float",
+    "river_flow": "float",
+    "water_level": "float",
+    "water_temperature": "float",
+}
+
+_UNSAFE_PATH_CHARS = re.compile(r"[\\/:*?\"<>|]")
+
+
+def _import_pyarrow():
+    """Import pyarrow lazily so the rest of the project runs without it."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet output requires pyarrow: pip install pyarrow") from e
+    return pa, pq
+
+#####################################
+# Value Conversion
+#####################################
+
+def to_timestamp(value):
+    """Parse an ISO timestamp, or return None."""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def to_float(value):
+    """Parse a number, or return None for placeholders such as "N/A"."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_bool(value) -> bool:
+    """Interpret "yes"/"true"/"possible"/True as True."""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("yes", "true", "1", "possible")
+
+
+_CONVERTERS = {
+    "timestamp": to_timestamp,
+    "string": lambda value: None if value is None else str(value),
+    "category": lambda value: None if value is None else str(value),
+    "bool": to_bool,
+    "float": to_float,
+}
+
+
+def partition_value(value) -> str:
+    """Return a partition directory value that is safe on every filesystem."""
+    text = str(value) if value not in (None, "") else "unknown"
+    return _UNSAFE_PATH_CHARS.sub("_", text)
+
+
+def feedback_schema():
+    """Return the Arrow schema of the data columns (partition columns live in the path)."""
+    pa, _ = _import_pyarrow()
+    types = {
+        "timestamp": pa.timestamp("us"),
+        "string": pa.string(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "bool": pa.bool_(),
+        "float": pa.float32(),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in FEEDBACK_COLUMNS.items()])
+
+#####################################
+# Partitioned Parquet Writer
+#####################################
+
+class PartitionedParquetWriter:
+    """Buffered writer of typed feedback records to date-partitioned Parquet files."""
+
+    def __init__(
+        self,
+        root,
+        flush_rows: int = DEFAULT_FLUSH_ROWS,
+        flush_seconds: float = DEFAULT_FLUSH_SECONDS,
+        row_group_rows: int = DEFAULT_ROW_GROUP_ROWS,
+        compression: str = DEFAULT_COMPRESSION,
+        fsync: bool = True,
+        compact_files: int = DEFAULT_COMPACT_FILES,
+    ):
+        """
+        Args:
+            root: Dataset folder (created if needed).
+            flush_rows (int): Flush once this many rows are buffered.
+            flush_seconds (float): Flush buffered rows at least this often.
+            row_group_rows (int): Maximum rows per Parquet row group.
+            compression (str): Parquet codec, e.g. "zstd", "snappy", or "none".
+            fsync (bool): fsync each file before renaming it into place.
+            compact_files (int): Merge a day's files smaller than a row group once
+                                 there are this many (0 disables compaction).
+        """
+        self._pa, self._pq = _import_pyarrow()
+        self.schema = feedback_schema()
+        self.root = pathlib.Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_seconds = float(flush_seconds)
+        self.row_group_rows = max(1, int(row_group_rows))
+        self.compression = compression
+        self.fsync = fsync
+        self.compact_files = max(0, int(compact_files))
+
+        self.rows_flushed = 0
+        self.files_written = 0
+        self._flush_seq = 0
+        # date -> column name -> list of converted values
+        self._buffers: dict = {}
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        self._finish_compactions()
+
+    def write(self, record: dict) -> bool:
+        """
+        Buffer one processed feedback record.
+
+        Returns:
+            bool: True if a flush is due.
+        """
+        key = partition_value(record.get("date"))
+        columns = self._buffers.get(key)
+        if columns is None:
+            columns = self._buffers[key] = {name: [] for name in FEEDBACK_COLUMNS}
+        for name, kind in FEEDBACK_COLUMNS.items():
+            columns[name].append(_CONVERTERS[kind](record.get(name)))
+        self._buffered += 1
+        return self._buffered >= self.flush_rows
+
+    def flush_due(self) -> bool:
+        """True when rows are buffered and the row or time threshold has been reached."""
+        return self._buffered > 0 and (
+            self._buffered >= self.flush_rows
+            or time.monotonic() - self._last_flush >= self.flush_seconds
+        )
+
+    def flush(self) -> int:
+        """
+        Write every buffered partition to its own Parquet file.
+
+        All files are written to temporary names first. If any write fails,
+        the temporary files are removed and every row stays buffered; once a
+        file has been renamed into place, its rows leave the buffer, so a
+        retry never writes them twice.
+
+        Returns:
+            int: Number of rows written.
+        """
+        self._flush_seq += 1
+        staged = []
+        try:
+            for date_value, columns in self._buffers.items():
+                folder = self.root / f"date={date_value}"
+                folder.mkdir(parents=True, exist_ok=True)
+                name = f"part-{self._flush_seq:08d}-{uuid.uuid4().hex[:8]}.parquet"
+                table = self._pa.table(columns, schema=self.schema)
+                staged.append((date_value, folder, name, self._write_temp(folder, name, table)))
+        except BaseException:
+            for *_, tmp_path in staged:
+                tmp_path.unlink(missing_ok=True)
+            raise
+
+        flushed = 0
+        for date_value, folder, name, tmp_path in staged:
+            os.replace(tmp_path, folder / name)
+            rows = len(self._buffers.pop(date_value)["timestamp"])
+            self._buffered -= rows
+            self.files_written += 1
+            self.rows_flushed += rows
+            flushed += rows
+        self._last_flush = time.monotonic()
+
+        for _, folder, _, _ in staged:
+            try:
+                self._maybe_compact(folder)
+            except Exception as e:
+                # The flushed files are already durable; compaction retries next flush
+                logger.warning(f"Parquet compaction of {folder} failed: {e}")
+        return flushed
+
+    def _write_temp(self, folder: pathlib.Path, name: str, table, metadata: dict = None) -> pathlib.Path:
+        """Write a table under a hidden temporary name and return that path."""
+        if metadata:
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+        tmp_path = folder / f".{name}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                self._pq.write_table(
+                    table, f,
+                    row_group_size=self.row_group_rows,
+                    compression=self.compression,
+                )
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return tmp_path
+
+    def _maybe_compact(self, folder: pathlib.Path) -> None:
+        """Merge a partition's small files into one once there are compact_files of them."""
+        if not self.compact_files:
+            return
+        small = [
+            path for path in sorted(folder.glob("*.parquet"))
+            if self._pq.ParquetFile(path).metadata.num_rows < self.row_group_rows
+        ]
+        if len(small) < self.compact_files:
+            return
+
+        table = self._pa.concat_tables([self._pq.ParquetFile(path).read() for path in small])
+        name = f"compact-{self._flush_seq:08d}-{uuid.uuid4().hex[:8]}.parquet"
+        sources = json.dumps([path.name for path in small]).encode("utf-8")
+        tmp_path = self._write_temp(folder, name, table, {COMPACTED_FROM_KEY: sources})
+        os.replace(tmp_path, folder / name)
+        # A crash before these unlinks is repaired by _finish_compactions on restart
+        for path in small:
+            path.unlink(missing_ok=True)
+        self.files_written += 1
+        logger.info(f"Compacted {len(small)} Parquet files ({table.num_rows} rows) into {folder / name}")
+
+    def _finish_compactions(self) -> None:
+        """Remove files a compacted file already replaced (left behind by a crash)."""
+        for path in sorted(self.root.glob("date=*/compact-*.parquet")):
+            if not path.exists():
+                continue
+            metadata = self._pq.read_schema(path).metadata or {}
+            for source in json.loads(metadata.get(COMPACTED_FROM_KEY, b"[]")):
+                leftover = path.parent / source
+                if leftover.exists():
+                    logger.warning(f"Removing {leftover}: already merged into {path.name}")
+                    leftover.unlink()
+
+    def close(self) -> None:
+        """Flush any buffered rows."""
+        if self._buffered:
+            self.flush()
+        logger.info(f"Parquet writer closed: {self.rows_flushed} rows in {self.files_written} files under {self.root}")
+
+#####################################
+# Reading
+#####################################
+
+def read_feedback(root, columns=None, filters=None):
+    """
+    Load a partitioned feedback dataset into a pandas DataFrame.
+
+    Args:
+        root: Dataset folder written by PartitionedParquetWriter.
+        columns (list, optional): Columns to load (partition columns included). Defaults to all.
+        filters (list, optional): pyarrow filters, e.g. [("guide", "==", "Jake")];
+                                  filters on "date" skip whole folders.
+
+    Returns:
+        pd.DataFrame: Categories come back as pandas categoricals.
+    """
+    _, pq = _import_pyarrow()
+    table = pq.read_table(root, columns=columns, filters=filters, partitioning="hive")
+    return table.to_pandas()
@@ -0,0 +1,419 @@
+"""
+utils_pipeline_benchmark.py - end-to-end throughput and latency benchmark.
+
+Runs the rafting pipeline over the in-memory transport (KAFKA_TRANSPORT=memory),
+one thread per stage, each running that stage's own loop (the one its main()
+runs) with a stop condition:
+
+    rafting_producer       -> rafting_feedback
+    csv_rafting_consumer   rafting_feedback -> rafting_csv_feedback (micro-batches)
+    csv_rafting_producer   rafting_csv_feedback -> processed_csv_feedback
+    csv_feedback_consumer  rafting_csv_feedback -> CSV file (temporary folder)
+
+Each dataset size runs in a fresh process and reports:
+
+- sustained msgs/sec (records through the CSV sink / elapsed time)
+- CPU seconds and microseconds per message for each stage (thread CPU time)
+- peak RSS of the run
+- p50/p99/p999 end-to-end latency (producer send -> CSV sink)
+
+The source stage is throttled when any stage falls more than --max-lag
+records behind, so memory stays bounded at large sizes. Stages share one
+interpreter, so msgs/sec is bounded by the sum of their CPU costs; the
+per-stage CPU numbers show where that cost goes. Logging is limited to
+ERROR and the JSONL event stream is off, so runs measure processing, not
+log I/O.
+
+Results can be saved as JSON baselines and later runs compared against them:
+
+    python -m utils.utils_pipeline_benchmark --records 10k,1m --save data/benchmark_baseline.json
+    python -m utils.utils_pipeline_benchmark --records 10k --compare data/benchmark_baseline.json
+
+--compare exits with status 1 when msgs/sec falls, or any stage's CPU per
+message rises, by more than --tolerance (default 10%).
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import argparse
+import json
+import os
+import pathlib
+import platform
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+from utils.utils_metrics import percentile
+
+#####################################
+# Default Configurations
+#####################################
+
+DEFAULT_RECORDS = "10k"
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_MAX_LAG = 10_000
+DEFAULT_TOLERANCE = 0.10
+CHUNK_RECORDS = 10_000
+POLL_TIMEOUT_MS = 100
+
+STAGES = ("rafting_producer", "csv_rafting_consumer", "csv_rafting_producer", "csv_feedback_consumer")
+
+# Settings applied to every benchmark process (existing environment values win)
+BENCHMARK_ENV = {
+    "KAFKA_TRANSPORT": "memory",
+    "LOG_MODULE_LEVELS": "ERROR",
+    "LOG_EVENTS": "false",
+    "CHECKPOINT_FILE": "",
+}
+
+
+def parse_count(text: str) -> int:
+    """Parse a record count such as 10000, 10k, or 1m."""
+    text = text.strip().lower().replace("_", "")
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * multiplier)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unavailable)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+#####################################
+# Pipeline Run (inside the benchmark process)
+#####################################
+
+class StageResult:
+    """Records handled and CPU time used by one stage thread."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.records = 0
+        self.cpu_s = 0.0
+        self.error = None
+        self.finished = False
+
+    def to_dict(self) -> dict:
+        return {
+            "records": self.records,
+            "cpu_s": round(self.cpu_s, 3),
+            "cpu_us_per_msg": round(self.cpu_s / self.records * 1e6, 2) if self.records else None,
+        }
+
+
+def run_pipeline(records: int, partitions: int, batch_size: int, max_lag: int) -> dict:
+    """Run every stage in its own thread over the memory broker and return the measurements."""
+    for key, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(key, value)
+
+    # Imported here so the environment above is in place before the stages load
+    import numpy as np
+
+    from consumers import csv_feedback_consumer, csv_rafting_consumer
+    from producers import csv_rafting_producer, rafting_producer
+    from utils.utils_codec import get_json_codec
+    from utils.utils_csv_writer import RollingCsvWriter
+    from utils.utils_generate_rafting_data import (
+        ALL_COMMENTS, DATE_STRINGS, DEFAULT_NEGATIVE_RATIO, GUIDES, TRIP_TYPES, _sample_columns,
+    )
+    from utils.utils_metrics import SendStats, ThroughputCounter
+    from utils.utils_pacing import TokenBucket
+    from utils.utils_producer import create_kafka_producer, create_kafka_topic
+    from utils.utils_transport import reset_memory_broker
+    from utils.utils_wire import get_wire_format
+
+    class LatencyCsvWriter(RollingCsvWriter):
+        """RollingCsvWriter that records end-to-end latency (send -> CSV row) for each row."""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.latencies_ms = []
+
+        def write(self, row) -> bool:
+            # Rows are in CSV_COLUMNS order; the first column is the send timestamp
+            sent_at = datetime.fromisoformat(row[0]).timestamp()
+            self.latencies_ms.append((time.time() - sent_at) * 1000.0)
+            return super().write(row)
+
+    broker = reset_memory_broker()
+    source_topic = csv_rafting_consumer.KAFKA_SOURCE_TOPIC
+    csv_topic = csv_rafting_consumer.KAFKA_TARGET_TOPIC
+    processed_topic = csv_rafting_producer.KAFKA_TARGET_TOPIC
+    for topic in (source_topic, csv_topic, processed_topic):
+        create_kafka_topic(topic, num_partitions=partitions)
+
+    # topic -> consumer groups reading it (for lag and retention)
+    readers = {
+        source_topic: [csv_rafting_consumer.KAFKA_GROUP_ID],
+        csv_topic: [csv_rafting_producer.KAFKA_GROUP_ID, csv_feedback_consumer.KAFKA_GROUP_ID],
+        processed_topic: [],
+    }
+    results = {name: StageResult(name) for name in STAGES}
+    latencies_ms = []
+    lag = [0]
+    stop = threading.Event()
+
+    def run_stage(result: StageResult, body) -> None:
+        start_cpu = time.thread_time()
+        try:
+            body(result)
+        except Exception as e:
+            result.error = repr(e)
+            stop.set()
+        finally:
+            result.cpu_s += time.thread_time() - start_cpu
+            result.finished = True
+
+    def stop_after(result: StageResult, upstream: str):
+        """Count polled records and stop once all arrived, or upstream finished and a poll came back empty."""
+        def should_stop(received: int) -> bool:
+            result.records += received
+            return (
+                stop.is_set()
+                or result.records >= records
+                or (not received and results[upstream].finished)
+            )
+        return should_stop
+
+    def generated_records(result: StageResult):
+        """Synthesize records in chunks, throttled by downstream lag and stamped when sent."""
+        rng = np.random.default_rng(42)
+        sent = 0
+        while sent < records and not stop.is_set():
+            # Synthesizing records is not the producer's cost; time it separately
+            started = time.thread_time()
+            count = min(CHUNK_RECORDS, records - sent)
+            columns = _sample_columns(rng, count, DEFAULT_NEGATIVE_RATIO)
+            chunk = [
+                {
+                    "comment": ALL_COMMENTS[c], "guide": GUIDES[g], "uuid": u,
+                    "date": DATE_STRINGS[d], "trip_type": TRIP_TYPES[t], "is_negative": bool(n),
+                }
+                for c, g, u, d, t, n in zip(
+                    columns["comment"], columns["guide"], columns["uuid"],
+                    columns["date"], columns["trip_type"], columns["is_negative"],
+                )
+            ]
+            result.cpu_s -= time.thread_time() - started
+            for message in chunk:
+                while lag[0] > max_lag and not stop.is_set():
+                    time.sleep(0.001)
+                if stop.is_set():
+                    return
+                message["timestamp"] = datetime.now().isoformat()
+                yield message
+            sent += count
+
+    def source(result: StageResult) -> None:
+        # rafting_producer's send loop in replay mode, unthrottled
+        producer = create_kafka_producer(codec=get_json_codec(), wire_format=get_wire_format())
+        stats = SendStats()
+        try:
+            result.records = rafting_producer.send_records(
+                producer, source_topic, generated_records(result), TokenBucket(0.0),
+                replay_mode=True, delivery_batch_size=batch_size, stats=stats,
+            )
+        finally:
+            stats.stop()
+            producer.close()
+
+    def json_to_csv(result: StageResult) -> None:
+        consumer = csv_rafting_consumer.create_consumer(enable_auto_commit=False)
+        producer = csv_rafting_consumer.create_producer()
+        try:
+            csv_rafting_consumer.consume_batches(
+                consumer, producer, batch_size, POLL_TIMEOUT_MS,
+                should_stop=stop_after(result, "rafting_producer"),
+            )
+        finally:
+            consumer.close()
+            producer.close()
+
+    def csv_processor(result: StageResult) -> None:
+        # csv_rafting_producer.run_stage with pacing off
+        consumer = csv_rafting_producer.create_consumer()
+        producer = csv_rafting_producer.create_producer()
+        try:
+            csv_rafting_producer.run_stage(
+                consumer, producer, None, batch_size, POLL_TIMEOUT_MS, ThroughputCounter(float("inf")),
+                should_stop=stop_after(result, "csv_rafting_consumer"),
+            )
+        finally:
+            consumer.close()
+            producer.close()
+
+    def csv_sink(result: StageResult, folder: str) -> None:
+        # csv_feedback_consumer's loop, with end-to-end latency taken as each row is written
+        consumer = csv_feedback_consumer.create_consumer()
+        writer = LatencyCsvWriter(pathlib.Path(folder) / "rafting_feedback.csv", csv_feedback_consumer.CSV_COLUMNS)
+        try:
+            csv_feedback_consumer.consume_to_csv(
+                consumer, writer, POLL_TIMEOUT_MS, max_records=batch_size,
+                should_stop=stop_after(result, "csv_rafting_consumer"),
+            )
+            csv_feedback_consumer.flush_and_commit(writer, consumer)
+        finally:
+            writer.close()
+            consumer.close()
+        latencies_ms.extend(writer.latencies_ms)
+
+    def housekeeping() -> None:
+        """Track the largest consumer lag and drop records every reader has committed."""
+        largest = 0
+        for topic, groups in readers.items():
+            for partition in broker.partitions_for(topic):
+                end = broker.end_offset(topic, partition)
+                committed = [broker.committed(group, topic, partition) or 0 for group in groups]
+                largest = max([largest] + [end - offset for offset in committed])
+                broker.delete_records(topic, partition, min(committed) if committed else end)
+        lag[0] = largest
+
+    with tempfile.TemporaryDirectory() as folder:
+        bodies = {
+            "rafting_producer": source,
+            "csv_rafting_consumer": json_to_csv,
+            "csv_rafting_producer": csv_processor,
+            "csv_feedback_consumer": lambda result: csv_sink(result, folder),
+        }
+        threads = [
+            threading.Thread(target=run_stage, args=(results[name], bodies[name]), name=name, daemon=True)
+            for name in STAGES
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            housekeeping()
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - started
+
+    errors = {name: result.error for name, result in results.items() if result.error}
+    if errors:
+        raise RuntimeError(f"Benchmark stage failed: {errors}")
+
+    latencies_ms.sort()
+    delivered = results["csv_feedback_consumer"].records
+    return {
+        "records": records,
+        "partitions": partitions,
+        "batch_size": batch_size,
+        "json_codec": get_json_codec().name,
+        "wire_format": get_wire_format(),
+        "elapsed_s": round(elapsed, 3),
+        "msgs_per_sec": round(delivered / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies_ms, 50), 3),
+            "p99": round(percentile(latencies_ms, 99), 3),
+            "p999": round(percentile(latencies_ms, 99.9), 3),
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {name: result.to_dict() for name, result in results.items()},
+    }
+
+#####################################
+# Baselines
+#####################################
+
+def compare_runs(baseline: dict, run: dict, tolerance: float) -> list:
+    """
+    Compare a run with its baseline.
+
+    Returns:
+        list: Regression messages (empty when within tolerance).
+    """
+    regressions = []
+    if run["msgs_per_sec"] < baseline["msgs_per_sec"] * (1 - tolerance):
+        regressions.append(f"msgs/sec {baseline['msgs_per_sec']} -> {run['msgs_per_sec']}")
+    for name, stage in run["stages"].items():
+        before = baseline.get("stages", {}).get(name, {}).get("cpu_us_per_msg")
+        after = stage.get("cpu_us_per_msg")
+        if before and after and after > before * (1 + tolerance):
+            regressions.append(f"{name} CPU {before} -> {after} us/msg")
+    return regressions
+
+
+def load_baselines(path) -> dict:
+    """Load saved baselines ({record count: run}), or {} if there are none."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("runs", {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(path, runs: dict) -> None:
+    """Save baselines with the environment they were measured in."""
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "saved_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "runs": runs,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+
+#####################################
+# Main Function
+#####################################
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the rafting pipeline end to end.")
+    parser.add_argument("--records", default=DEFAULT_RECORDS,
+                        help="Comma-separated dataset sizes, e.g. 10k,1m,10m (default: 10k).")
+    parser.add_argument("--partitions", type=int, default=1, help="Partitions per topic.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Records per consumer poll.")
+    parser.add_argument("--max-lag", type=int, default=DEFAULT_MAX_LAG,
+                        help="Throttle the source when a stage is this many records behind.")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as JSON baselines.")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against JSON baselines.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative regression for --compare (default: 0.10).")
+    args = parser.parse_args()
+
+    runs = {}
+    for records in (parse_count(text) for text in args.records.split(",")):
+        # A fresh process per size, so peak RSS belongs to that run alone
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            run = pool.submit(run_pipeline, records, args.partitions, args.batch_size, args.max_lag).result()
+        runs[str(records)] = run
+        print(json.dumps(run, indent=2))
+
+    if args.save:
+        baselines = load_baselines(args.save)
+        baselines.update(runs)
+        save_baselines(args.save, baselines)
+        print(f"✅ Saved baselines to {args.save}")
+
+    if args.compare:
+        baselines = load_baselines(args.compare)
+        failed = False
+        for records, run in runs.items():
+            if records not in baselines:
+                print(f"No baseline for {records} records in {args.compare}.")
+                continue
+            regressions = compare_runs(baselines[records], run, args.tolerance)
+            for regression in regressions:
+                print(f"❌ {records} records: {regression}")
+            failed = failed or bool(regressions)
+        if failed:
+            sys.exit(1)
+        print("✅ Within tolerance of the baselines.")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,16 +17,22 @@ from functools import wraps #used for preserving function metadata in decotators
 
 # Import external packages
 from dotenv import load_dotenv
-from kafka import KafkaProducer, KafkaConsumer, errors
+from kafka import KafkaProducer, KafkaConsumer, TopicPartition, errors
 from kafka.admin import (
     KafkaAdminClient,
     ConfigResource,
     ConfigResourceType,
+    NewPartitions,
     NewTopic,
+    OffsetSpec,
 )
 
 # Import functions from local modules
+from utils.utils_checkpoint import forget_topic_checkpoints
+from utils.utils_codec import resolve_codec
 from utils.utils_logger import logger
+from utils.utils_transport import MemoryProducer, get_memory_broker, is_memory_transport
+from utils.utils_wire import WireSerializer
 
 #####################################
 # Load Environment Variables
@@ -42,6 +48,10 @@ DEFAULT_ZOOKEEPER_ADDRESS = "localhost:2181"
 DEFAULT_KAFKA_BROKER_ADDRESS = "localhost:9092"
 DEFAULT_MAX_RETRIES = 3
 DEFAULT_RETRY_DELAY = 5
+DEFAULT_NUM_PARTITIONS = 1
+DEFAULT_CLEAR_MODE = "delete_records"
+CLEAR_MODES = ("delete_records", "recreate", "retention")
+DEFAULT_CLEAR_TIMEOUT_MS = 30000
 
 
 #####################################
@@ -89,6 +99,49 @@ def get_kafka_broker_address():
     return broker_address
 
 
+def get_producer_tuning() -> dict:
+    """
+    Fetch optional KafkaProducer batching settings from the environment.
+
+    Only settings that are present are returned, so KafkaProducer defaults apply otherwise.
+    """
+    tuning = {}
+    linger_ms = os.getenv("KAFKA_LINGER_MS")
+    batch_size = os.getenv("KAFKA_BATCH_SIZE")
+    compression_type = os.getenv("KAFKA_COMPRESSION_TYPE")
+    if linger_ms:
+        tuning["linger_ms"] = int(linger_ms)
+    if batch_size:
+        tuning["batch_size"] = int(batch_size)
+    if compression_type and compression_type.strip().lower() != "none":
+        tuning["compression_type"] = compression_type.strip().lower()
+    return tuning
+
+
+def get_kafka_num_partitions() -> int:
+    """Fetch the partition count for new topics from environment or use default."""
+    num_partitions = int(os.getenv("KAFKA_NUM_PARTITIONS", DEFAULT_NUM_PARTITIONS))
+    logger.info(f"Kafka topic partitions: {num_partitions}")
+    return num_partitions
+
+
+def get_clear_mode() -> str:
+    """Fetch how clear_kafka_topic resets topics: delete_records, recreate, or retention."""
+    mode = os.getenv("KAFKA_CLEAR_MODE", DEFAULT_CLEAR_MODE).strip().lower() or DEFAULT_CLEAR_MODE
+    if mode not in CLEAR_MODES:
+        logger.warning(f"Unknown KAFKA_CLEAR_MODE '{mode}'; using {DEFAULT_CLEAR_MODE}.")
+        mode = DEFAULT_CLEAR_MODE
+    logger.info(f"Kafka topic clear mode: {mode}")
+    return mode
+
+
+def get_clear_timeout_ms() -> int:
+    """Fetch the upper bound (milliseconds) for clearing a topic."""
+    timeout_ms = int(os.getenv("KAFKA_CLEAR_TIMEOUT_MS", DEFAULT_CLEAR_TIMEOUT_MS))
+    logger.info(f"Kafka topic clear timeout: {timeout_ms} ms")
+    return timeout_ms
+
+
 def get_zookeeper_address():
     """Fetch Zookeeper address from environment or use default."""
     zk_address = os.getenv("ZOOKEEPER_ADDRESS", "localhost:2181")
@@ -147,6 +200,10 @@ def check_kafka_service_is_ready():
 
 
 def verify_services():
+    if is_memory_transport():
+        logger.info("In-memory transport: no Zookeeper or Kafka services to verify.")
+        return
+
     # Verify Zookeeper is ready
     if not check_zookeeper_service_is_ready():
         logger.error(
@@ -162,29 +219,62 @@ def verify_services():
         sys.exit(2)
 
 @with_retries()
-def create_kafka_producer(value_serializer=None):
+def create_kafka_producer(value_serializer=None, linger_ms=None, batch_size=None, compression_type=None, codec=None,
+                          wire_format=None):
     """
     Create and return a Kafka producer instance.
 
     Args:
         value_serializer (callable): A custom serializer for message values.
                                      Defaults to UTF-8 string encoding.
+        linger_ms (int, optional): Time to wait for more records before sending a batch.
+                                   Defaults to KAFKA_LINGER_MS or the client default.
+        batch_size (int, optional): Maximum batch size in bytes per partition.
+                                    Defaults to KAFKA_BATCH_SIZE or the client default.
+        compression_type (str, optional): 'gzip', 'snappy', 'lz4', or 'zstd'.
+                                          Defaults to KAFKA_COMPRESSION_TYPE or none.
+        codec (Codec or str, optional): JSON codec for message values, e.g.
+                                        get_json_codec() or "orjson" (see utils_codec).
+                                        Used when no value_serializer is given.
+        wire_format (str, optional): With a codec, "binary" writes rafting feedback in the
+                                     compact binary format (see utils_wire); default JSON.
 
     Returns:
-        KafkaProducer: Configured Kafka producer instance.
+        KafkaProducer: Configured Kafka producer instance (a MemoryProducer
+                       when KAFKA_TRANSPORT=memory).
     """
-    kafka_broker = get_kafka_broker_address()
+    if value_serializer is None and codec is not None:
+        if wire_format == "binary":
+            value_serializer = WireSerializer(codec)
+        else:
+            value_serializer = resolve_codec(codec).encode
 
     if value_serializer is None:
 
         def value_serializer(x):
             return x.encode("utf-8")  # Default to string serialization
 
+    if is_memory_transport():
+        return MemoryProducer(value_serializer=value_serializer)
+
+    kafka_broker = get_kafka_broker_address()
+
+    tuning = get_producer_tuning()
+    if linger_ms is not None:
+        tuning["linger_ms"] = linger_ms
+    if batch_size is not None:
+        tuning["batch_size"] = batch_size
+    if compression_type is not None:
+        tuning["compression_type"] = compression_type
+    if tuning:
+        logger.info(f"Kafka producer tuning: {tuning}")
+
     try:
         logger.info(f"Connecting to Kafka broker at {kafka_broker}...")
         producer = KafkaProducer(
             bootstrap_servers=kafka_broker,
             value_serializer=value_serializer,
+            **tuning,
         )
         logger.info("Kafka producer successfully created.")
         return producer
@@ -193,13 +283,29 @@ def create_kafka_producer(value_serializer=None):
         return None
 
 @with_retries()
-def create_kafka_topic(topic_name, group_id=None):
+def create_kafka_topic(topic_name, group_id=None, num_partitions=None):
     """
     Create a fresh Kafka topic with the given name.
+
+    An existing topic is cleared, and grown to `num_partitions` if it has
+    fewer (Kafka cannot reduce a topic's partition count).
+
     Args:
         topic_name (str): Name of the Kafka topic.
+        group_id (str, optional): Consumer group used to clear an existing topic.
+        num_partitions (int, optional): Partition count. Defaults to KAFKA_NUM_PARTITIONS.
     """
     kafka_broker = get_kafka_broker_address()
+    if num_partitions is None:
+        num_partitions = get_kafka_num_partitions()
+
+    if is_memory_transport():
+        broker = get_memory_broker()
+        if topic_name in broker.topics():
+            clear_kafka_topic(topic_name, group_id)
+        broker.create_topic(topic_name, num_partitions)
+        logger.info(f"In-memory topic '{topic_name}' ready with {len(broker.partitions_for(topic_name))} partition(s).")
+        return
 
     try:
         admin_client = KafkaAdminClient(bootstrap_servers=kafka_broker)
@@ -210,10 +316,16 @@ def create_kafka_topic(topic_name, group_id=None):
             logger.info(f"Topic '{topic_name}' already exists. Clearing it out...")
             clear_kafka_topic(topic_name, group_id)
 
+            description = admin_client.describe_topics([topic_name])[0]
+            current_partitions = len(description.get("partitions", []))
+            if current_partitions < num_partitions:
+                admin_client.create_partitions({topic_name: NewPartitions(total_count=num_partitions)})
+                logger.info(f"Topic '{topic_name}' grown from {current_partitions} to {num_partitions} partitions.")
+
         else:
-            logger.info(f"Creating '{topic_name}'.")
+            logger.info(f"Creating '{topic_name}' with {num_partitions} partition(s).")
             new_topic = NewTopic(
-                name=topic_name, num_partitions=1, replication_factor=1
+                name=topic_name, num_partitions=num_partitions, replication_factor=1
             )
             admin_client.create_topics([new_topic])
             logger.info(f"Topic '{topic_name}' created successfully.")
@@ -226,53 +338,180 @@ def create_kafka_topic(topic_name, group_id=None):
         admin_client.close()
 
 @with_retries()
-def clear_kafka_topic(topic_name, group_id):
+def clear_kafka_topic(topic_name, group_id, mode=None, timeout_ms=None):
     """
-    Consume and discard all messages in the Kafka topic to clear it.
+    Remove every message from a Kafka topic, in bounded time.
+
+    Modes (KAFKA_CLEAR_MODE):
+    - delete_records: move each partition's start offset to its end offset
+      (one DeleteRecords request, independent of topic size). Falls back to
+      'recreate' if the broker refuses, e.g. for compacted topics.
+    - recreate: delete the topic and create it again with the same
+      partitions, replication factor, and config overrides. Offsets restart
+      at 0, so the topic's consumer checkpoints (CHECKPOINT_FILE) are
+      removed as well; consumers then rebuild their counts from scratch.
+    - retention: the original approach; set retention.ms=1, drain the topic
+      with a consumer (stopping at the deadline), then restore retention.
 
     Args:
         topic_name (str): Name of the Kafka topic.
-        group_id (str): Consumer group ID.
+        group_id (str): Consumer group used to drain the topic ('retention' mode).
+        mode (str, optional): Defaults to KAFKA_CLEAR_MODE.
+        timeout_ms (int, optional): Upper bound for the reset. Defaults to KAFKA_CLEAR_TIMEOUT_MS.
+
+    Returns:
+        float: Seconds the reset took.
     """
+    started = time.monotonic()
+    if is_memory_transport():
+        dropped = get_memory_broker().clear_topic(topic_name)
+        elapsed = time.monotonic() - started
+        logger.info(f"Cleared {dropped} messages from in-memory topic '{topic_name}' in {elapsed:.3f}s.")
+        return elapsed
+
+    mode = mode or get_clear_mode()
+    if mode not in CLEAR_MODES:
+        raise ValueError(f"Unknown clear mode '{mode}'. Choose from: {', '.join(CLEAR_MODES)}")
+    timeout_ms = timeout_ms or get_clear_timeout_ms()
+    deadline = started + timeout_ms / 1000.0
     kafka_broker = get_kafka_broker_address()
-    admin_client = KafkaAdminClient(bootstrap_servers=kafka_broker)
+    admin_client = KafkaAdminClient(bootstrap_servers=kafka_broker, request_timeout_ms=timeout_ms)
 
     try:
-        # Fetch the current retention period
-        config_resource = ConfigResource(ConfigResourceType.TOPIC, topic_name)
-        configs = admin_client.describe_configs([config_resource])
-        original_retention = configs[config_resource].get("retention.ms", "604800000")  # Default to 7 days
-        logger.info(f"Original retention.ms for topic '{topic_name}': {original_retention}")
+        if mode == "delete_records":
+            try:
+                removed = delete_topic_records(admin_client, topic_name, timeout_ms)
+            except errors.KafkaError as e:
+                logger.warning(f"DeleteRecords failed for '{topic_name}' ({e}); recreating the topic instead.")
+                mode = "recreate"
+        if mode == "recreate":
+            removed = recreate_topic(admin_client, topic_name, deadline)
+            forget_topic_checkpoints(topic_name)
+        elif mode == "retention":
+            removed = drain_topic_with_retention(admin_client, kafka_broker, topic_name, group_id, deadline)
+
+        elapsed = time.monotonic() - started
+        logger.info(f"✅ Topic '{topic_name}' cleared ({mode}) in {elapsed:.2f}s; {removed} messages removed.")
+        return elapsed
+
+    except Exception as e:
+        logger.error(f"Error clearing topic '{topic_name}' ({mode}): {e}")
+        return time.monotonic() - started
+    finally:
+        admin_client.close()
 
-        # Temporarily set retention to 1ms
-        admin_client.alter_configs({config_resource: {"retention.ms": "1"}})
-        logger.info(f"Retention.ms temporarily set to 1ms for topic '{topic_name}'.")
 
+def topic_partitions(admin_client, topic_name) -> list:
+    """Return the topic's partition metadata dicts (partition_index, replica_nodes, ...)."""
+    description = admin_client.describe_topics([topic_name])[0]
+    return description.get("partitions", [])
+
+
+def topic_offsets(admin_client, partitions, spec) -> dict:
+    """Return {TopicPartition: offset} for OffsetSpec.EARLIEST or OffsetSpec.LATEST."""
+    offsets = admin_client.list_partition_offsets({tp: spec for tp in partitions})
+    return {tp: result.offset for tp, result in offsets.items()}
+
+
+def delete_topic_records(admin_client, topic_name, timeout_ms) -> int:
+    """Delete every record below each partition's current end offset; returns how many were removed."""
+    partitions = [TopicPartition(topic_name, p["partition_index"]) for p in topic_partitions(admin_client, topic_name)]
+    end_offsets = topic_offsets(admin_client, partitions, OffsetSpec.LATEST)
+    start_offsets = topic_offsets(admin_client, partitions, OffsetSpec.EARLIEST)
+    to_delete = {tp: offset for tp, offset in end_offsets.items() if offset > start_offsets.get(tp, 0)}
+    if to_delete:
+        admin_client.delete_records(to_delete, timeout_ms=timeout_ms)
+    return sum(offset - start_offsets.get(tp, 0) for tp, offset in to_delete.items())
+
+
+def topic_config_overrides(admin_client, topic_name) -> dict:
+    """Return the config values set on the topic itself ({name: value})."""
+    resource = ConfigResource(ConfigResourceType.TOPIC, topic_name)
+    configs = admin_client.describe_configs([resource], config_filter="modified")
+    return {
+        name: config.get("value")
+        for name, config in configs.get("topic", {}).get(topic_name, {}).items()
+        if config.get("config_source") == "DYNAMIC_TOPIC_CONFIG"
+    }
+
+
+def recreate_topic(admin_client, topic_name, deadline: float) -> int:
+    """Delete and re-create the topic with the same layout and config; returns messages removed."""
+    partitions = topic_partitions(admin_client, topic_name)
+    tps = [TopicPartition(topic_name, p["partition_index"]) for p in partitions]
+    end_offsets = topic_offsets(admin_client, tps, OffsetSpec.LATEST)
+    start_offsets = topic_offsets(admin_client, tps, OffsetSpec.EARLIEST)
+    removed = sum(end_offsets[tp] - start_offsets.get(tp, 0) for tp in end_offsets)
+    configs = topic_config_overrides(admin_client, topic_name)
+    replication_factor = max(1, max((len(p.get("replica_nodes", [])) for p in partitions), default=1))
+
+    def remaining_ms() -> int:
+        return max(1, int((deadline - time.monotonic()) * 1000))
+
+    admin_client.delete_topics([topic_name], timeout_ms=remaining_ms())
+    # Deletion finishes asynchronously; creating too early fails with TopicAlreadyExists
+    while True:
+        try:
+            admin_client.create_topics(
+                {topic_name: {
+                    "num_partitions": len(partitions),
+                    "replication_factor": replication_factor,
+                    "configs": configs,
+                }},
+                timeout_ms=remaining_ms(),
+            )
+            break
+        except errors.TopicAlreadyExistsError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.1)
+    admin_client.wait_for_topics([topic_name], timeout_ms=remaining_ms())
+    return removed
+
+
+def drain_topic_with_retention(admin_client, kafka_broker, topic_name, group_id, deadline: float) -> int:
+    """
+    Shorten retention, consume what is left until the deadline, and restore retention.
+
+    Returns:
+        int: Messages consumed while draining.
+    """
+    resource_configs = topic_config_overrides(admin_client, topic_name)
+    original_retention = resource_configs.get("retention.ms")
+    logger.info(f"Original retention.ms for topic '{topic_name}': {original_retention or 'broker default'}")
+
+    # Temporarily set retention to 1ms
+    admin_client.alter_configs([ConfigResource(ConfigResourceType.TOPIC, topic_name, configs={"retention.ms": "1"})])
+    logger.info(f"Retention.ms temporarily set to 1ms for topic '{topic_name}'.")
+    drained = 0
+    try:
         # Wait a moment for Kafka to apply retention and delete old data
-        time.sleep(2)
+        time.sleep(min(2.0, max(0.0, deadline - time.monotonic())))
 
-        # Clear remaining messages by consuming and discarding them
-        logger.info(f"Clearing topic '{topic_name}' by consuming all messages...")
+        # Clear remaining messages by consuming and discarding them, stopping when idle or at the deadline
+        logger.info(f"Clearing topic '{topic_name}' by consuming the remaining messages...")
         consumer = KafkaConsumer(
             topic_name,
             group_id=group_id,
             bootstrap_servers=kafka_broker,
             auto_offset_reset="earliest",
             enable_auto_commit=True,
+            consumer_timeout_ms=1000,
         )
-        for message in consumer:
-            logger.debug(f"Clearing message: {message.value}")
-        consumer.close()
-        logger.info(f"All messages cleared from topic '{topic_name}'.")
-
-        # Restore the original retention period
-        admin_client.alter_configs({config_resource: {"retention.ms": original_retention}})
-        logger.info(f"Retention.ms restored to {original_retention} for topic '{topic_name}'.")
-
-    except Exception as e:
-        logger.error(f"Error managing retention for topic '{topic_name}': {e}")
+        try:
+            for message in consumer:
+                drained += 1
+                if time.monotonic() >= deadline:
+                    logger.warning(f"Stopped draining '{topic_name}' at the clear timeout.")
+                    break
+        finally:
+            consumer.close()
     finally:
-        admin_client.close()
+        # Restore the original retention period (or the broker default)
+        restore = original_retention if original_retention is not None else ("DELETE", None)
+        admin_client.alter_configs([ConfigResource(ConfigResourceType.TOPIC, topic_name, configs={"retention.ms": restore})])
+        logger.info(f"Retention.ms restored to {original_retention or 'broker default'} for topic '{topic_name}'.")
+    return drained
 
 
 #####################################
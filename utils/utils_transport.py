@@ -0,0 +1,525 @@
+"""
+utils_transport.py - pluggable message transport: Kafka or an in-memory stand-in.
+
+KAFKA_TRANSPORT selects what create_kafka_producer(), create_kafka_consumer()
+and the topic helpers in utils_producer hand out:
+
+- "kafka" (default): real KafkaProducer / KafkaConsumer objects.
+- "memory": MemoryProducer / MemoryConsumer backed by one process-wide
+  MemoryBroker. No broker, ZooKeeper, or network is needed, so stages can be
+  run, benchmarked, and profiled on a laptop, and transport overhead can be
+  measured separately from processing cost.
+
+The in-memory broker keeps Kafka's model where the stages rely on it: topics
+have partitions, each partition is an append-only log with offsets, keyed
+messages always land in the same partition, values are serialized on send
+and deserialized on receive, and consumer groups share partitions and keep
+committed offsets. It lives in one process, so every stage that should see
+the same topics must run in that process (e.g. as threads).
+
+Rebalances are applied by each consumer on its next poll, so a moved
+partition may be re-read from its last commit (at-least-once, as in Kafka).
+
+Supported API subset:
+    producer: send() -> future (get, add_callback, add_errback, failed, exception),
+              flush(), close()
+    consumer: subscribe(topics, listener), poll(timeout_ms, max_records),
+              iteration (with consumer_timeout_ms), commit(offsets), committed(),
+              seek(), position(), assignment(), close()
+
+Usage:
+    from utils.utils_transport import get_memory_broker
+    broker = get_memory_broker()
+    broker.create_topic("rafting_feedback", num_partitions=4)
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import itertools
+import os
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+from kafka.structs import OffsetAndMetadata, TopicPartition
+
+from utils.utils_logger import logger
+
+#####################################
+# Default Configurations
+#####################################
+
+TRANSPORTS = ("kafka", "memory")
+
+# Kafka's broker default (num.partitions) for topics created on first use
+DEFAULT_AUTO_CREATE_PARTITIONS = 1
+
+RecordMetadata = namedtuple("RecordMetadata", ["topic", "partition", "offset", "timestamp"])
+ConsumerRecord = namedtuple(
+    "ConsumerRecord", ["topic", "partition", "offset", "timestamp", "key", "value", "headers"]
+)
+
+#####################################
+# Getter Functions for .env Variables
+#####################################
+
+def get_kafka_transport() -> str:
+    """Fetch the message transport: 'kafka' (default) or 'memory'."""
+    transport = os.getenv("KAFKA_TRANSPORT", "kafka").strip().lower()
+    if transport not in TRANSPORTS:
+        logger.warning(f"Unknown transport '{transport}'; using 'kafka'.")
+        transport = "kafka"
+    return transport
+
+
+def is_memory_transport() -> bool:
+    """True when KAFKA_TRANSPORT=memory."""
+    return get_kafka_transport() == "memory"
+
+#####################################
+# Memory Broker
+#####################################
+
+class MemoryBroker:
+    """In-process topics (lists of partition logs), consumer groups, and committed offsets."""
+
+    def __init__(self):
+        self._lock = threading.Condition()
+        # topic -> list of partitions; each partition is a list of
+        # (timestamp_ms, key_bytes, value_bytes, headers)
+        self._topics: dict = {}
+        # topic -> offset of the first retained record, per partition
+        self._log_start: dict = {}
+        # topic -> offset of the first record still held in the list, per partition
+        # (deleted records are dropped from the list in bulk, not one by one)
+        self._base: dict = {}
+        # (group, topic, partition) -> committed next offset
+        self._committed: dict = {}
+        # group -> list of member consumers, in join order
+        self._groups: dict = {}
+        # group -> generation, bumped on every join/leave/subscribe
+        self._generations: dict = {}
+        self._round_robin = itertools.count()
+        # Bumped on every append and group change, so waiters never miss a wakeup
+        self.version = 0
+
+    # ----- topics -----
+
+    def create_topic(self, topic: str, num_partitions: int = DEFAULT_AUTO_CREATE_PARTITIONS) -> None:
+        """Create a topic, or grow an existing one to `num_partitions` (never shrinks)."""
+        with self._lock:
+            partitions = self._topics.setdefault(topic, [])
+            starts = self._log_start.setdefault(topic, [])
+            bases = self._base.setdefault(topic, [])
+            while len(partitions) < max(1, int(num_partitions)):
+                partitions.append([])
+                starts.append(0)
+                bases.append(0)
+            self._bump_subscribers(topic)
+
+    def topics(self) -> set:
+        with self._lock:
+            return set(self._topics)
+
+    def partitions_for(self, topic: str) -> set:
+        """Partition numbers of a topic (empty if it does not exist)."""
+        with self._lock:
+            return set(range(len(self._topics.get(topic, ()))))
+
+    def clear_topic(self, topic: str) -> int:
+        """
+        Drop every record in a topic; offsets keep increasing, as after Kafka's delete_records.
+
+        Returns:
+            int: Number of records dropped.
+        """
+        with self._lock:
+            dropped = 0
+            for partition in range(len(self._topics.get(topic, ()))):
+                start = self._log_start[topic][partition]
+                dropped += self.delete_records(topic, partition, self.end_offset(topic, partition)) - start
+            return dropped
+
+    def delete_records(self, topic: str, partition: int, before_offset: int) -> int:
+        """
+        Drop records before `before_offset` (like the Kafka admin call of the same name).
+
+        Returns:
+            int: The partition's new beginning offset.
+        """
+        with self._lock:
+            log = self._topics[topic][partition]
+            base = self._base[topic][partition]
+            start = min(max(self._log_start[topic][partition], before_offset), base + len(log))
+            self._log_start[topic][partition] = start
+            dead = start - base
+            if dead == len(log) or dead >= 1024 and dead * 2 >= len(log):
+                del log[:dead]
+                self._base[topic][partition] = start
+            return start
+
+    def beginning_offset(self, topic: str, partition: int) -> int:
+        with self._lock:
+            return self._log_start[topic][partition]
+
+    def end_offset(self, topic: str, partition: int) -> int:
+        with self._lock:
+            return self._base[topic][partition] + len(self._topics[topic][partition])
+
+    # ----- producing -----
+
+    def append(self, topic: str, partition, key, value, headers=None) -> RecordMetadata:
+        """Append one serialized record and wake waiting consumers."""
+        with self._lock:
+            if topic not in self._topics:
+                self.create_topic(topic)
+            partitions = self._topics[topic]
+            if partition is None:
+                if key is not None:
+                    partition = zlib.crc32(key) % len(partitions)
+                else:
+                    partition = next(self._round_robin) % len(partitions)
+            timestamp = int(time.time() * 1000)
+            log = partitions[partition]
+            log.append((timestamp, key, value, headers or []))
+            offset = self._base[topic][partition] + len(log) - 1
+            self._notify()
+        return RecordMetadata(topic, partition, offset, timestamp)
+
+    # ----- consuming -----
+
+    def fetch(self, topic: str, partition: int, offset: int, max_records: int) -> list:
+        """Return up to `max_records` raw records from `offset` as (offset, record) pairs."""
+        with self._lock:
+            base = self._base[topic][partition]
+            log = self._topics[topic][partition]
+            first = max(offset, self._log_start[topic][partition]) - base
+            return list(zip(itertools.count(base + first), log[first:first + max_records]))
+
+    def wait(self, seen_version: int, timeout: float) -> None:
+        """Block until something changed since `seen_version` (an append or group change), or `timeout` passes."""
+        with self._lock:
+            if self.version == seen_version:
+                self._lock.wait(timeout)
+
+    def _notify(self) -> None:
+        self.version += 1
+        self._lock.notify_all()
+
+    def commit(self, group_id: str, offsets: dict) -> None:
+        """Store committed next offsets: {TopicPartition: offset}."""
+        with self._lock:
+            for tp, offset in offsets.items():
+                self._committed[(group_id, tp.topic, tp.partition)] = offset
+
+    def committed(self, group_id: str, topic: str, partition: int):
+        with self._lock:
+            return self._committed.get((group_id, topic, partition))
+
+    # ----- consumer groups -----
+
+    def join(self, group_id: str, consumer) -> None:
+        with self._lock:
+            members = self._groups.setdefault(group_id, [])
+            if consumer not in members:
+                members.append(consumer)
+            self._generations[group_id] = self._generations.get(group_id, 0) + 1
+            self._notify()
+
+    def leave(self, group_id: str, consumer) -> None:
+        with self._lock:
+            members = self._groups.get(group_id, [])
+            if consumer in members:
+                members.remove(consumer)
+                self._generations[group_id] = self._generations.get(group_id, 0) + 1
+                self._notify()
+
+    def generation(self, group_id: str) -> int:
+        with self._lock:
+            return self._generations.get(group_id, 0)
+
+    def assignment_for(self, group_id: str, consumer) -> set:
+        """Spread every subscribed partition over the group's members, round robin."""
+        with self._lock:
+            members = self._groups.get(group_id, [])
+            if consumer not in members:
+                return set()
+            topics = sorted(set().union(*(member.subscription() for member in members)))
+            partitions = [
+                TopicPartition(topic, partition)
+                for topic in topics
+                for partition in range(len(self._topics.get(topic, ())))
+            ]
+            index = members.index(consumer)
+            return {tp for position, tp in enumerate(partitions) if position % len(members) == index}
+
+    def _bump_subscribers(self, topic: str) -> None:
+        """Start a new generation in groups subscribed to `topic` (its partitions changed)."""
+        for group_id, members in self._groups.items():
+            if any(topic in member.subscription() for member in members):
+                self._generations[group_id] = self._generations.get(group_id, 0) + 1
+        self._notify()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_memory_broker() -> MemoryBroker:
+    """Return the process-wide in-memory broker."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = MemoryBroker()
+            logger.info("Using the in-memory message transport.")
+        return _broker
+
+
+def reset_memory_broker() -> MemoryBroker:
+    """Replace the process-wide broker with an empty one (between benchmark runs)."""
+    global _broker
+    with _broker_lock:
+        _broker = MemoryBroker()
+        return _broker
+
+#####################################
+# Memory Producer
+#####################################
+
+class MemoryFuture:
+    """Already-resolved stand-in for kafka-python's FutureRecordMetadata."""
+
+    def __init__(self, value=None, exception=None):
+        self.value = value
+        self.exception = exception
+        self.is_done = True
+
+    def succeeded(self) -> bool:
+        return self.exception is None
+
+    def failed(self) -> bool:
+        return self.exception is not None
+
+    def get(self, timeout=None):
+        if self.exception is not None:
+            raise self.exception
+        return self.value
+
+    def add_callback(self, fn, *args, **kwargs):
+        if self.exception is None:
+            fn(*args, self.value, **kwargs)
+        return self
+
+    def add_errback(self, fn, *args, **kwargs):
+        if self.exception is not None:
+            fn(*args, self.exception, **kwargs)
+        return self
+
+
+def _serialize(serializer, topic: str, headers: list, data):
+    """Apply a serializer as KafkaProducer does: Serializer objects also see (and may add) headers."""
+    if serializer is None or data is None:
+        return data
+    if hasattr(serializer, "serialize"):
+        return serializer.serialize(topic, headers, data)
+    return serializer(data)
+
+
+def _deserialize(deserializer, topic: str, headers: list, data):
+    """Apply a deserializer as KafkaConsumer does: Deserializer objects also see the headers."""
+    if hasattr(deserializer, "deserialize"):
+        return deserializer.deserialize(topic, headers, data)
+    return deserializer(data)
+
+
+class MemoryProducer:
+    """KafkaProducer stand-in that appends to a MemoryBroker."""
+
+    def __init__(self, broker: MemoryBroker = None, value_serializer=None, key_serializer=None, **_config):
+        self.broker = broker or get_memory_broker()
+        self.value_serializer = value_serializer
+        self.key_serializer = key_serializer
+        self.sent = 0
+        self._closed = False
+
+    def send(self, topic: str, value=None, key=None, headers=None, partition=None, timestamp_ms=None):
+        """Serialize and append a record; returns a resolved future with its metadata."""
+        if self._closed:
+            return MemoryFuture(exception=RuntimeError("Producer is closed."))
+        headers = list(headers) if headers else []
+        try:
+            value_bytes = _serialize(self.value_serializer, topic, headers, value)
+            key_bytes = _serialize(self.key_serializer, topic, headers, key)
+            metadata = self.broker.append(topic, partition, key_bytes, value_bytes, headers)
+        except Exception as e:
+            return MemoryFuture(exception=e)
+        self.sent += 1
+        return MemoryFuture(metadata)
+
+    def flush(self, timeout=None) -> None:
+        """Nothing is buffered; sends are appended immediately."""
+
+    def close(self, timeout=None) -> None:
+        self._closed = True
+
+#####################################
+# Memory Consumer
+#####################################
+
+class MemoryConsumer:
+    """KafkaConsumer stand-in that reads from a MemoryBroker as part of a consumer group."""
+
+    def __init__(self, *topics, broker: MemoryBroker = None, group_id=None, value_deserializer=None,
+                 key_deserializer=None, auto_offset_reset="latest", enable_auto_commit=True,
+                 consumer_timeout_ms=float("inf"), max_poll_records=500, **_config):
+        self.broker = broker or get_memory_broker()
+        self.group_id = group_id or f"memory-consumer-{id(self)}"
+        self.value_deserializer = value_deserializer
+        self.key_deserializer = key_deserializer
+        self.auto_offset_reset = auto_offset_reset
+        self.enable_auto_commit = enable_auto_commit
+        self.consumer_timeout_ms = consumer_timeout_ms
+        self.max_poll_records = max_poll_records
+        self._topics: set = set()
+        self._listener = None
+        self._assignment: set = set()
+        self._positions: dict = {}
+        self._generation = None
+        self._iterator_buffer: list = []
+        self._closed = False
+        if topics:
+            self.subscribe(topics)
+
+    def subscription(self) -> set:
+        return set(self._topics)
+
+    def subscribe(self, topics=(), listener=None) -> None:
+        """Subscribe to topics (replacing the current subscription) and join the group."""
+        self._topics = set(topics)
+        self._listener = listener
+        for topic in self._topics:
+            if topic not in self.broker.topics():
+                self.broker.create_topic(topic)
+        self.broker.join(self.group_id, self)
+
+    def assignment(self) -> set:
+        return set(self._assignment)
+
+    def _rebalance(self) -> None:
+        """Pick up a new partition assignment when the group's generation changed."""
+        generation = self.broker.generation(self.group_id)
+        if generation == self._generation:
+            return
+        self._generation = generation
+        assigned = self.broker.assignment_for(self.group_id, self)
+        revoked = self._assignment - assigned
+        added = assigned - self._assignment
+        if revoked:
+            if self.enable_auto_commit:
+                self.commit({tp: OffsetAndMetadata(self._positions[tp], "", -1) for tp in revoked})
+            if self._listener is not None:
+                self._listener.on_partitions_revoked(revoked)
+            for tp in revoked:
+                self._positions.pop(tp, None)
+        self._assignment = assigned
+        for tp in added:
+            self._positions[tp] = self._initial_position(tp)
+        if added and self._listener is not None:
+            self._listener.on_partitions_assigned(added)
+
+    def _initial_position(self, tp: TopicPartition) -> int:
+        committed = self.broker.committed(self.group_id, tp.topic, tp.partition)
+        if committed is not None:
+            return committed
+        if self.auto_offset_reset == "earliest":
+            return self.broker.beginning_offset(tp.topic, tp.partition)
+        return self.broker.end_offset(tp.topic, tp.partition)
+
+    def seek(self, partition: TopicPartition, offset: int) -> None:
+        self._positions[partition] = offset
+
+    def position(self, partition: TopicPartition) -> int:
+        return self._positions[partition]
+
+    def committed(self, partition: TopicPartition):
+        return self.broker.committed(self.group_id, partition.topic, partition.partition)
+
+    def commit(self, offsets: dict = None) -> None:
+        """Commit {TopicPartition: OffsetAndMetadata or int}, or the current positions."""
+        if offsets is None:
+            offsets = {tp: self._positions[tp] for tp in self._assignment}
+        self.broker.commit(self.group_id, {
+            tp: getattr(offset, "offset", offset) for tp, offset in offsets.items()
+        })
+
+    def _fetch(self, max_records: int) -> dict:
+        records = {}
+        remaining = max_records
+        for tp in sorted(self._assignment):
+            if remaining <= 0:
+                break
+            fetched = self.broker.fetch(tp.topic, tp.partition, self._positions[tp], remaining)
+            if not fetched:
+                continue
+            records[tp] = [self._to_record(tp, offset, raw) for offset, raw in fetched]
+            self._positions[tp] = fetched[-1][0] + 1
+            remaining -= len(fetched)
+        return records
+
+    def _to_record(self, tp: TopicPartition, offset: int, raw) -> ConsumerRecord:
+        timestamp, key, value, headers = raw
+        if self.key_deserializer is not None and key is not None:
+            key = _deserialize(self.key_deserializer, tp.topic, headers, key)
+        if self.value_deserializer is not None and value is not None:
+            value = _deserialize(self.value_deserializer, tp.topic, headers, value)
+        return ConsumerRecord(tp.topic, tp.partition, offset, timestamp, key, value, headers)
+
+    def poll(self, timeout_ms: int = 0, max_records: int = None, update_offsets: bool = True) -> dict:
+        """Return {TopicPartition: [ConsumerRecord]} waiting up to `timeout_ms` for records."""
+        max_records = max_records or self.max_poll_records
+        deadline = time.monotonic() + timeout_ms / 1000.0
+        while True:
+            seen_version = self.broker.version
+            self._rebalance()
+            records = self._fetch(max_records)
+            if records:
+                if self.enable_auto_commit:
+                    self.commit()
+                return records
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._closed:
+                return {}
+            self.broker.wait(seen_version, remaining)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> ConsumerRecord:
+        if not self._iterator_buffer:
+            timeout_ms = self.consumer_timeout_ms
+            if timeout_ms == float("inf"):
+                while not self._iterator_buffer and not self._closed:
+                    self._fill_iterator(1000)
+            else:
+                self._fill_iterator(timeout_ms)
+            if not self._iterator_buffer:
+                raise StopIteration
+        return self._iterator_buffer.pop()
+
+    def _fill_iterator(self, timeout_ms) -> None:
+        records = self.poll(timeout_ms=timeout_ms)
+        batch = [record for partition_records in records.values() for record in partition_records]
+        batch.reverse()  # pop() from the end keeps the original order
+        self._iterator_buffer = batch
+
+    def close(self, autocommit: bool = True) -> None:
+        """Commit (if auto-commit is on) and leave the group."""
+        if self._closed:
+            return
+        if autocommit and self.enable_auto_commit and self._assignment:
+            self.commit()
+        self._closed = True
+        self.broker.leave(self.group_id, self)
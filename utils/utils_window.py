@@ -0,0 +1,306 @@
+"""
+utils_window.py - sliding windows with O(1) min/max for stream analytics.
+
+KeyedWindowStore tracks many keys at once (one window set per sensor). Each
+window keeps two monotonic queues (non-decreasing for the minimum,
+non-increasing for the maximum). Every reading is pushed and popped at most
+once per queue, so updates are amortized O(1) and the min/max lookup is O(1)
+regardless of window size. All state lives in preallocated array slabs.
+
+Windows can be bounded by count (last N readings) or by time (readings in
+the last N seconds).
+
+Usage:
+    from utils.utils_window import KeyedWindowStore
+    store = KeyedWindowStore(window_sizes=(10,), window_seconds=(60,))
+    slot = store.update("P1", 225.0, timestamp)
+    span = store.window_range(slot, 0)
+    if span is not None and span[1] - span[0] <= 0.2:
+        ...
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import time
+from array import array
+from collections import OrderedDict
+
+#####################################
+# Keyed Window Store
+#####################################
+
+DEFAULT_MAX_KEYS = 1024
+DEFAULT_TIME_CAPACITY = 256
+DEFAULT_MAX_TIME_CAPACITY = 8192
+
+
+class KeyedWindowStore:
+    """
+    Sliding min/max windows for many keys (e.g. probe ids) in flat arrays.
+
+    Every key is assigned a slot in preallocated `array` slabs: a ring buffer
+    of readings and timestamps, plus one monotonic min queue and one max
+    queue per window, stored as rings of sequence numbers. Memory is fixed
+    at construction and there are no per-key Python objects besides the
+    key -> slot mapping, which is kept in least-recently-seen order.
+
+    Keys idle for longer than `idle_seconds` are evicted; when every slot is
+    taken, the least recently seen key is evicted to make room.
+
+    Time windows start with `capacity` readings per key and double it (up to
+    `max_capacity`) whenever a key would otherwise overwrite a reading that
+    is still inside its longest time window. At the cap, a window reports
+    "not full" (no range) while a reading inside its span has been
+    overwritten, rather than a range over part of the span.
+    """
+
+    def __init__(
+        self,
+        window_sizes=(),
+        window_seconds=(),
+        max_keys: int = DEFAULT_MAX_KEYS,
+        capacity: int = None,
+        idle_seconds: float = 0,
+        max_capacity: int = DEFAULT_MAX_TIME_CAPACITY,
+    ):
+        """
+        Args:
+            window_sizes (iterable): Count-based windows (readings).
+            window_seconds (iterable): Time-based windows (seconds; readings need timestamps).
+            max_keys (int): Maximum number of keys tracked at once.
+            capacity (int, optional): Readings kept per key. Defaults to the largest
+                count window, or DEFAULT_TIME_CAPACITY when there are time windows.
+            idle_seconds (float): Evict keys not seen for this long (0 = never).
+            max_capacity (int): Upper bound when time windows grow `capacity`.
+        """
+        window_sizes = [int(size) for size in window_sizes]
+        window_seconds = [float(seconds) for seconds in window_seconds]
+        if not window_sizes and not window_seconds:
+            raise ValueError("KeyedWindowStore needs at least one window size or duration.")
+
+        if capacity is None:
+            capacity = max(window_sizes + [DEFAULT_TIME_CAPACITY if window_seconds else 1])
+        self.capacity = int(capacity)
+        self.max_capacity = max(self.capacity, int(max_capacity))
+        self.max_keys = int(max_keys)
+        self.idle_seconds = float(idle_seconds)
+
+        # (readings bound, seconds or None, label) per window
+        self.windows = [(min(size, self.capacity), None, f"{size} readings") for size in window_sizes]
+        self.windows += [(self.capacity, seconds, f"{seconds:g}s") for seconds in window_seconds]
+        self.labels = [label for _, _, label in self.windows]
+        self.timed = bool(window_seconds)
+        self._longest_seconds = max(window_seconds, default=0.0)
+
+        slab = self.max_keys * self.capacity
+        self._values = array("d", [0.0]) * slab
+        self._times = array("d", [0.0]) * slab
+        self._count = array("q", [0]) * self.max_keys
+        self._first_time = array("d", [0.0]) * self.max_keys
+        # Time of the newest reading overwritten in each key's ring
+        self._overwritten = array("d", [float("-inf")]) * self.max_keys
+        self._last_seen = array("d", [0.0]) * self.max_keys
+        self._flags = bytearray(self.max_keys * len(self.windows))
+
+        # Per window: [min queue, min head, min length, max queue, max head, max length]
+        self._queues = []
+        for bound, _, _ in self.windows:
+            self._queues.append([
+                array("q", [0]) * (self.max_keys * bound), array("l", [0]) * self.max_keys, array("l", [0]) * self.max_keys,
+                array("q", [0]) * (self.max_keys * bound), array("l", [0]) * self.max_keys, array("l", [0]) * self.max_keys,
+            ])
+
+        self._slots = OrderedDict()
+        self._free = list(range(self.max_keys - 1, -1, -1))
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        """Number of keys currently tracked."""
+        return len(self._slots)
+
+    def __contains__(self, key) -> bool:
+        return key in self._slots
+
+    def _release(self, key) -> None:
+        """Free a key's slot so it can be reused."""
+        slot = self._slots.pop(key)
+        self._count[slot] = 0
+        for w, queues in enumerate(self._queues):
+            queues[2][slot] = 0
+            queues[5][slot] = 0
+            self._flags[slot * len(self.windows) + w] = 0
+        self._free.append(slot)
+        self.evicted += 1
+
+    def evict_idle(self, now: float = None) -> list:
+        """
+        Evict keys that have not been seen for `idle_seconds`.
+
+        Returns:
+            list: The evicted keys.
+        """
+        if self.idle_seconds <= 0:
+            return []
+        cutoff = (time.monotonic() if now is None else now) - self.idle_seconds
+        evicted = []
+        while self._slots:
+            key, slot = next(iter(self._slots.items()))
+            if self._last_seen[slot] >= cutoff:
+                break
+            self._release(key)
+            evicted.append(key)
+        return evicted
+
+    def _slot_for(self, key, now: float) -> int:
+        """Return the key's slot, assigning (and if needed evicting) one for a new key."""
+        slot = self._slots.get(key)
+        if slot is not None:
+            self._slots.move_to_end(key)
+        else:
+            if not self._free:
+                self._release(next(iter(self._slots)))
+            slot = self._free.pop()
+            self._slots[key] = slot
+        self._last_seen[slot] = now
+        return slot
+
+    def _grow(self, capacity: int) -> None:
+        """Re-lay the reading rings and time-window queues for a larger per-key capacity."""
+        old = self.capacity
+        values = array("d", [0.0]) * (self.max_keys * capacity)
+        times = array("d", [0.0]) * (self.max_keys * capacity)
+        for slot in self._slots.values():
+            count = self._count[slot]
+            for seq in range(max(0, count - old), count):
+                values[slot * capacity + seq % capacity] = self._values[slot * old + seq % old]
+                times[slot * capacity + seq % capacity] = self._times[slot * old + seq % old]
+        self._values, self._times = values, times
+
+        for w, (bound, seconds, label) in enumerate(self.windows):
+            if seconds is None:
+                continue
+            queues = self._queues[w]
+            for q, h, l in ((0, 1, 2), (3, 4, 5)):
+                queue, heads, lengths = queues[q], queues[h], queues[l]
+                grown = array("q", [0]) * (self.max_keys * capacity)
+                for slot in self._slots.values():
+                    for i in range(lengths[slot]):
+                        grown[slot * capacity + i] = queue[slot * bound + (heads[slot] + i) % bound]
+                    heads[slot] = 0
+                queues[q] = grown
+            self.windows[w] = (capacity, seconds, label)
+        self.capacity = capacity
+
+    def update(self, key, value: float, timestamp: float = None, now: float = None) -> int:
+        """
+        Add a reading for a key.
+
+        Args:
+            key: Key (e.g. probe id) the reading belongs to.
+            value (float): The reading.
+            timestamp (float, optional): Reading time in seconds (required for time windows).
+            now (float, optional): Wall time used for idle eviction (defaults to time.monotonic()).
+
+        Returns:
+            int: The key's slot, for window_range() and set_flag().
+        """
+        now = time.monotonic() if now is None else now
+        self.evict_idle(now)
+        slot = self._slot_for(key, now)
+
+        seq = self._count[slot]
+        if self.timed and seq >= self.capacity and self.capacity < self.max_capacity:
+            # Grow rather than overwrite a reading the longest time window still covers
+            if self._times[slot * self.capacity + seq % self.capacity] >= timestamp - self._longest_seconds:
+                self._grow(min(self.capacity * 2, self.max_capacity))
+
+        cap = self.capacity
+        vbase = slot * cap
+        self._count[slot] = seq + 1
+        if seq == 0:
+            self._first_time[slot] = timestamp or 0.0
+            self._overwritten[slot] = float("-inf")
+        elif self.timed and seq >= cap:
+            self._overwritten[slot] = max(self._overwritten[slot], self._times[vbase + seq % cap])
+
+        values = self._values
+        for (bound, seconds, _), (min_q, min_h, min_l, max_q, max_h, max_l) in zip(self.windows, self._queues):
+            qbase = slot * bound
+            oldest = seq - bound + 1
+            for queue, heads, lengths, is_min in ((min_q, min_h, min_l, True), (max_q, max_h, max_l, False)):
+                head, length = heads[slot], lengths[slot]
+                # Drop readings that have slid out of the count bound
+                while length and queue[qbase + head] < oldest:
+                    head = (head + 1) % bound
+                    length -= 1
+                # Drop readings the new value dominates
+                while length:
+                    last = values[vbase + queue[qbase + (head + length - 1) % bound] % cap]
+                    if (last >= value) if is_min else (last <= value):
+                        length -= 1
+                    else:
+                        break
+                queue[qbase + (head + length) % bound] = seq
+                heads[slot], lengths[slot] = head, length + 1
+
+        values[vbase + seq % cap] = value
+        if timestamp is not None:
+            self._times[vbase + seq % cap] = timestamp
+
+        # Drop readings that have slid out of each time window
+        for (bound, seconds, _), queues in zip(self.windows, self._queues):
+            if seconds is None:
+                continue
+            cutoff = timestamp - seconds
+            qbase = slot * bound
+            for queue, heads, lengths in ((queues[0], queues[1], queues[2]), (queues[3], queues[4], queues[5])):
+                head, length = heads[slot], lengths[slot]
+                while length > 1 and self._times[vbase + queue[qbase + head] % cap] < cutoff:
+                    head = (head + 1) % bound
+                    length -= 1
+                heads[slot], lengths[slot] = head, length
+        return slot
+
+    def is_full(self, slot: int, window: int) -> bool:
+        """
+        True once the window for this slot covers its whole span.
+
+        A time window also needs every reading of its span still kept: no
+        reading overwritten at max_capacity may fall inside the window.
+        """
+        bound, seconds, _ = self.windows[window]
+        count = self._count[slot]
+        if seconds is None:
+            return count >= bound
+        last = self._times[slot * self.capacity + (count - 1) % self.capacity]
+        return last - self._first_time[slot] >= seconds and self._overwritten[slot] < last - seconds
+
+    def window_range(self, slot: int, window: int):
+        """
+        Return (min, max) of the readings in a window for this slot.
+
+        Returns:
+            tuple: (min, max), or None if the window is not full yet.
+        """
+        if not self.is_full(slot, window):
+            return None
+        bound = self.windows[window][0]
+        min_q, min_h, _, max_q, max_h, _ = self._queues[window]
+        vbase, qbase = slot * self.capacity, slot * bound
+        low = self._values[vbase + min_q[qbase + min_h[slot]] % self.capacity]
+        high = self._values[vbase + max_q[qbase + max_h[slot]] % self.capacity]
+        return low, high
+
+    def set_flag(self, slot: int, window: int, flag: bool) -> bool:
+        """
+        Set a per-key, per-window flag (e.g. "stalled").
+
+        Returns:
+            bool: True if the flag changed.
+        """
+        index = slot * len(self.windows) + window
+        changed = bool(self._flags[index]) != flag
+        self._flags[index] = flag
+        return changed
@@ -0,0 +1,623 @@
+"""
+utils_wire.py - compact binary wire format for rafting feedback messages.
+
+JSON messages repeat every key name, a 36-character UUID, ISO timestamps and
+the full comment text. The binary format (schema version 1) writes the
+fields in a fixed order instead:
+
+- a presence bitmap in place of key names
+- guide, trip_type, weather, status, comments, "yes"/"no", "N/A", ... as
+  1-byte references into a shared dictionary (other strings inline)
+- the UUID as 16 bytes, timestamps as int64 epoch microseconds, dates as
+  int32 epoch days
+- numbers as fixed-width int32 / float32 / float64 (float32 only when exact)
+- keys outside the schema as a small JSON tail
+
+Decoding gives back exactly the record that was encoded (same keys, values
+and types). Values the format cannot hold (lists, nested objects, huge ints)
+make that one message fall back to JSON.
+
+The format is negotiated per message with a `content-type` header:
+producers opt in with KAFKA_WIRE_FORMAT=binary, and consumers read either
+format (no header means JSON), so stages can be switched one at a time:
+
+    producer = create_kafka_producer(codec=get_json_codec(), wire_format=get_wire_format())
+    consumer = create_kafka_consumer(topic, group_id, codec=get_json_codec())
+
+Compare message sizes and speed:
+    python -m utils.utils_wire --benchmark 100000
+"""
+
+#####################################
+# Import Modules
+#####################################
+
+import argparse
+import json
+import os
+import struct
+import zlib
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from dotenv import load_dotenv
+from kafka.serializer import Deserializer, Serializer
+
+from utils.utils_codec import resolve_codec, sample_records, time_per_message
+from utils.utils_logger import logger
+
+#####################################
+# Load Environment Variables
+#####################################
+
+load_dotenv()
+
+#####################################
+# Default Configurations
+#####################################
+
+CONTENT_TYPE_HEADER = "content-type"
+JSON_CONTENT_TYPE = b"application/json"
+# Sent on every binary message, so kept short: "rafting-v<version>-<dictionary fingerprint>"
+BINARY_CONTENT_TYPE = "rafting-v{version}-{fingerprint:08x}"
+WIRE_FORMATS = ("json", "binary")
+DEFAULT_WIRE_FORMAT = "json"
+
+
+class WireError(ValueError):
+    """A value or message that the binary format cannot encode or decode."""
+
+#####################################
+# Value Tags
+#####################################
+
+# Each present field is one tag byte followed by its payload
+TAG_NONE, TAG_FALSE, TAG_TRUE = 0, 1, 2
+TAG_REF = 3        # u8 dictionary index
+TAG_STR = 4        # varint length + UTF-8
+TAG_INT32 = 5
+TAG_INT64 = 6
+TAG_FLOAT32 = 7
+TAG_FLOAT64 = 8
+TAG_UUID = 9       # 16 bytes, canonical lowercase string
+TAG_TIMESTAMP = 10 # int64 microseconds since 1970-01-01, naive ISO string
+TAG_DATE = 11      # int32 days since 1970-01-01, YYYY-MM-DD string
+
+_U16 = struct.Struct("<H")
+_I32 = struct.Struct("<i")
+_I64 = struct.Struct("<q")
+_F32 = struct.Struct("<f")
+_F64 = struct.Struct("<d")
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_DATE = EPOCH.date()
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos: int) -> tuple:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+@lru_cache(maxsize=4096)
+def _timestamp_micros(text: str):
+    """Epoch microseconds for a naive ISO timestamp that round-trips exactly, else None."""
+    try:
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if moment.tzinfo is not None or moment.isoformat() != text:
+        return None
+    return (moment - EPOCH) // ONE_MICROSECOND
+
+
+@lru_cache(maxsize=4096)
+def _micros_timestamp(micros: int) -> str:
+    return (EPOCH + timedelta(microseconds=micros)).isoformat()
+
+
+@lru_cache(maxsize=4096)
+def _date_days(text: str):
+    """Epoch days for a YYYY-MM-DD date that round-trips exactly, else None."""
+    try:
+        day = date.fromisoformat(text)
+    except ValueError:
+        return None
+    if day.isoformat() != text:
+        return None
+    return (day - EPOCH_DATE).days
+
+
+@lru_cache(maxsize=4096)
+def _days_date(days: int) -> str:
+    return (EPOCH_DATE + timedelta(days=days)).isoformat()
+
+
+_UUID_DASHES = (8, 13, 18, 23)
+
+
+def _uuid_bytes(text: str):
+    """16 bytes for a canonical (lowercase, hyphenated) UUID string, else None."""
+    if len(text) != 36 or any(text[i] != "-" for i in _UUID_DASHES) or text.lower() != text:
+        return None
+    try:
+        packed = bytes.fromhex(text.replace("-", ""))
+    except ValueError:
+        return None
+    return packed if len(packed) == 16 else None
+
+
+def _bytes_uuid(packed) -> str:
+    h = packed.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+#####################################
+# Feedback Schema
+#####################################
+
+class FeedbackSchema:
+    """One version of the binary layout: field order plus the shared string dictionary."""
+
+    def __init__(self, version: int, fields: tuple, dictionary: tuple, uuid_fields=(), timestamp_fields=(), date_fields=()):
+        """
+        Args:
+            version (int): Schema version (first byte of every message).
+            fields (tuple): Field names in wire order (at most 16).
+            dictionary (tuple): Strings written as 1-byte references (at most 256).
+            uuid_fields, timestamp_fields, date_fields: Fields whose strings may be
+                packed as UUID bytes, epoch microseconds, or epoch days.
+        """
+        if len(fields) > 16 or len(dictionary) > 256 or len(set(dictionary)) != len(dictionary):
+            raise ValueError("A schema holds at most 16 fields and 256 distinct dictionary strings.")
+        self.version = version
+        self.fields = tuple(fields)
+        self.dictionary = tuple(dictionary)
+        self._index = {text: i for i, text in enumerate(self.dictionary)}
+        self._field_set = frozenset(self.fields)
+        self._special = {
+            **{name: TAG_UUID for name in uuid_fields},
+            **{name: TAG_TIMESTAMP for name in timestamp_fields},
+            **{name: TAG_DATE for name in date_fields},
+        }
+        # Producers and consumers must agree on the dictionary, not just the version
+        fingerprint = zlib.crc32("\x00".join(self.fields + self.dictionary).encode("utf-8"))
+        self.content_type = BINARY_CONTENT_TYPE.format(version=version, fingerprint=fingerprint).encode("ascii")
+
+    def encode(self, record: dict) -> bytes:
+        """
+        Encode one record.
+
+        Raises:
+            WireError: The record is not a dict or holds a value the format cannot represent.
+        """
+        if not isinstance(record, dict):
+            raise WireError(f"Expected a dict, got {type(record).__name__}")
+        out = bytearray((self.version, 0, 0))
+        presence = present = 0
+        for bit, name in enumerate(self.fields):
+            if name in record:
+                presence |= 1 << bit
+                present += 1
+                self._encode_value(out, record[name], self._special.get(name))
+        _U16.pack_into(out, 1, presence)
+
+        if len(record) > present:
+            extras = {key: value for key, value in record.items() if key not in self._field_set}
+            tail = json.dumps(extras, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            _write_varint(out, len(tail))
+            out += tail
+        else:
+            out.append(0)
+        return bytes(out)
+
+    def _encode_value(self, out: bytearray, value, special) -> None:
+        if value is None:
+            out.append(TAG_NONE)
+        elif value is True:
+            out.append(TAG_TRUE)
+        elif value is False:
+            out.append(TAG_FALSE)
+        elif isinstance(value, str):
+            index = self._index.get(value)
+            if index is not None:
+                out.append(TAG_REF)
+                out.append(index)
+                return
+            if special == TAG_UUID:
+                packed = _uuid_bytes(value)
+                if packed is not None:
+                    out.append(TAG_UUID)
+                    out += packed
+                    return
+            elif special == TAG_TIMESTAMP:
+                micros = _timestamp_micros(value)
+                if micros is not None:
+                    out.append(TAG_TIMESTAMP)
+                    out += _I64.pack(micros)
+                    return
+            elif special == TAG_DATE:
+                days = _date_days(value)
+                if days is not None:
+                    out.append(TAG_DATE)
+                    out += _I32.pack(days)
+                    return
+            encoded = value.encode("utf-8")
+            out.append(TAG_STR)
+            _write_varint(out, len(encoded))
+            out += encoded
+        elif type(value) is int:
+            if -0x80000000 <= value <= 0x7FFFFFFF:
+                out.append(TAG_INT32)
+                out += _I32.pack(value)
+            elif -0x8000000000000000 <= value <= 0x7FFFFFFFFFFFFFFF:
+                out.append(TAG_INT64)
+                out += _I64.pack(value)
+            else:
+                raise WireError(f"Integer out of int64 range: {value}")
+        elif type(value) is float:
+            packed = _F32.pack(value) if abs(value) < 3.4e38 else None
+            if packed is not None and _F32.unpack(packed)[0] == value:
+                out.append(TAG_FLOAT32)
+                out += packed
+            else:
+                out.append(TAG_FLOAT64)
+                out += _F64.pack(value)
+        else:
+            raise WireError(f"Unsupported value type: {type(value).__name__}")
+
+    def decode(self, data) -> dict:
+        """
+        Decode one message produced by encode().
+
+        Raises:
+            WireError: Wrong schema version or a malformed message.
+        """
+        try:
+            if data[0] != self.version:
+                raise WireError(f"Message has schema version {data[0]}, expected {self.version}")
+            presence = _U16.unpack_from(data, 1)[0]
+            pos = 3
+            record = {}
+            dictionary = self.dictionary
+            for bit, name in enumerate(self.fields):
+                if not presence >> bit & 1:
+                    continue
+                tag = data[pos]
+                pos += 1
+                if tag == TAG_REF:
+                    value = dictionary[data[pos]]
+                    pos += 1
+                elif tag == TAG_STR:
+                    length, pos = _read_varint(data, pos)
+                    value = bytes(data[pos:pos + length]).decode("utf-8")
+                    pos += length
+                elif tag == TAG_INT32:
+                    value = _I32.unpack_from(data, pos)[0]
+                    pos += 4
+                elif tag == TAG_FLOAT32:
+                    value = _F32.unpack_from(data, pos)[0]
+                    pos += 4
+                elif tag == TAG_FLOAT64:
+                    value = _F64.unpack_from(data, pos)[0]
+                    pos += 8
+                elif tag == TAG_TIMESTAMP:
+                    value = _micros_timestamp(_I64.unpack_from(data, pos)[0])
+                    pos += 8
+                elif tag == TAG_DATE:
+                    value = _days_date(_I32.unpack_from(data, pos)[0])
+                    pos += 4
+                elif tag == TAG_UUID:
+                    value = _bytes_uuid(data[pos:pos + 16])
+                    pos += 16
+                elif tag == TAG_INT64:
+                    value = _I64.unpack_from(data, pos)[0]
+                    pos += 8
+                elif tag <= TAG_TRUE:
+                    value = (None, False, True)[tag]
+                else:
+                    raise WireError(f"Unknown value tag {tag}")
+                record[name] = value
+            length, pos = _read_varint(data, pos)
+            if length:
+                record.update(json.loads(bytes(data[pos:pos + length])))
+            return record
+        except (IndexError, struct.error, UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise WireError(f"Malformed binary message: {e}") from e
+
+#####################################
+# Schema Registry
+#####################################
+
+# Version 1, frozen: the dictionary is spelled out here rather than taken from
+# the data generators, so editing their comment or guide lists cannot change
+# the wire format. Never reorder or edit these values; add a new version
+# instead (consumers check the fingerprint in the content-type header).
+SCHEMA_V1 = FeedbackSchema(
+    1,
+    fields=(
+        "uuid", "timestamp", "date", "guide", "trip_type", "is_negative", "comment",
+        "weather", "temperature", "wind_speed", "rainfall", "river_flow", "water_level",
+        "water_temperature", "status", "trip_disruption",
+    ),
+    dictionary=(
+        "yes", "no", "N/A", "unknown", "Unknown", "Data Not Available", "possible",
+        "negative_feedback", "positive_feedback",
+        # Trip types
+        "Half Day", "Full Day",
+        # Guides
+        "Jake", "Samantha", "Carlos", "Emily", "Tyler", "Ava", "Liam", "Sophia", "Mason", "Olivia",
+        # Weather conditions
+        "Sunny", "Cloudy", "Rainy", "Stormy",
+        # Comments
+        "An absolutely thrilling experience! Would do it again.",
+        "Our guide was fantastic, made us feel safe the entire time.",
+        "The rapids were intense! Such an adrenaline rush.",
+        "A great weekend adventure, I highly recommend it.",
+        "Loved the scenery, the river was beautiful.",
+        "Best weekend trip I've had in years!",
+        "We got completely soaked, but it was worth it!",
+        "The guide was so knowledgeable, learned a lot about the river.",
+        "Perfect mix of excitement and relaxation.",
+        "Had a great time with family, will be back next year.",
+        "The guides were professional and super fun!",
+        "Everything was well-organized and seamless.",
+        "Loved the challenge of the rapids, definitely coming back.",
+        "The equipment was top-notch and well-maintained.",
+        "One of the best outdoor adventures I’ve ever had!",
+        "Great for both beginners and experienced rafters.",
+        "The lunch provided was delicious and fresh.",
+        "The guides really knew their stuff and made us feel comfortable.",
+        "An unforgettable experience, can’t wait to book again!",
+        "The whole trip was a perfect balance of fun and excitement.",
+        "We saw so much wildlife along the river, incredible!",
+        "Would highly recommend this for thrill-seekers.",
+        "Great bonding experience for our group.",
+        "Such a peaceful yet exhilarating adventure.",
+        "Loved the team spirit our guide encouraged.",
+        "The water was just perfect for rafting!",
+        "Felt completely safe the entire time.",
+        "A must-do experience for nature lovers!",
+        "We laughed so much! The guides were hilarious.",
+        "Amazing views, felt like a scene from a movie.",
+        "A bucket-list experience checked off!",
+        "The whole experience exceeded my expectations.",
+        "Loved the rush of navigating the rapids.",
+        "The trip was well-paced and enjoyable for all skill levels.",
+        "Even the calmer sections of the river were fun and engaging.",
+        "The pre-trip instructions were thorough and helpful.",
+        "A great way to escape the city and enjoy nature.",
+        "Met some awesome people on this trip!",
+        "So much fun! Worth every penny.",
+        "The sunset over the river was breathtaking.",
+        "We felt like pros thanks to the expert guidance.",
+        "Even my kids had an amazing time!",
+        "Great for corporate team-building activities.",
+        "The guides kept us entertained the whole time.",
+        "Loved the thrill of hitting the bigger waves!",
+        "Perfect mix of adventure and relaxation.",
+        "I can’t stop talking about this trip!",
+        "Saw an eagle soaring above us—what a moment!",
+        "Everything was well-planned and executed smoothly.",
+        "Already planning my next trip!",
+        "So much energy and enthusiasm from the guides.",
+        "This trip turned me into a rafting enthusiast!",
+        "Nothing beats the feeling of conquering a tough rapid!",
+        "The water was too rough, not what I expected.",
+        "Our guide seemed uninterested and didn't engage much.",
+        "The equipment was old and worn out.",
+        "Too many people on the raft, felt overcrowded.",
+        "Not enough instructions given before the trip.",
+        "The rapids were too intense for beginners.",
+        "Felt unsafe at times, the guide wasn't very reassuring.",
+        "Too expensive for what it was.",
+        "Expected a longer trip, but it felt too short.",
+        "The campsite was poorly maintained.",
+        "The guide was not engaging. Not what I expected.",
+        "The food provided was terrible and lacked options.",
+        "The bus ride to the starting point was uncomfortably long.",
+        "We had to wait too long before getting started.",
+        "The restroom facilities were dirty and lacked supplies.",
+        "The safety gear provided didn’t fit properly.",
+        "There was too much waiting around, not enough action.",
+        "Poor communication about what to bring and expect.",
+        "The experience did not match the description on the website.",
+        "The staff was rude and unhelpful when we asked questions.",
+        "The water was freezing, and we weren’t warned beforehand.",
+        "The pictures on the website were misleading.",
+        "Too many hidden fees, ended up costing way more than expected.",
+        "The wetsuits provided were smelly and damp.",
+        "We felt rushed through the entire experience.",
+        "The weather was bad, but no alternatives were offered.",
+        "Some sections felt too slow and boring.",
+        "We were split from our group without warning.",
+        "The booking process was confusing and frustrating.",
+        "The guides seemed more focused on their own fun than ours.",
+        "The shuttle service was late, causing delays.",
+        # Negative comments as csv_rafting_consumer publishes them (prefixed with a red 🛑)
+        "🛑 The water was too rough, not what I expected.",
+        "🛑 Our guide seemed uninterested and didn't engage much.",
+        "🛑 The equipment was old and worn out.",
+        "🛑 Too many people on the raft, felt overcrowded.",
+        "🛑 Not enough instructions given before the trip.",
+        "🛑 The rapids were too intense for beginners.",
+        "🛑 Felt unsafe at times, the guide wasn't very reassuring.",
+        "🛑 Too expensive for what it was.",
+        "🛑 Expected a longer trip, but it felt too short.",
+        "🛑 The campsite was poorly maintained.",
+        "🛑 The guide was not engaging. Not what I expected.",
+        "🛑 The food provided was terrible and lacked options.",
+        "🛑 The bus ride to the starting point was uncomfortably long.",
+        "🛑 We had to wait too long before getting started.",
+        "🛑 The restroom facilities were dirty and lacked supplies.",
+        "🛑 The safety gear provided didn’t fit properly.",
+        "🛑 There was too much waiting around, not enough action.",
+        "🛑 Poor communication about what to bring and expect.",
+        "🛑 The experience did not match the description on the website.",
+        "🛑 The staff was rude and unhelpful when we asked questions.",
+        "🛑 The water was freezing, and we weren’t warned beforehand.",
+        "🛑 The pictures on the website were misleading.",
+        "🛑 Too many hidden fees, ended up costing way more than expected.",
+        "🛑 The wetsuits provided were smelly and damp.",
+        "🛑 We felt rushed through the entire experience.",
+        "🛑 The weather was bad, but no alternatives were offered.",
+        "🛑 Some sections felt too slow and boring.",
+        "🛑 We were split from our group without warning.",
+        "🛑 The booking process was confusing and frustrating.",
+        "🛑 The guides seemed more focused on their own fun than ours.",
+        "🛑 The shuttle service was late, causing delays.",
+    ),
+    uuid_fields=("uuid",),
+    timestamp_fields=("timestamp",),
+    date_fields=("date",),
+)
+
+SCHEMAS = {SCHEMA_V1.content_type: SCHEMA_V1}
+CURRENT_SCHEMA = SCHEMA_V1
+
+
+def content_type_of(headers) -> bytes:
+    """Return the content-type header value, or None."""
+    for name, value in headers or ():
+        if name == CONTENT_TYPE_HEADER:
+            return value
+    return None
+
+#####################################
+# Kafka Serializer and Deserializer
+#####################################
+
+class WireSerializer(Serializer):
+    """Value serializer that writes the binary format and tags each message with its content-type."""
+
+    def __init__(self, codec, schema: FeedbackSchema = CURRENT_SCHEMA):
+        """
+        Args:
+            codec (Codec or str): JSON codec for messages the schema cannot hold.
+            schema (FeedbackSchema): Binary layout to write.
+        """
+        self.codec = resolve_codec(codec)
+        self.schema = schema
+        self.json_fallbacks = 0
+
+    def serialize(self, topic, headers, data):
+        try:
+            encoded = self.schema.encode(data)
+        except WireError as e:
+            self.json_fallbacks += 1
+            if self.json_fallbacks == 1:
+                logger.warning(f"Sending JSON instead of binary on '{topic}': {e}")
+            headers.append((CONTENT_TYPE_HEADER, JSON_CONTENT_TYPE))
+            return self.codec.encode(data)
+        headers.append((CONTENT_TYPE_HEADER, self.schema.content_type))
+        return encoded
+
+
+class WireDeserializer(Deserializer):
+    """Value deserializer that reads binary or JSON messages according to their content-type."""
+
+    def __init__(self, codec, skip_invalid: bool = False):
+        """
+        Args:
+            codec (Codec or str): JSON codec for messages without a binary content-type.
+            skip_invalid (bool): Log malformed messages and return None instead of raising.
+        """
+        self.codec = resolve_codec(codec)
+        self.skip_invalid = skip_invalid
+        self._errors = (WireError,) + tuple(self.codec.errors)
+
+    def deserialize(self, topic, headers, data):
+        content_type = content_type_of(headers) if headers else None
+        try:
+            if content_type is None or content_type == JSON_CONTENT_TYPE:
+                return self.codec.decode(data)
+            schema = SCHEMAS.get(content_type)
+            if schema is None:
+                raise WireError(f"Unknown content-type {content_type!r} (schema version or dictionary mismatch)")
+            return schema.decode(data)
+        except self._errors:
+            if not self.skip_invalid:
+                raise
+            logger.error(f"Invalid message on '{topic}' ({content_type!r}): {bytes(data[:64])!r}")
+            return None
+
+#####################################
+# Getter Functions for .env Variables
+#####################################
+
+def get_wire_format() -> str:
+    """Fetch the wire format rafting producers write: 'json' or 'binary'."""
+    wire_format = os.getenv("KAFKA_WIRE_FORMAT", DEFAULT_WIRE_FORMAT).strip().lower() or DEFAULT_WIRE_FORMAT
+    if wire_format not in WIRE_FORMATS:
+        logger.warning(f"Unknown KAFKA_WIRE_FORMAT '{wire_format}'; using {DEFAULT_WIRE_FORMAT}.")
+        wire_format = DEFAULT_WIRE_FORMAT
+    logger.info(f"Kafka wire format: {wire_format}")
+    return wire_format
+
+#####################################
+# Benchmark
+#####################################
+
+def benchmark(count: int, enriched: bool = False, codec="auto") -> dict:
+    """Compare bytes per message (value plus headers) and encode/decode time for JSON and binary."""
+    codec = resolve_codec(codec)
+    records = sample_records(count, enriched)
+    if enriched:
+        records = [{**record, "is_negative": "yes" if record["is_negative"] else "no"} for record in records]
+
+    serializer = WireSerializer(codec)
+    deserializer = WireDeserializer(codec)
+    json_payloads = [codec.encode(record) for record in records]
+    binary_payloads = []
+    for record in records:
+        headers = []
+        binary_payloads.append((serializer.serialize("bench", headers, record), headers))
+    assert all(deserializer.deserialize("bench", h, p) == r for (p, h), r in zip(binary_payloads[:1000], records))
+
+    header_bytes = sum(len(name) + len(value) for name, value in binary_payloads[0][1])
+    json_bytes = sum(map(len, json_payloads)) / count
+    binary_bytes = sum(len(payload) for payload, _ in binary_payloads) / count + header_bytes
+    return {
+        "messages": count,
+        "enriched": enriched,
+        "codec": codec.name,
+        "json": {
+            "bytes": round(json_bytes, 1),
+            "encode_us": round(time_per_message(codec.encode, records), 3),
+            "decode_us": round(time_per_message(codec.decode, json_payloads), 3),
+        },
+        "binary": {
+            "bytes": round(binary_bytes, 1),
+            "header_bytes": header_bytes,
+            "encode_us": round(time_per_message(lambda r: serializer.serialize("bench", [], r), records), 3),
+            "decode_us": round(time_per_message(lambda ph: deserializer.deserialize("bench", ph[1], ph[0]), binary_payloads), 3),
+        },
+        "size_ratio": round(json_bytes / binary_bytes, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the JSON and binary wire formats on rafting records.")
+    parser.add_argument("--benchmark", type=int, default=100_000, metavar="MESSAGES",
+                        help="Messages to encode and decode (default: 100,000).")
+    parser.add_argument("--enriched", action="store_true",
+                        help="Use records shaped like csv_rafting_consumer's output.")
+    parser.add_argument("--codec", default="auto", help="JSON codec to compare against (default: auto).")
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.benchmark, args.enriched, args.codec), indent=2))
+
+
+if __name__ == "__main__":
+    main()